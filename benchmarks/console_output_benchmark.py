@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Benchmark of console output throughput
+
+Colored lines are written to a console by chunks, as they are read from the
+standard output of an external shell, and the event loop is run between
+chunks. Throughput is given in lines per second, for the current output path
+(coalesced flushes, rendering in one edit block, trimmed lines dropped) and
+for a reference path which flushes each chunk, inserts all its lines and
+forces a synchronous repaint (this is how consoles used to write output).
+
+Usage: python console_output_benchmark.py [number of lines]
+(default: 100000 lines)
+"""
+
+from __future__ import print_function
+
+import os
+import os.path as osp
+import sys
+import tempfile
+import time
+
+from qtpy.QtCore import QCoreApplication
+from qtpy.QtWidgets import QApplication
+
+from spyderlib.widgets.shell import PythonShellWidget
+
+
+# Lines read at once from the standard output of the process
+CHUNK_LINES = 100
+
+# Console line limit (default value of the console plugins)
+MAX_LINE_COUNT = 500
+
+LINE = '\x1b[1;32mline %d\x1b[0m of \x1b[34mcolored\x1b[0m output\n'
+
+
+class ReferenceShellWidget(PythonShellWidget):
+    """Shell writing output like consoles used to do"""
+    def write(self, text, flush=False, error=False, prompt=False):
+        PythonShellWidget.write(self, text, flush=True, error=error,
+                                prompt=prompt)
+
+    def flush(self, error=False, prompt=False):
+        PythonShellWidget.flush(self, error=error, prompt=prompt)
+        QCoreApplication.processEvents()
+        self.repaint()
+
+    def drop_trimmed_text(self, text, ansi=True):
+        return text
+
+
+def write_lines(app, shell, lines):
+    """Write *lines* lines to *shell* and return throughput (lines/s)"""
+    t0 = time.time()
+    for start in range(0, lines, CHUNK_LINES):
+        stop = min(start+CHUNK_LINES, lines)
+        shell.write(''.join([LINE % index for index in range(start, stop)]))
+        app.processEvents()
+    shell.flush()
+    app.processEvents()
+    duration = time.time()-t0
+    last_line = shell.document().lastBlock().previous().text()
+    assert last_line == (LINE % (lines-1)).replace('\x1b[1;32m', '').replace(
+                        '\x1b[34m', '').replace('\x1b[0m', '').strip(), \
+           last_line
+    assert shell.document().blockCount() <= MAX_LINE_COUNT
+    return lines/duration
+
+
+def run(lines):
+    """Run benchmark"""
+    app = QApplication.instance() or QApplication([])
+    fd, history_filename = tempfile.mkstemp(suffix='.py')
+    os.close(fd)
+    os.remove(history_filename)
+    try:
+        for title, klass in (("reference", ReferenceShellWidget),
+                             ("coalesced", PythonShellWidget)):
+            shell = klass(None, history_filename)
+            shell.setMaximumBlockCount(MAX_LINE_COUNT)
+            shell.resize(800, 600)
+            shell.show()
+            app.processEvents()
+            throughput = write_lines(app, shell, lines)
+            print("%-12s %8d lines %12.0f lines/s" % (title, lines,
+                                                       throughput))
+            shell.close()
+    finally:
+        if osp.isfile(history_filename):
+            os.remove(history_filename)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
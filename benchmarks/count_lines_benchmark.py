@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Benchmark of project statistics (spyderlib.utils.misc.count_lines)
+
+A synthetic tree of Python and C files is created in a temporary directory
+(with an excluded build directory, whose files are never read). Lines are
+counted by a reference implementation, which reads each file fully and counts
+files serially (this is how count_lines used to work), then by the streaming
+implementation in this process and with a pool of worker processes.
+
+Usage: python count_lines_benchmark.py [number of files] [processes]
+(default: 50000 files, one process per CPU)
+"""
+
+from __future__ import print_function
+
+import multiprocessing
+import os
+import os.path as osp
+import shutil
+import sys
+import tempfile
+import time
+
+from spyderlib.utils import misc
+
+
+# Files by directory of the synthetic tree
+FILES_PER_DIRECTORY = 100
+
+SOURCE = ['import os', '', 'def function(x):', '    """Docstring"""',
+          '    return x*2', '', '']
+
+
+def reference_count_lines(path, extensions, excluded_dirnames):
+    """Count lines like count_lines used to do"""
+    files, lines = 0, 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for d in dirnames[:]:
+            if d in excluded_dirnames:
+                dirnames.remove(d)
+        for fname in filenames:
+            if osp.splitext(fname)[1] in extensions:
+                with open(osp.join(dirpath, fname), 'rb') as textfile:
+                    lines += len(textfile.read().strip().splitlines())
+                files += 1
+    return files, lines
+
+
+def create_tree(path, files):
+    """Create a synthetic tree of *files* source files in *path*"""
+    for index in range(files):
+        dirname = osp.join(path, 'package%d' % (index//FILES_PER_DIRECTORY))
+        if not osp.isdir(dirname):
+            os.makedirs(dirname)
+        extension = '.c' if index % 10 == 0 else '.py'
+        with open(osp.join(dirname, 'module%d%s' % (index, extension)),
+                  'w') as fdesc:
+            fdesc.write('\n'.join(SOURCE*(1+index % 20)))
+    # Excluded directory
+    dirname = osp.join(path, 'build')
+    os.makedirs(dirname)
+    for index in range(files//10):
+        with open(osp.join(dirname, 'module%d.py' % index), 'w') as fdesc:
+            fdesc.write('\n'.join(SOURCE))
+
+
+def run(files, processes):
+    """Run benchmark"""
+    path = tempfile.mkdtemp()
+    try:
+        create_tree(path, files)
+        extensions = misc.COUNT_LINES_EXTENSIONS
+        excluded_dirnames = misc.COUNT_LINES_EXCLUDED_DIRNAMES
+        t0 = time.time()
+        expected = reference_count_lines(path, extensions, excluded_dirnames)
+        print("%-24s %8.2f s" % ("reference", time.time()-t0))
+        for title, nprocs in (("streaming", 1),
+                              ("streaming, %d processes" % processes,
+                               processes)):
+            t0 = time.time()
+            result = misc.count_lines(path, processes=nprocs)
+            print("%-24s %8.2f s" % (title, time.time()-t0))
+            assert result == expected, (result, expected)
+        print("%d files, %d lines" % expected)
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count())
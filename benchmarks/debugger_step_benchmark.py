@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Benchmark of debugger stepping latency
+
+A debugger steps through a generated script and notifies each step to
+Spyder's notification thread, through a socket, like the monitor of external
+shells does. The notification is acknowledged when the step has been
+processed by the Qt event loop (as done by ExternalPythonShell.pdb_step).
+The previous implementation, which slept 100 ms after each notification, is
+measured on a few steps for comparison.
+
+Usage: python debugger_step_benchmark.py [number of steps]
+(default: 1000 steps)
+"""
+
+from __future__ import print_function
+
+import bdb
+import socket
+import sys
+import threading
+import time
+
+from qtpy.QtCore import QObject
+from qtpy.QtWidgets import QApplication
+
+from spyderlib.utils.bsdsocket import communicate
+from spyderlib.widgets.externalshell.introspection import NotificationThread
+
+
+# Steps measured with the previous implementation
+SLEEP_STEPS = 20
+
+
+def get_socket_pair():
+    """Return a pair of connected sockets"""
+    server = socket.socket(socket.AF_INET)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    client = socket.socket(socket.AF_INET)
+    client.connect(server.getsockname())
+    connection, _address = server.accept()
+    server.close()
+    return client, connection
+
+
+class StepDebugger(bdb.Bdb):
+    """Debugger stepping through every line and notifying each step"""
+    def __init__(self, notify_socket, filename, sleep):
+        bdb.Bdb.__init__(self)
+        self.notify_socket = notify_socket
+        self.filename = filename
+        self.sleep = sleep
+        self.durations = []
+
+    def user_line(self, frame):
+        if frame.f_code.co_filename != self.filename:
+            self.set_step()
+            return
+        t0 = time.time()
+        communicate(self.notify_socket,
+                    dict(command="pdb_step",
+                         data=(self.filename, frame.f_lineno)))
+        if self.sleep:
+            time.sleep(0.1)
+        self.durations.append(time.time()-t0)
+        self.set_step()
+
+
+class StepReceiver(QObject):
+    """Process step notifications in the GUI thread"""
+    def __init__(self, thread):
+        QObject.__init__(self)
+        self.thread = thread
+        self.steps = 0
+
+    def pdb_step(self, fname, lineno):
+        self.steps += 1
+        self.thread.consume_pdb_step()
+
+
+def run_debugger(notify_socket, steps, sleep):
+    """Step through a script of *steps* lines"""
+    filename = '<debugger_step_benchmark>'
+    source = '\n'.join(['x = %d' % index for index in range(steps)])
+    code = compile(source, filename, 'exec')
+    debugger = StepDebugger(notify_socket, filename, sleep)
+    debugger.run(code, {})
+    return debugger.durations
+
+
+def report(title, durations):
+    """Print latency statistics"""
+    durations = sorted(durations)
+    mean = sum(durations)/len(durations)
+    print("%-28s %6d steps  mean %8.3f ms  median %8.3f ms  max %8.3f ms"
+          % (title, len(durations), mean*1000,
+             durations[len(durations)//2]*1000, durations[-1]*1000))
+
+
+def run(steps):
+    """Run benchmark"""
+    app = QApplication.instance() or QApplication([])
+    monitor_socket, gui_socket = get_socket_pair()
+    thread = NotificationThread()
+    thread.set_notify_socket(gui_socket)
+    receiver = StepReceiver(thread)
+    thread.sig_pdb.connect(receiver.pdb_step)
+    thread.start()
+
+    # The debugger runs in another thread (i.e. the external shell process)
+    # while notifications are processed by the event loop
+    results = {}
+    def debug():
+        results['ack'] = run_debugger(monitor_socket, steps, False)
+        results['sleep'] = run_debugger(monitor_socket, SLEEP_STEPS, True)
+    debugger_thread = threading.Thread(target=debug)
+    debugger_thread.start()
+    while debugger_thread.is_alive():
+        app.processEvents()
+        debugger_thread.join(0.0005)
+    assert receiver.steps == steps + SLEEP_STEPS, receiver.steps
+    report("acknowledged notification", results['ack'])
+    report("sleep after notification", results['sleep'])
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
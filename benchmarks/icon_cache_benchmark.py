@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Benchmark of the icons cache of spyderlib.utils.icon_manager
+
+Icons are requested the way a tree is populated by the explorers, the
+outline explorer or Find in Files: one file type icon per file and one
+symbol icon per class/function of the files of the spyderlib package.
+
+Usage: python icon_cache_benchmark.py [theme1 theme2 ...]
+(default themes: 'spyder 2' 'spyder 3')
+"""
+
+from __future__ import print_function
+
+import os
+import os.path as osp
+import sys
+import time
+
+from qtpy.QtWidgets import QApplication
+
+from spyderlib.config.main import CONF
+from spyderlib.utils import icon_manager as ima
+from spyderlib.utils.qthelpers import get_filetype_icon
+from spyderlib.utils.symbolindex import get_file_symbols
+
+
+def get_tree_items():
+    """Return file names and symbol icon names of spyderlib files"""
+    root_path = osp.dirname(osp.dirname(osp.abspath(ima.__file__)))
+    filenames, symbols = [], []
+    for dirpath, _dirnames, basenames in os.walk(root_path):
+        for basename in basenames:
+            filename = osp.join(dirpath, basename)
+            filenames.append(filename)
+            if basename.endswith('.py'):
+                for _line, name, level, token in get_file_symbols(filename):
+                    if token == 'class':
+                        symbols.append('class')
+                    elif name.startswith('_'):
+                        symbols.append('private1')
+                    else:
+                        symbols.append('method' if level else 'function')
+    return filenames, symbols
+
+
+def populate(filenames, symbols, cached):
+    """Request icons of all tree items and return duration in ms"""
+    t0 = time.time()
+    for filename in filenames:
+        if not cached:
+            ima.clear_cache()
+        get_filetype_icon(filename)
+    for name in symbols:
+        if not cached:
+            ima.clear_cache()
+        ima.icon(name)
+    return (time.time()-t0)*1000
+
+
+def run(theme):
+    """Run benchmark with icon *theme*"""
+    filenames, symbols = get_tree_items()
+    CONF.set('main', 'icon_theme', theme)
+    print("Theme %r: %d files, %d symbols" % (theme, len(filenames),
+                                              len(symbols)))
+    uncached_time = populate(filenames, symbols, cached=False)
+    ima.clear_cache()
+    hits0, misses0, _size = ima.get_cache_info()
+    cached_time = populate(filenames, symbols, cached=True)
+    hits, misses, size = ima.get_cache_info()
+    hits, misses = hits-hits0, misses-misses0
+    print("  icon requests:      %d" % (hits+misses))
+    print("  icons constructed:  %d (%d saved)" % (misses, hits))
+    print("  cached icons:       %d" % size)
+    print("  without cache:      %.1f ms" % uncached_time)
+    print("  with cache:         %.1f ms" % cached_time)
+    print()
+
+
+if __name__ == '__main__':
+    app = QApplication([])
+    original_theme = CONF.get('main', 'icon_theme')
+    try:
+        for theme in sys.argv[1:] or ['spyder 2', 'spyder 3']:
+            run(theme)
+    finally:
+        CONF.set('main', 'icon_theme', original_theme)
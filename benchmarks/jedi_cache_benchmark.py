@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Benchmark of the Jedi introspection plugin on a large module
+
+Requests are sent to the Jedi plugin on a synthetic module, like the editor
+does:
+- same position: completions, calltip and go-to-definition at the cursor
+- cursor moved: completions at different lines of an unchanged buffer
+- typing: completions after each character typed at the end of a line
+
+Each scenario is timed for the current plugin (scripts reused at the same
+position, created with the file path otherwise) and for a reference plugin
+which creates a new Jedi script for every request (this is how the plugin
+used to work).
+
+Usage: python jedi_cache_benchmark.py [number of lines] [requests]
+(default: 5000 lines, 20 requests by scenario)
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+import time
+
+from spyderlib.utils.introspection.jedi_plugin import JediPlugin
+from spyderlib.utils.introspection.utils import CodeInfo
+
+
+CLASS = '''
+class Class%d(object):
+    """Class %d"""
+    def __init__(self, value):
+        self.value = value
+
+    def method(self, factor=2):
+        """Return value times *factor*"""
+        return self.value*factor
+
+'''
+
+USAGE = 'instance = Class0(1)\ninstance.'
+
+
+class ReferenceJediPlugin(JediPlugin):
+    """Jedi plugin creating a new script for every request"""
+    def call_jedi_script(self, func_name, info, path):
+        self.scripts.clear()
+        return JediPlugin.call_jedi_script(self, func_name, info, path)
+
+
+def get_source(lines):
+    """Return source code of a module of about *lines* lines"""
+    classes = max(1, (lines-2)//CLASS.count('\n'))
+    return ''.join([CLASS % (index, index) for index in range(classes)])
+
+
+def send_requests(plugin, filename, source, scenario, requests):
+    """Send *requests* requests of *scenario* to *plugin*, return the mean
+    duration of requests (ms)"""
+    t0 = time.time()
+    for index in range(requests):
+        if scenario == 'same position':
+            code = source + USAGE + 'method'
+            for name in ('completions', 'info', 'definition'):
+                info = CodeInfo(name, code, len(code), filename)
+                getattr(plugin, 'get_' + name)(info)
+        elif scenario == 'cursor moved':
+            code = source + USAGE
+            # Attributes of self in a different method at each request
+            position = code.find('self.value*factor',
+                                 index*len(CLASS)) + len('self.')
+            plugin.get_completions(CodeInfo('completions', code, position,
+                                            filename))
+        else:
+            # Typing
+            code = source + USAGE + 'method'[:index % 6]
+            plugin.get_completions(CodeInfo('completions', code, len(code),
+                                            filename))
+    return 1e3*(time.time()-t0)/requests
+
+
+def run(lines, requests):
+    """Run benchmark"""
+    source = get_source(lines)
+    fd, filename = tempfile.mkstemp(suffix='.py')
+    os.close(fd)
+    try:
+        with open(filename, 'w') as fdesc:
+            fdesc.write(source)
+        print("%d lines, %d requests by scenario" % (source.count('\n'),
+                                                      requests))
+        for scenario in ('same position', 'cursor moved', 'typing'):
+            for title, klass in (("reference", ReferenceJediPlugin),
+                                 ("cached", JediPlugin)):
+                plugin = klass()
+                duration = send_requests(plugin, filename, source, scenario,
+                                         requests)
+                print("%-14s %-10s %10.1f ms/request" % (scenario, title,
+                                                         duration))
+    finally:
+        os.remove(filename)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20)
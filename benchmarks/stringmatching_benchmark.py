@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Benchmark of the fuzzy search scorers of spyderlib.utils.stringmatching
+
+Usage: python stringmatching_benchmark.py [size1 size2 ...]
+(default sizes: 10000 100000 1000000)
+"""
+
+from __future__ import print_function
+
+import random
+import re
+import sys
+import time
+
+from spyderlib.utils.stringmatching import (get_search_regex, get_search_score,
+                                            get_search_scores, SearchScorer)
+
+
+WORDS = ['get', 'set', 'file', 'name', 'path', 'editor', 'stack', 'plugin',
+         'widget', 'config', 'project', 'symbol', 'index', 'update', 'data',
+         'thread', 'manager', 'client', 'server', 'text', 'line', 'cursor']
+
+QUERIES = ['e', 'ed', 'edit', 'editst', 'getfilename', 'zzz']
+
+
+def get_choices(size, seed=0):
+    """Return *size* synthetic symbol names"""
+    rand = random.Random(seed)
+    return ['_'.join(rand.choice(WORDS) for _index in range(rand.randint(1, 4)))
+            for _index in range(size)]
+
+
+def reference_search_scores(query, choices, template):
+    """Valid and sorted scores computed by get_search_score, choice by choice
+    (this is how get_search_scores used to work)"""
+    pattern = get_search_regex(query)
+    results = [get_search_score(query, choice, apply_regex=False,
+                                template=template)
+               for choice in choices if re.search(pattern, choice)]
+    return sorted(results, key=lambda row: row[-1])
+
+
+def timeit(func, *args, **kwargs):
+    """Return duration of func(*args, **kwargs) in ms and result"""
+    t0 = time.time()
+    result = func(*args, **kwargs)
+    return (time.time()-t0)*1000, result
+
+
+def run(size, with_reference=True):
+    """Run benchmark on *size* choices"""
+    template = '<b>{0}</b>'
+    choices = get_choices(size)
+    print("%d choices" % size)
+    print("%-12s %12s %12s %12s %12s" % ("query", "reference", "all scores",
+                                         "top 50", "incremental"))
+    scorer = SearchScorer(choices)
+    for query in QUERIES:
+        if with_reference:
+            ref_time, reference = timeit(reference_search_scores, query,
+                                         choices, template)
+            ref_text = "%.1f ms" % ref_time
+        else:
+            ref_text = "-"
+        all_time, results = timeit(get_search_scores, query, choices,
+                                   template=template, valid_only=True,
+                                   sort=True)
+        top_time, top = timeit(get_search_scores, query, choices,
+                               template=template, limit=50)
+        if with_reference:
+            assert [row[-1] for row in results] == \
+                   [row[-1] for row in reference]
+        assert [row[-1] for row in top] == [row[-1] for row in results[:50]]
+        # Incremental search: the query is typed letter by letter and only
+        # the last letter is timed
+        for index in range(1, len(query)):
+            scorer.search(query[:index], template, limit=50)
+        inc_time, _results = timeit(scorer.search, query, template, limit=50)
+        print("%-12s %12s %9.1f ms %9.1f ms %9.1f ms" % (query, ref_text,
+                                                        all_time, top_time,
+                                                        inc_time))
+    print()
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    for size in sizes:
+        # The reference implementation is way too slow for 1M choices
+        run(size, with_reference=size <= 100000)
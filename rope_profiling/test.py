@@ -100,6 +100,45 @@ def other_features():
     print doc_text
     print '*********************' + '*'*60
     
+def first_completion(cache_path, warm_up):
+    """Return time to first completion (ms) in script.py with Spyder's rope
+    plugin, its project data being stored in *cache_path*"""
+    from spyderlib.utils.introspection import rope_plugin
+    from spyderlib.utils.introspection.utils import CodeInfo
+    rope_plugin.ROPE_CACHE_PATH = cache_path
+    plugin = rope_plugin.RopePlugin()
+    plugin.load_plugin()
+    plugin.set_project_paths([osp.abspath('src')])
+    if warm_up:
+        # Idle time of the introspection server
+        while plugin.idle():
+            pass
+    filename = osp.abspath(osp.join('src', 'script.py'))
+    with open(filename) as fdesc:
+        source_code = fdesc.read()
+    t0 = time.time()
+    plugin.get_completions(CodeInfo('completions', source_code,
+                                    len(source_code), filename))
+    dt = 10*round(1e2*(time.time()-t0))
+    plugin.close_rope_project()
+    return dt
+
+def first_completion_test():
+    """Measure time to first completion with a cold or warm rope project"""
+    import shutil, tempfile
+    cache_path = tempfile.mkdtemp()
+    try:
+        msg = "Time to first completion"
+        print(msg)
+        print("="*len(msg))
+        for title, warm_up in (("cold (new project)", False),
+                               ("warm (after idle warm-up)", True),
+                               ("reopened (cached project data)", True)):
+            print("%s: %d ms" % (title, first_completion(cache_path, warm_up)))
+    finally:
+        shutil.rmtree(cache_path)
+
 if __name__ == '__main__':
 #    ropetest()
-    other_features()
\ No newline at end of file
+    other_features()
+    first_completion_test()
\ No newline at end of file
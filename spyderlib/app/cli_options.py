@@ -37,6 +37,9 @@ def get_options():
     parser.add_option('--profile', action='store_true', default=False,
                       help="Profile mode (internal test, "
                            "not related with Python profiling)")
+    parser.add_option('--profile-startup', action='store_true', default=False,
+                      help="Print (and save in Spyder's configuration "
+                           "directory) import and creation time of plugins")
     parser.add_option('--window-title', type=str, default=None,
                       help="String to show in the main window title")
     options, args = parser.parse_args()
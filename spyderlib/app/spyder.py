@@ -48,6 +48,11 @@ requirements.check_path()
 requirements.check_qt()
 
 
+# Startup profiler: imported first so that Spyder's own imports are measured
+from spyderlib.utils.startupprofiler import (STARTUP_PROFILER, IMPORT,
+                                            CONSTRUCTION)
+
+
 #==============================================================================
 # Windows only: support for hiding console window when started with python.exe
 #==============================================================================
@@ -109,6 +114,7 @@ SPLASH.show()
 SPLASH.showMessage(_("Initializing..."), Qt.AlignBottom | Qt.AlignCenter |
                    Qt.AlignAbsolute, QColor(Qt.white))
 QApplication.processEvents()
+STARTUP_PROFILER.add_milestone("Splash screen shown")
 
 
 #==============================================================================
@@ -129,7 +135,6 @@ from spyderlib.py3compat import (getcwd, is_text_string, to_text_string,
                                  PY3, qbytearray_to_str, u, configparser as cp)
 from spyderlib.utils import encoding, programs
 from spyderlib.utils import icon_manager as ima
-from spyderlib.utils.introspection import module_completion
 from spyderlib.utils.iofuncs import load_session, save_session, reset_session
 from spyderlib.utils.programs import is_module_installed
 from spyderlib.utils.misc import select_port
@@ -154,6 +159,7 @@ from spyderlib.utils.qthelpers import (create_action, add_actions, get_icon,
 from spyderlib.config.gui import get_shortcut, remove_deprecated_shortcuts
 from spyderlib.otherplugins import get_spyderplugins_mods
 from spyderlib.app import tour
+STARTUP_PROFILER.add_milestone("Spyder modules imported")
 
 
 #==============================================================================
@@ -333,6 +339,8 @@ class MainWindow(QMainWindow):
         self.variableexplorer = None
         self.findinfiles = None
         self.thirdparty_plugins = []
+        # Plugins created on demand: name: (placeholder action, factory)
+        self.lazy_plugins = {}
 
         # Tour  # TODO: Should I consider it a plugin?? or?
         self.tour = None
@@ -683,8 +691,7 @@ class MainWindow(QMainWindow):
                                 menurole=QAction.ApplicationSpecificRole)
         update_modules_action = create_action(self,
                                     _("Update module names list"),
-                                    triggered=lambda:
-                                                module_completion.reset(),
+                                    triggered=self.reset_module_completion,
                                     tip=_("Refresh list of module names "
                                             "available in PYTHONPATH"))
         reset_spyder_action = create_action(
@@ -813,46 +820,57 @@ class MainWindow(QMainWindow):
 
         # Internal console plugin
         self.debug_print("  ..plugin: internal console")
-        from spyderlib.plugins.console import Console
-        self.console = Console(self, namespace, exitfunc=self.closing,
-                            profile=self.profile,
-                            multithreaded=self.multithreaded,
-                            message=_("Spyder Internal Console\n\n"
+        with STARTUP_PROFILER.measure("Internal console", IMPORT):
+            from spyderlib.plugins.console import Console
+        with STARTUP_PROFILER.measure("Internal console", CONSTRUCTION):
+            self.console = Console(self, namespace, exitfunc=self.closing,
+                                profile=self.profile,
+                                multithreaded=self.multithreaded,
+                                message=_("Spyder Internal Console\n\n"
                                     "This console is used to report application\n"
                                     "internal errors and to inspect Spyder\n"
                                     "internals with the following commands:\n"
                                     "  spy.app, spy.window, dir(spy)\n\n"
                                     "Please don't use it to run your code\n\n"))
-        self.console.register_plugin()
+            self.console.register_plugin()
 
         # Working directory plugin
         self.debug_print("  ..plugin: working directory")
-        from spyderlib.plugins.workingdirectory import WorkingDirectory
-        self.workingdirectory = WorkingDirectory(self, self.init_workdir, main=self)
-        self.workingdirectory.register_plugin()
+        with STARTUP_PROFILER.measure("Working directory", IMPORT):
+            from spyderlib.plugins.workingdirectory import WorkingDirectory
+        with STARTUP_PROFILER.measure("Working directory", CONSTRUCTION):
+            self.workingdirectory = WorkingDirectory(self, self.init_workdir,
+                                                     main=self)
+            self.workingdirectory.register_plugin()
         self.toolbarslist.append(self.workingdirectory)
 
         # Help plugin
         if CONF.get('help', 'enable'):
             self.set_splash(_("Loading help..."))
-            from spyderlib.plugins.help import Help
-            self.help = Help(self)
-            self.help.register_plugin()
+            with STARTUP_PROFILER.measure("Help", IMPORT):
+                from spyderlib.plugins.help import Help
+            with STARTUP_PROFILER.measure("Help", CONSTRUCTION):
+                self.help = Help(self)
+                self.help.register_plugin()
 
         # Outline explorer widget
         if CONF.get('outline_explorer', 'enable'):
             self.set_splash(_("Loading outline explorer..."))
-            from spyderlib.plugins.outlineexplorer import OutlineExplorer
-            fullpath_sorting = CONF.get('editor', 'fullpath_sorting', True)
-            self.outlineexplorer = OutlineExplorer(self,
-                                        fullpath_sorting=fullpath_sorting)
-            self.outlineexplorer.register_plugin()
+            with STARTUP_PROFILER.measure("Outline explorer", IMPORT):
+                from spyderlib.plugins.outlineexplorer import OutlineExplorer
+            with STARTUP_PROFILER.measure("Outline explorer", CONSTRUCTION):
+                fullpath_sorting = CONF.get('editor', 'fullpath_sorting', True)
+                self.outlineexplorer = OutlineExplorer(self,
+                                            fullpath_sorting=fullpath_sorting)
+                self.outlineexplorer.register_plugin()
 
         # Editor plugin
         self.set_splash(_("Loading editor..."))
-        from spyderlib.plugins.editor import Editor
-        self.editor = Editor(self)
-        self.editor.register_plugin()
+        with STARTUP_PROFILER.measure("Editor", IMPORT):
+            from spyderlib.plugins.editor import Editor
+        with STARTUP_PROFILER.measure("Editor", CONSTRUCTION):
+            self.editor = Editor(self)
+            self.editor.register_plugin()
 
         # Populating file menu entries
         quit_action = create_action(self, _("&Quit"),
@@ -875,59 +893,72 @@ class MainWindow(QMainWindow):
         self.debug_print("  ..widgets")
         # Find in files
         if CONF.get('find_in_files', 'enable'):
-            from spyderlib.plugins.findinfiles import FindInFiles
-            self.findinfiles = FindInFiles(self)
-            self.findinfiles.register_plugin()
+            with STARTUP_PROFILER.measure("Find in files", IMPORT):
+                from spyderlib.plugins.findinfiles import FindInFiles
+            with STARTUP_PROFILER.measure("Find in files", CONSTRUCTION):
+                self.findinfiles = FindInFiles(self)
+                self.findinfiles.register_plugin()
 
         # Explorer
         if CONF.get('explorer', 'enable'):
-            self.set_splash(_("Loading file explorer..."))
-            from spyderlib.plugins.explorer import Explorer
-            self.explorer = Explorer(self)
-            self.explorer.register_plugin()
+            if self.is_plugin_lazy('explorer'):
+                self.add_lazy_plugin('explorer', _("File explorer"),
+                                     self.create_explorer)
+            else:
+                self.set_splash(_("Loading file explorer..."))
+                self.create_explorer()
 
         # History log widget
         if CONF.get('historylog', 'enable'):
             self.set_splash(_("Loading history plugin..."))
-            from spyderlib.plugins.history import HistoryLog
-            self.historylog = HistoryLog(self)
-            self.historylog.register_plugin()
+            with STARTUP_PROFILER.measure("History log", IMPORT):
+                from spyderlib.plugins.history import HistoryLog
+            with STARTUP_PROFILER.measure("History log", CONSTRUCTION):
+                self.historylog = HistoryLog(self)
+                self.historylog.register_plugin()
 
         # Online help widget
-        try:    # Qt >= v4.4
-            from spyderlib.plugins.onlinehelp import OnlineHelp
-        except ImportError:    # Qt < v4.4
-            OnlineHelp = None  # analysis:ignore
-        if CONF.get('onlinehelp', 'enable') and OnlineHelp is not None:
-            self.set_splash(_("Loading online help..."))
-            self.onlinehelp = OnlineHelp(self)
-            self.onlinehelp.register_plugin()
+        if CONF.get('onlinehelp', 'enable'):
+            if self.is_plugin_lazy('onlinehelp'):
+                self.add_lazy_plugin('onlinehelp', _("Online help"),
+                                     self.create_onlinehelp)
+            else:
+                self.set_splash(_("Loading online help..."))
+                self.create_onlinehelp()
 
         # Project explorer widget
         if CONF.get('project_explorer', 'enable'):
             self.set_splash(_("Loading project explorer..."))
-            from spyderlib.plugins.projectexplorer import ProjectExplorer
-            self.projectexplorer = ProjectExplorer(self)
-            self.projectexplorer.register_plugin()
+            with STARTUP_PROFILER.measure("Project explorer", IMPORT):
+                from spyderlib.plugins.projectexplorer import ProjectExplorer
+            with STARTUP_PROFILER.measure("Project explorer", CONSTRUCTION):
+                self.projectexplorer = ProjectExplorer(self)
+                self.projectexplorer.register_plugin()
 
         # External console
         self.set_splash(_("Loading external console..."))
-        from spyderlib.plugins.externalconsole import ExternalConsole
-        self.extconsole = ExternalConsole(self, light_mode=False)
-        self.extconsole.register_plugin()
+        with STARTUP_PROFILER.measure("External console", IMPORT):
+            from spyderlib.plugins.externalconsole import ExternalConsole
+        with STARTUP_PROFILER.measure("External console", CONSTRUCTION):
+            self.extconsole = ExternalConsole(self, light_mode=False)
+            self.extconsole.register_plugin()
 
         # Namespace browser
         self.set_splash(_("Loading namespace browser..."))
-        from spyderlib.plugins.variableexplorer import VariableExplorer
-        self.variableexplorer = VariableExplorer(self)
-        self.variableexplorer.register_plugin()
+        with STARTUP_PROFILER.measure("Variable explorer", IMPORT):
+            from spyderlib.plugins.variableexplorer import VariableExplorer
+        with STARTUP_PROFILER.measure("Variable explorer", CONSTRUCTION):
+            self.variableexplorer = VariableExplorer(self)
+            self.variableexplorer.register_plugin()
 
         # IPython console
         if QTCONSOLE_INSTALLED:
             self.set_splash(_("Loading IPython console..."))
-            from spyderlib.plugins.ipythonconsole import IPythonConsole
-            self.ipyconsole = IPythonConsole(self)
-            self.ipyconsole.register_plugin()
+            with STARTUP_PROFILER.measure("IPython console", IMPORT):
+                from spyderlib.plugins.ipythonconsole import IPythonConsole
+            with STARTUP_PROFILER.measure("IPython console", CONSTRUCTION):
+                self.ipyconsole = IPythonConsole(self)
+                self.ipyconsole.register_plugin()
 
         nsb = self.variableexplorer.add_shellwidget(self.console.shell)
         self.console.shell.refresh.connect(nsb.refresh_table)
@@ -1120,9 +1151,10 @@ class MainWindow(QMainWindow):
         # Third-party plugins
         for mod in get_spyderplugins_mods():
             try:
-                plugin = mod.PLUGIN_CLASS(self)
-                self.thirdparty_plugins.append(plugin)
-                plugin.register_plugin()
+                with STARTUP_PROFILER.measure(mod.__name__, CONSTRUCTION):
+                    plugin = mod.PLUGIN_CLASS(self)
+                    self.thirdparty_plugins.append(plugin)
+                    plugin.register_plugin()
             except Exception as error:
                 print("%s: %s" % (mod, str(error)), file=STDERR)
                 traceback.print_exc(file=STDERR)
@@ -1305,6 +1337,7 @@ class MainWindow(QMainWindow):
                 self.editor.get_focus_widget().setFocus()
             except AttributeError:
                 pass
+        STARTUP_PROFILER.add_milestone("Editor ready")
 
         # Check for spyder updates
         if DEV is None and CONF.get('main', 'check_updates_on_startup'):
@@ -1481,6 +1514,8 @@ class MainWindow(QMainWindow):
        
     def setup_default_layouts(self, index, settings):
         """Setup default layouts when run for the first time"""
+        # Default layouts place all plugins
+        self.create_lazy_plugins()
         self.set_window_settings(*settings)
         self.setUpdatesEnabled(False)
 
@@ -1885,6 +1920,8 @@ class MainWindow(QMainWindow):
         section = 'quick_layouts'
 
         try:
+            # Layouts may show plugins which have not been created yet
+            self.create_lazy_plugins()
             settings = self.load_window_settings('layout_{}/'.format(index),
                                                  section=section)
             (hexstate, window_size, prefs_dialog_size, pos, is_maximized,
@@ -2084,11 +2121,15 @@ class MainWindow(QMainWindow):
                  'project_explorer', 'find_in_files', None, 'historylog',
                  'profiler', 'breakpoints', 'pylint', None,
                  'onlinehelp', 'internal_console']
+        plugin_actions = []
         for plugin in self.widgetlist:
             action = plugin.toggle_view_action
             action.setChecked(plugin.dockwidget.isVisible())
+            plugin_actions.append((action, plugin.CONF_SECTION))
+        for name, (action, _factory) in self.lazy_plugins.items():
+            plugin_actions.append((action, name))
+        for action, name in plugin_actions:
             try:
-                name = plugin.CONF_SECTION
                 pos = order.index(name)
             except ValueError:
                 pos = None
@@ -2191,6 +2232,10 @@ class MainWindow(QMainWindow):
                 return False
         prefix = 'window' + '/'
         self.save_current_window_settings(prefix)
+        # Plugins whose pane is closed are created on demand next time
+        CONF.set('main', prefix+'visible_plugins',
+                 [plugin.CONF_SECTION for plugin in self.widgetlist
+                  if not plugin.dockwidget.isHidden()])
         if CONF.get('main', 'single_instance'):
             self.open_files_server.close()
         for plugin in self.thirdparty_plugins:
@@ -2202,6 +2247,7 @@ class MainWindow(QMainWindow):
         self.dialog_manager.close_all()
         if self.toolbars_visible:
             self.save_visible_toolbars()
+        CONF.flush()
         self.already_closed = True
         return True
 
@@ -2211,9 +2257,82 @@ class MainWindow(QMainWindow):
         if CONF.get('main', 'vertical_dockwidget_titlebars'):
             dockwidget.setFeatures(dockwidget.features()|
                                    QDockWidget.DockWidgetVerticalTitleBar)
-        self.addDockWidget(location, dockwidget)
+        # Docks created after the window state was restored (i.e. lazy
+        # plugins) are put back where they were when Spyder was closed
+        if not self.restoreDockWidget(dockwidget):
+            self.addDockWidget(location, dockwidget)
         self.widgetlist.append(child)
 
+    #---- Lazy plugins
+    def is_plugin_lazy(self, name):
+        """Return True if plugin *name* may be created on demand, i.e. if
+        its pane was closed when Spyder was closed"""
+        visible_plugins = CONF.get('main', 'window/visible_plugins', None)
+        return visible_plugins is not None and name not in visible_plugins
+
+    def add_lazy_plugin(self, name, title, create_plugin):
+        """Add placeholder action to the Panes menu for plugin *name*,
+        which will be created by calling *create_plugin* when needed"""
+        action = create_action(self, title, toggled=lambda checked:
+                               self.create_lazy_plugin(name))
+        try:
+            shortcut = CONF.get('shortcuts', '_/switch to %s' % name)
+            action.setShortcut(QKeySequence(shortcut))
+            action.setShortcutContext(Qt.WidgetWithChildrenShortcut)
+        except cp.NoOptionError:
+            pass
+        self.lazy_plugins[name] = (action, create_plugin)
+
+    def create_lazy_plugin(self, name, show=True):
+        """Create lazy plugin *name* and show it if *show* is True"""
+        _action, create_plugin = self.lazy_plugins.pop(name)
+        plugin = create_plugin()
+        if plugin is not None:
+            self.apply_panes_settings()
+            self.apply_shortcuts()
+            if show:
+                plugin.toggle_view_action.setChecked(True)
+        self.plugins_menu.clear()
+        self.create_plugins_menu()
+        return plugin
+
+    def create_lazy_plugins(self):
+        """Create all plugins which have not been created yet"""
+        for name in list(self.lazy_plugins.keys()):
+            self.create_lazy_plugin(name, show=False)
+
+    def create_explorer(self):
+        """Create file explorer plugin"""
+        with STARTUP_PROFILER.measure("File explorer", IMPORT):
+            from spyderlib.plugins.explorer import Explorer
+        with STARTUP_PROFILER.measure("File explorer", CONSTRUCTION):
+            self.explorer = Explorer(self)
+            self.explorer.register_plugin()
+        if self.extconsole is not None:
+            # Created on demand: connect signals which are connected by the
+            # external console when it is registered
+            self.explorer.open_terminal.connect(self.extconsole.open_terminal)
+            self.explorer.open_interpreter.connect(
+                                            self.extconsole.open_interpreter)
+        return self.explorer
+
+    def create_onlinehelp(self):
+        """Create online help plugin (None if not supported)"""
+        with STARTUP_PROFILER.measure("Online help", IMPORT):
+            try:    # Qt >= v4.4
+                from spyderlib.plugins.onlinehelp import OnlineHelp
+            except ImportError:    # Qt < v4.4
+                return
+        with STARTUP_PROFILER.measure("Online help", CONSTRUCTION):
+            self.onlinehelp = OnlineHelp(self)
+            self.onlinehelp.register_plugin()
+        return self.onlinehelp
+
+    def reset_module_completion(self):
+        """Reset module completion database"""
+        from spyderlib.utils.introspection import module_completion
+        module_completion.reset()
+
     @Slot()
     def close_current_dockwidget(self):
         widget = QApplication.focusWidget()
@@ -2647,6 +2766,8 @@ class MainWindow(QMainWindow):
     def edit_preferences(self):
         """Edit Spyder preferences"""
         from spyderlib.plugins.configdialog import ConfigDialog
+        # Preferences pages of lazy plugins are needed
+        self.create_lazy_plugins()
         dlg = ConfigDialog(self)
         dlg.size_change.connect(self.set_prefs_size)
         if self.prefs_dialog_size is not None:
@@ -3023,9 +3144,18 @@ def run_spyder(app, options, args):
             except BaseException:
                 pass
         raise
+    STARTUP_PROFILER.add_milestone("Main window set up")
 
     main.show()
     main.post_visible_setup()
+    STARTUP_PROFILER.add_milestone("Main window shown")
+
+    if options.profile_startup:
+        def report():
+            STARTUP_PROFILER.add_milestone("Event loop started")
+            STARTUP_PROFILER.save_report(get_conf_path('startup_profile.txt'))
+            print(STARTUP_PROFILER.get_report())
+        QTimer.singleShot(0, report)
 
     if main.console:
         main.console.shell.interpreter.namespace['spy'] = \
@@ -22,6 +22,7 @@ import sys
 
 # Local imports
 from spyderlib.utils import encoding
+from spyderlib.utils.misc import memoize
 from spyderlib.py3compat import (is_unicode, TEXT_TYPES, INT_TYPES, PY3,
                                  to_text_string, is_text_string)
 
@@ -193,11 +194,13 @@ def add_image_path(path):
     for dirpath, dirnames, _filenames in os.walk(path):
         for dirname in dirnames:
             IMG_PATH.append(osp.join(dirpath, dirname))
+    get_image_path.cache_clear()
 
-add_image_path(get_module_data_path('spyderlib', relpath='images'))
-
+@memoize(maxsize=None)
 def get_image_path(name, default="not_found.png"):
-    """Return image absolute path"""
+    """Return image absolute path
+    Lookups are cached: image directories are not supposed to change while
+    Spyder is running (the cache is cleared when a directory is added)"""
     for img_path in IMG_PATH:
         full_path = osp.join(img_path, name)
         if osp.isfile(full_path):
@@ -205,6 +208,8 @@ def get_image_path(name, default="not_found.png"):
     if default is not None:
         return osp.abspath(osp.join(img_path, default))
 
+add_image_path(get_module_data_path('spyderlib', relpath='images'))
+
 
 #==============================================================================
 # Translations
@@ -134,6 +134,7 @@ DEFAULTS = [
               'matplotlib/backend/value': 0,
               'umr/enabled': True,
               'umr/verbose': True,
+              'umr/smart': True,
               'umr/namelist': ['guidata', 'guiqwt'],
               'light_background': True,
               'merge_output_channels': os.name != 'nt',
@@ -168,7 +169,8 @@ DEFAULTS = [
               'in_prompt': '',
               'out_prompt': '',
               'light_color': True,
-              'dark_color': False
+              'dark_color': False,
+              'kernel_pool/size': 1
               }),
             ('variable_explorer',
              {
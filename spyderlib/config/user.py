@@ -14,10 +14,13 @@ It's based on the ConfigParser module (present in the standard library).
 from __future__ import print_function
 
 # Std imports
+import atexit
+import copy
 import os
 import re
 import os.path as osp
 import shutil
+import threading
 import time
 
 # Local imports
@@ -39,6 +42,20 @@ class NoDefault:
     pass
 
 
+#==============================================================================
+# Auxiliary functions
+#==============================================================================
+def replace_file(src, dst):
+    """Rename file *src* to *dst*, replacing *dst* if it already exists"""
+    if hasattr(os, 'replace'):
+        # Python 3.3+: atomic on all platforms
+        os.replace(src, dst)
+    else:
+        if os.name == 'nt' and osp.isfile(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
 #==============================================================================
 # Defaults class
 #==============================================================================
@@ -94,18 +111,23 @@ class DefaultsConfig(cp.ConfigParser):
         fname = self.filename()
 
         def _write_file(fname):
+            # The file is written next to the .ini file and then renamed, so
+            # that the .ini file is never left half-written
+            tmp_fname = fname + '.tmp'
             if PY2:
                 # Python 2
-                with codecs.open(fname, 'w', encoding='utf-8') as configfile:
+                with codecs.open(tmp_fname, 'w',
+                                 encoding='utf-8') as configfile:
                     self._write(configfile)
             else:
                 # Python 3
-                with open(fname, 'w', encoding='utf-8') as configfile:
+                with open(tmp_fname, 'w', encoding='utf-8') as configfile:
                     self.write(configfile)
+            replace_file(tmp_fname, fname)
 
         try: # the "easy" way
             _write_file(fname)
-        except IOError:
+        except (IOError, OSError):
             try: # the "delete and sleep" way
                 if osp.isfile(fname):
                     os.remove(fname)
@@ -182,14 +204,26 @@ class UserConfig(DefaultsConfig):
               *or* list of tuples (section_name, options)
     version: version of the configuration file (X.Y.Z format)
     subfolder: configuration file will be saved in %home%/subfolder/%name%.ini
+    save_delay: delay (in seconds) after which changes are saved in the .ini
+                file (changes made during this delay are saved at once)
     
     Note that 'get' and 'set' arguments number and type
     differ from the overriden methods
+
+    Parsed option values are cached, so that 'get' can be called in loops.
     """
     DEFAULT_SECTION_NAME = 'main'
+    SAVE_DELAY = 0.5
     def __init__(self, name, defaults=None, load=True, version=None,
                  subfolder=None, backup=False, raw_mode=False,
-                 remove_obsolete=False):
+                 remove_obsolete=False, save_delay=SAVE_DELAY):
+        self._cache = {}
+        self._defaults_index = {}
+        self._lock = threading.RLock()
+        self._save_delay = save_delay
+        self._save_timer = None
+        self._counters = {'get': 0, 'set': 0, 'save': 0, 'cache_hits': 0}
+        self._option_counters = {}
         DefaultsConfig.__init__(self, name, subfolder)
         self.raw = 1 if raw_mode else 0
         if (version is not None) and (re.match('^(\d+).(\d+).(\d+)$', version) is None):
@@ -197,6 +231,7 @@ class UserConfig(DefaultsConfig):
         if isinstance(defaults, dict):
             defaults = [ (self.DEFAULT_SECTION_NAME, defaults) ]
         self.defaults = defaults
+        self.__index_defaults()
         if defaults is not None:
             self.reset_to_defaults(save=False)
         fname = self.filename()
@@ -232,6 +267,7 @@ class UserConfig(DefaultsConfig):
             if defaults is None:
                 # If no defaults are defined, set .ini file settings as default
                 self.set_as_defaults()
+        atexit.register(self.flush)
         
     def get_version(self, version='0.0.0'):
         """Return configuration (not application!) version"""
@@ -245,6 +281,9 @@ class UserConfig(DefaultsConfig):
         """
         Load config from the associated .ini file
         """
+        # The .ini file content takes precedence over unsaved changes
+        self.__cancel_save()
+        self._cache.clear()
         try:
             if PY2:
                 # Python 2
@@ -313,6 +352,7 @@ class UserConfig(DefaultsConfig):
         """
         Remove .ini file associated to config
         """
+        self.__cancel_save()
         os.remove(self.filename())
 
     def set_as_defaults(self):
@@ -325,6 +365,7 @@ class UserConfig(DefaultsConfig):
             for option, value in self.items(section, raw=self.raw):
                 secdict[option] = value
             self.defaults.append( (section, secdict) )
+        self.__index_defaults()
 
     def reset_to_defaults(self, save=True, verbose=False, section=None):
         """
@@ -336,7 +377,80 @@ class UserConfig(DefaultsConfig):
                     value = options[ option ]
                     self._set(sec, option, value, verbose)
         if save:
-            self._save()
+            self.save()
+
+    #------ Cache and delayed saving
+    def __index_defaults(self):
+        """Index default options by section, for fast default lookups"""
+        self._defaults_index = {}
+        for section, options in self.defaults or []:
+            self._defaults_index.setdefault(section, []).append(options)
+        self._cache.clear()
+
+    def __cancel_save(self):
+        """Cancel delayed save, if any"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+
+    def save(self):
+        """
+        Save config into the associated .ini file after a short delay
+        (see the 'save_delay' argument)
+        """
+        with self._lock:
+            if self._save_delay <= 0:
+                self.__cancel_save()
+                self._save()
+            elif self._save_timer is None:
+                self._save_timer = threading.Timer(self._save_delay,
+                                                   self.__delayed_save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def __delayed_save(self):
+        """Save config (called from the delayed save thread)"""
+        try:
+            self.flush()
+        except Exception as error:
+            print("Failed to save user configuration file:", error)
+
+    def flush(self):
+        """
+        Save config into the associated .ini file now if a save is pending
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self.__cancel_save()
+                self._save()
+
+    def _save(self):
+        """
+        Save config into the associated .ini file
+        """
+        with self._lock:
+            self._counters['save'] += 1
+            DefaultsConfig._save(self)
+
+    def _set(self, section, option, value, verbose):
+        """
+        Private set method
+        """
+        with self._lock:
+            DefaultsConfig._set(self, section, option, value, verbose)
+            self._cache.pop((section, self.optionxform(option)), None)
+
+    def get_counters(self):
+        """
+        Return a dictionary of counters: number of 'get' and 'set' calls,
+        of 'get' calls served from cache ('cache_hits') and of .ini file
+        writes ('save'), and number of 'get' calls per (section, option)
+        ('options'), to help finding hot callers
+        """
+        counters = self._counters.copy()
+        counters['options'] = self._option_counters.copy()
+        return counters
         
     def __check_section_option(self, section, option):
         """
@@ -356,10 +470,9 @@ class UserConfig(DefaultsConfig):
         -> useful for type checking in 'get' method
         """
         section = self.__check_section_option(section, option)
-        for sec, options in self.defaults:
-            if sec == section:
-                if option in options:
-                    return options[ option ]
+        for options in self._defaults_index.get(section, []):
+            if option in options:
+                return options[ option ]
         else:
             return NoDefault
                 
@@ -371,6 +484,16 @@ class UserConfig(DefaultsConfig):
         will be raised if option doesn't exist)
         """
         section = self.__check_section_option(section, option)
+        key = (section, self.optionxform(option))
+        self._counters['get'] += 1
+        self._option_counters[key] = self._option_counters.get(key, 0) + 1
+        if key in self._cache:
+            self._counters['cache_hits'] += 1
+            value = self._cache[key]
+            if isinstance(value, (list, dict, set, tuple)):
+                # Callers may modify mutable values
+                value = copy.deepcopy(value)
+            return value
 
         if not self.has_section(section):
             if default is NoDefault:
@@ -404,6 +527,9 @@ class UserConfig(DefaultsConfig):
                 value = eval(value)
             except:
                 pass
+        self._cache[key] = value
+        if isinstance(value, (list, dict, set, tuple)):
+            value = copy.deepcopy(value)
         return value
 
     def set_default(self, section, option, default_value):
@@ -412,9 +538,9 @@ class UserConfig(DefaultsConfig):
         -> called when a new (section, option) is set and no default exists
         """
         section = self.__check_section_option(section, option)
-        for sec, options in self.defaults:
-            if sec == section:
-                options[ option ] = default_value
+        for options in self._defaults_index.get(section, []):
+            options[ option ] = default_value
+        self._cache.pop((section, self.optionxform(option)), None)
 
     def set(self, section, option, value, verbose=False, save=True):
         """
@@ -422,6 +548,7 @@ class UserConfig(DefaultsConfig):
         section=None: attribute a default section name
         """
         section = self.__check_section_option(section, option)
+        self._counters['set'] += 1
         default_value = self.get_default(section, option)
         if default_value is NoDefault:
             # This let us save correctly string value options with
@@ -441,12 +568,16 @@ class UserConfig(DefaultsConfig):
             value = repr(value)
         self._set(section, option, value, verbose)
         if save:
-            self._save()
+            self.save()
             
     def remove_section(self, section):
-        cp.ConfigParser.remove_section(self, section)
-        self._save()
+        with self._lock:
+            cp.ConfigParser.remove_section(self, section)
+            self._cache.clear()
+        self.save()
             
     def remove_option(self, section, option):
-        cp.ConfigParser.remove_option(self, section, option)
-        self._save()
+        with self._lock:
+            cp.ConfigParser.remove_option(self, section, option)
+            self._cache.pop((section, self.optionxform(option)), None)
+        self.save()
@@ -961,6 +961,8 @@ class MainConfigPage(GeneralConfigPage):
             plugin.update_font()
 
     def apply_settings(self, options):
+        if 'icon_theme' in options:
+            ima.clear_cache()
         self.main.apply_settings()
 
     def _save_lang(self):
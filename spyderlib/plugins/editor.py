@@ -39,6 +39,7 @@ from spyderlib.utils import codeanalysis, encoding, programs, sourcecode
 from spyderlib.utils import icon_manager as ima
 from spyderlib.utils.qthelpers import (add_actions, add_shortcut_to_tooltip,
                                        create_action, get_filetype_icon)
+from spyderlib.widgets.fileswitcher import get_symbol_indexer
 from spyderlib.widgets.findreplace import FindReplace
 from spyderlib.widgets.editor import (EditorMainWindow, EditorSplitter,
                                       EditorStack, Printer)
@@ -420,6 +421,7 @@ class Editor(SpyderPluginWidget):
         
         self.editorstacks = []
         self.last_focus_editorstack = {}
+        self.line_profiles = {}
         self.editorwindows = []
         self.editorwindows_to_be_created = []
         self.toolbar_list = None
@@ -500,6 +502,24 @@ class Editor(SpyderPluginWidget):
         
     def set_projectexplorer(self, projectexplorer):
         self.projectexplorer = projectexplorer
+        projectexplorer.pythonpath_changed.connect(self.update_symbol_index)
+        projectexplorer.pythonpath_changed.connect(
+                                        self.update_introspection_projects)
+        self.update_symbol_index()
+        self.update_introspection_projects()
+
+    def update_symbol_index(self):
+        """Index symbols of opened projects for the file switcher"""
+        if self.projectexplorer is not None:
+            get_symbol_indexer().set_root_paths(
+                            self.projectexplorer.get_opened_project_paths())
+
+    def update_introspection_projects(self):
+        """Send opened projects to introspection plugins"""
+        if self.projectexplorer is not None:
+            project_paths = self.projectexplorer.get_opened_project_paths()
+            for editorstack in self.editorstacks:
+                editorstack.introspector.set_project_paths(project_paths)
 
     @Slot()
     def show_hide_project_explorer(self):
@@ -1117,6 +1137,9 @@ class Editor(SpyderPluginWidget):
             editorstack.refresh_eol_chars.connect(self.eol_status.eol_changed)
 
         editorstack.set_help(self.help)
+        if self.projectexplorer is not None:
+            editorstack.introspector.set_project_paths(
+                            self.projectexplorer.get_opened_project_paths())
         editorstack.set_io_actions(self.new_action, self.open_action,
                                    self.save_action, self.revert_action)
         editorstack.set_tempfile_path(self.TEMPFILE_PATH)
@@ -1356,7 +1379,7 @@ class Editor(SpyderPluginWidget):
         check_results = editorstack.get_analysis_results()
         self.warning_menu.clear()
         filename = self.get_current_filename()
-        for message, line_number in check_results:
+        for message, line_number, _column, _length in check_results:
             error = 'syntax' in message
             text = message[:1].upper()+message[1:]
             icon = ima.icon('error') if error else ima.icon('warning')
@@ -1480,6 +1503,34 @@ class Editor(SpyderPluginWidget):
             breakpoints = []
         save_breakpoints(filename, breakpoints)
         self.breakpoints_saved.emit()
+
+    #------ Line profile
+    def set_line_profiles(self, line_profiles):
+        """Annotate lines with profiling results
+        line_profiles: {filename: {line number: (text, weight)}} (see
+        CodeEditor.set_line_profile), files which are not opened yet are
+        annotated when they are opened"""
+        self.line_profiles = dict([(osp.normcase(osp.realpath(filename)),
+                                    line_profile) for filename, line_profile
+                                   in line_profiles.items()])
+        for editorstack in self.editorstacks:
+            for finfo in editorstack.data:
+                finfo.editor.set_line_profile(
+                                        self.get_line_profile(finfo.filename))
+
+    def get_line_profile(self, filename):
+        """Return line profile of *filename* (None if there is none)"""
+        return self.line_profiles.get(osp.normcase(osp.realpath(filename)))
+
+    def set_line_profile_everywhere(self, filename):
+        """Annotate lines of *filename* in all editorstacks"""
+        line_profile = self.get_line_profile(filename)
+        if line_profile is None:
+            return
+        for editorstack in self.editorstacks:
+            index = editorstack.has_filename(filename)
+            if index is not None:
+                editorstack.data[index].editor.set_line_profile(line_profile)
         
     #------ File I/O
     def __load_temp_file(self):
@@ -1737,6 +1788,7 @@ class Editor(SpyderPluginWidget):
                 self._clone_file_everywhere(finfo)
                 current_editor = current_es.set_current_filename(filename)
                 current_editor.set_breakpoints(load_breakpoints(filename))
+                self.set_line_profile_everywhere(filename)
                 self.register_widget_shortcuts("Editor", current_editor)
                 
                 current_es.analyze_script()
@@ -20,7 +20,7 @@ import sys
 # Third party imports
 from qtpy import PYQT5
 from qtpy.compat import getopenfilename
-from qtpy.QtCore import Qt, Signal, Slot
+from qtpy.QtCore import Qt, QTimer, Signal, Slot
 from qtpy.QtWidgets import (QButtonGroup, QGroupBox, QHBoxLayout, QInputDialog,
                             QLabel, QLineEdit, QMessageBox, QPushButton,
                             QTabWidget, QVBoxLayout, QWidget)
@@ -47,6 +47,30 @@ MPL_REQVER = '>=1.0'
 dependencies.add("matplotlib", _("Interactive data plotting in the consoles"),
                  required_version=MPL_REQVER, optional=True)
 
+# Delay (ms) before starting kernels to replenish the kernel pool, so that
+# they don't slow down the console which was just opened
+KERNEL_POOL_DELAY = 3000
+
+# External console options which IPython kernels are started with
+KERNEL_OPTIONS = ('pythonexecutable/default', 'pythonexecutable',
+                  'monitor/enabled', 'matplotlib/backend/value',
+                  'ets_backend', 'qt/api', 'merge_output_channels',
+                  'colorize_sys_stderr', 'umr/enabled', 'umr/namelist',
+                  'umr/verbose', 'umr/smart')
+
+
+def cleanup_connection_file(connection_file):
+    """Remove IPython kernel connection file *connection_file*"""
+    # This is only called for kernels which have been started, so that
+    # IPython is available
+    from IPython.core.application import get_ipython_dir
+    connection_file = osp.join(get_ipython_dir(), 'profile_default',
+                               'security', connection_file)
+    try:
+        os.remove(connection_file)
+    except OSError:
+        pass
+
 
 class ExternalConsoleConfigPage(PluginConfigPage):
 
@@ -161,6 +185,16 @@ class ExternalConsoleConfigPage(PluginConfigPage):
                                 'umr/verbose', msg_info=_(
                                 "Please note that these changes will "
                                 "be applied only to new consoles"))
+        umr_smart_box = newcb(_("Only reload modified modules"),
+                              'umr/smart', msg_info=_(
+                              "Please note that these changes will "
+                              "be applied only to new consoles"),
+                              tip=_("Reload only the modules whose source "
+                                    "file was modified since they were "
+                                    "imported, and the modules which "
+                                    "import them.\nModules which load data "
+                                    "files when imported are not reloaded "
+                                    "when these files change."))
         umr_namelist_btn = QPushButton(
                             _("Set UMR excluded (not reloaded) modules"))
         umr_namelist_btn.clicked.connect(self.plugin.set_umr_namelist)
@@ -169,6 +203,7 @@ class ExternalConsoleConfigPage(PluginConfigPage):
         umr_layout.addWidget(umr_label)
         umr_layout.addWidget(umr_enabled_box)
         umr_layout.addWidget(umr_verbose_box)
+        umr_layout.addWidget(umr_smart_box)
         umr_layout.addWidget(umr_namelist_btn)
         umr_group.setLayout(umr_layout)
         
@@ -402,6 +437,10 @@ class ExternalConsole(SpyderPluginWidget):
         self.python_count = 0
         self.terminal_count = 0
 
+        # Pool of idle IPython kernels: (settings signature, shellwidget)
+        self.kernel_pool = []
+        self.kernel_pool_enabled = False
+
         # Python executable selection (initializing default values as well)
         executable = self.get_option('pythonexecutable',
                                      get_python_executable())
@@ -548,6 +587,8 @@ class ExternalConsole(SpyderPluginWidget):
                 if sw.is_interpreter and sw.is_running():
                     sw.path = self.main.get_spyder_pythonpath()
                     sw.shell.path = sw.path
+        # Preloaded kernels have been started with the previous path
+        self.fill_kernel_pool()
         
     def __find_python_shell(self, interpreter_only=False):
         current_index = self.tabwidget.currentIndex()
@@ -705,74 +746,17 @@ class ExternalConsole(SpyderPluginWidget):
             index = self.tabwidget.count()
 
         # Creating a new external shell
-        pythonpath = self.main.get_spyder_pythonpath()
-        light_background = self.get_option('light_background')
-        show_elapsed_time = self.get_option('show_elapsed_time')
+        pooled = False
         if python:
-            if self.get_option('pythonexecutable/default'):
-                pythonexecutable = get_python_executable()
-                external_interpreter = False
-            else:
-                pythonexecutable = self.get_option('pythonexecutable')
-                external_interpreter = True
-            if self.get_option('pythonstartup/default') or ipykernel:
-                pythonstartup = None
-            else:
-                pythonstartup = self.get_option('pythonstartup', None)
-            monitor_enabled = self.get_option('monitor/enabled')
-            mpl_backend = self.get_option('matplotlib/backend/value')
-            ets_backend = self.get_option('ets_backend')
-            qt_api = self.get_option('qt/api')
-            if qt_api not in ('pyqt', 'pyside', 'pyqt5'):
-                qt_api = None
-            merge_output_channels = self.get_option('merge_output_channels')
-            colorize_sys_stderr = self.get_option('colorize_sys_stderr')
-            umr_enabled = self.get_option('umr/enabled')
-            umr_namelist = self.get_option('umr/namelist')
-            umr_verbose = self.get_option('umr/verbose')
-            ar_timeout = CONF.get('variable_explorer', 'autorefresh/timeout')
-            ar_state = CONF.get('variable_explorer', 'autorefresh')
-
-            # CRUCIAL NOTE FOR IPYTHON KERNELS:
-            # autorefresh needs to be on so that our monitor
-            # can find __ipythonkernel__ in the globals namespace
-            # *after* the kernel has been started.
-            # Without the ns refresh provided by autorefresh, a
-            # client is *never* started (although the kernel is)
-            # Fix Issue 1595
-            if not ar_state and ipykernel:
-                ar_state = True
-
-            if self.light_mode:
-                from spyderlib.plugins.variableexplorer import VariableExplorer
-                sa_settings = VariableExplorer.get_settings()
-            else:
-                sa_settings = None
-            shellwidget = ExternalPythonShell(self, fname, wdir,
-                           interact, debug, post_mortem=post_mortem, 
-                           path=pythonpath,
-                           python_args=python_args,
-                           ipykernel=ipykernel,
-                           arguments=args, stand_alone=sa_settings,
-                           pythonstartup=pythonstartup,
-                           pythonexecutable=pythonexecutable,
-                           external_interpreter=external_interpreter,
-                           umr_enabled=umr_enabled, umr_namelist=umr_namelist,
-                           umr_verbose=umr_verbose, ets_backend=ets_backend,
-                           monitor_enabled=monitor_enabled,
-                           mpl_backend=mpl_backend, qt_api=qt_api,
-                           merge_output_channels=merge_output_channels,
-                           colorize_sys_stderr=colorize_sys_stderr,
-                           autorefresh_timeout=ar_timeout,
-                           autorefresh_state=ar_state,
-                           light_background=light_background,
-                           menu_actions=self.menu_actions,
-                           show_buttons_inside=False,
-                           show_elapsed_time=show_elapsed_time)
-            shellwidget.sig_pdb.connect(
-                              lambda fname, lineno, shellwidget=shellwidget:
-                              self.pdb_has_stopped(fname, lineno, shellwidget))
-            self.register_widget_shortcuts("Console", shellwidget.shell)
+            shellwidget = None
+            if ipykernel:
+                shellwidget = self.take_pooled_kernel(wdir)
+                pooled = shellwidget is not None
+            if shellwidget is None:
+                shellwidget = self.create_python_shell(fname, wdir, args,
+                                                       interact, debug,
+                                                       ipykernel, python_args,
+                                                       post_mortem)
         else:
             if os.name == 'posix':
                 cmd = 'gnome-terminal'
@@ -788,38 +772,17 @@ class ExternalConsole(SpyderPluginWidget):
                         args.extend(['--workdir', wdir])
                     programs.run_program(cmd, args)
                     return
-            shellwidget = ExternalSystemShell(self, wdir, path=pythonpath,
-                                          light_background=light_background,
-                                          menu_actions=self.menu_actions,
-                                          show_buttons_inside=False,
-                                          show_elapsed_time=show_elapsed_time)
-        
-        # Code completion / calltips
-        shellwidget.shell.setMaximumBlockCount(
-                                            self.get_option('max_line_count') )
-        shellwidget.shell.set_font( self.get_plugin_font() )
-        shellwidget.shell.toggle_wrap_mode( self.get_option('wrap') )
-        shellwidget.shell.set_calltips( self.get_option('calltips') )
-        shellwidget.shell.set_codecompletion_auto(
-                            self.get_option('codecompletion/auto') )
-        shellwidget.shell.set_codecompletion_case(
-                            self.get_option('codecompletion/case_sensitive') )
-        shellwidget.shell.set_codecompletion_enter(
-                            self.get_option('codecompletion/enter_key') )
-        if python and self.help is not None:
-            shellwidget.shell.set_help(self.help)
-            shellwidget.shell.set_help_enabled(
-                               CONF.get('help', 'connect/python_console'))
-        if self.historylog is not None:
-            self.historylog.add_history(shellwidget.shell.history_filename)
-            shellwidget.shell.append_to_history.connect(
-                                             self.historylog.append_to_history)
-            shellwidget.shell.go_to_error.connect(self.go_to_error)
-            shellwidget.shell.focus_changed.connect(        
-                                             lambda: self.focus_changed.emit())
+            shellwidget = ExternalSystemShell(self, wdir,
+                              path=self.main.get_spyder_pythonpath(),
+                              light_background=self.get_option(
+                                                        'light_background'),
+                              menu_actions=self.menu_actions,
+                              show_buttons_inside=False,
+                              show_elapsed_time=self.get_option(
+                                                        'show_elapsed_time'))
+            self.setup_shell(shellwidget, python=False)
+
         if python:
-            if self.main.editor is not None:
-                shellwidget.open_file.connect(self.open_file_in_spyder)
             if fname is None:
                 if ipykernel:
                     # Connect client to any possible error while starting the
@@ -840,8 +803,8 @@ class ExternalConsole(SpyderPluginWidget):
                             frontend_ver = '>=3.0'
                         kernel_and_frontend_match = \
                           programs.is_module_installed('IPython',
-                                                  version=frontend_ver,
-                                                  interpreter=pythonexecutable)
+                                      version=frontend_ver,
+                                      interpreter=shellwidget.pythonexecutable)
                     else:
                         kernel_and_frontend_match = True
 
@@ -911,28 +874,216 @@ class ExternalConsole(SpyderPluginWidget):
         shellwidget.set_icontext_visible(self.get_option('show_icontext'))
         
         # Start process and give focus to console
-        shellwidget.start_shell()
+        if pooled:
+            # The kernel is already running (and may be ready)
+            self.process_started(id(shellwidget))
+            if shellwidget.connection_file is not None:
+                self.register_ipyclient(shellwidget.connection_file,
+                                        ipyclient, shellwidget,
+                                        give_focus=give_ipyclient_focus)
+        else:
+            shellwidget.start_shell()
         if not ipykernel:
             self.activateWindow()
             shellwidget.shell.setFocus()
     
+    def create_python_shell(self, fname, wdir, args, interact, debug,
+                            ipykernel, python_args, post_mortem):
+        """Create Python shell (see `start` for arguments)"""
+        pythonpath = self.main.get_spyder_pythonpath()
+        light_background = self.get_option('light_background')
+        show_elapsed_time = self.get_option('show_elapsed_time')
+        if self.get_option('pythonexecutable/default'):
+            pythonexecutable = get_python_executable()
+            external_interpreter = False
+        else:
+            pythonexecutable = self.get_option('pythonexecutable')
+            external_interpreter = True
+        if self.get_option('pythonstartup/default') or ipykernel:
+            pythonstartup = None
+        else:
+            pythonstartup = self.get_option('pythonstartup', None)
+        monitor_enabled = self.get_option('monitor/enabled')
+        mpl_backend = self.get_option('matplotlib/backend/value')
+        ets_backend = self.get_option('ets_backend')
+        qt_api = self.get_option('qt/api')
+        if qt_api not in ('pyqt', 'pyside', 'pyqt5'):
+            qt_api = None
+        merge_output_channels = self.get_option('merge_output_channels')
+        colorize_sys_stderr = self.get_option('colorize_sys_stderr')
+        umr_enabled = self.get_option('umr/enabled')
+        umr_namelist = self.get_option('umr/namelist')
+        umr_verbose = self.get_option('umr/verbose')
+        umr_smart = self.get_option('umr/smart')
+        ar_timeout = CONF.get('variable_explorer', 'autorefresh/timeout')
+        ar_state = CONF.get('variable_explorer', 'autorefresh')
+
+        # CRUCIAL NOTE FOR IPYTHON KERNELS:
+        # autorefresh needs to be on so that our monitor
+        # can find __ipythonkernel__ in the globals namespace
+        # *after* the kernel has been started.
+        # Without the ns refresh provided by autorefresh, a
+        # client is *never* started (although the kernel is)
+        # Fix Issue 1595
+        if not ar_state and ipykernel:
+            ar_state = True
+
+        if self.light_mode:
+            from spyderlib.plugins.variableexplorer import VariableExplorer
+            sa_settings = VariableExplorer.get_settings()
+        else:
+            sa_settings = None
+        shellwidget = ExternalPythonShell(self, fname, wdir,
+                       interact, debug, post_mortem=post_mortem, 
+                       path=pythonpath,
+                       python_args=python_args,
+                       ipykernel=ipykernel,
+                       arguments=args, stand_alone=sa_settings,
+                       pythonstartup=pythonstartup,
+                       pythonexecutable=pythonexecutable,
+                       external_interpreter=external_interpreter,
+                       umr_enabled=umr_enabled, umr_namelist=umr_namelist,
+                       umr_verbose=umr_verbose, umr_smart=umr_smart,
+                       ets_backend=ets_backend,
+                       monitor_enabled=monitor_enabled,
+                       mpl_backend=mpl_backend, qt_api=qt_api,
+                       merge_output_channels=merge_output_channels,
+                       colorize_sys_stderr=colorize_sys_stderr,
+                       autorefresh_timeout=ar_timeout,
+                       autorefresh_state=ar_state,
+                       light_background=light_background,
+                       menu_actions=self.menu_actions,
+                       show_buttons_inside=False,
+                       show_elapsed_time=show_elapsed_time)
+        shellwidget.sig_pdb.connect(
+                          lambda fname, lineno, shellwidget=shellwidget:
+                          self.pdb_has_stopped(fname, lineno, shellwidget))
+        self.register_widget_shortcuts("Console", shellwidget.shell)
+        self.setup_shell(shellwidget, python=True)
+        return shellwidget
+
+    def setup_shell(self, shellwidget, python):
+        """Apply console settings to *shellwidget* and connect its signals"""
+        # Code completion / calltips
+        shellwidget.shell.setMaximumBlockCount(
+                                            self.get_option('max_line_count') )
+        shellwidget.shell.set_font( self.get_plugin_font() )
+        shellwidget.shell.toggle_wrap_mode( self.get_option('wrap') )
+        shellwidget.shell.set_calltips( self.get_option('calltips') )
+        shellwidget.shell.set_codecompletion_auto(
+                            self.get_option('codecompletion/auto') )
+        shellwidget.shell.set_codecompletion_case(
+                            self.get_option('codecompletion/case_sensitive') )
+        shellwidget.shell.set_codecompletion_enter(
+                            self.get_option('codecompletion/enter_key') )
+        if python and self.help is not None:
+            shellwidget.shell.set_help(self.help)
+            shellwidget.shell.set_help_enabled(
+                               CONF.get('help', 'connect/python_console'))
+        if self.historylog is not None:
+            self.historylog.add_history(shellwidget.shell.history_filename)
+            shellwidget.shell.append_to_history.connect(
+                                             self.historylog.append_to_history)
+            shellwidget.shell.go_to_error.connect(self.go_to_error)
+            shellwidget.shell.focus_changed.connect(        
+                                             lambda: self.focus_changed.emit())
+        if python:
+            if self.main.editor is not None:
+                shellwidget.open_file.connect(self.open_file_in_spyder)
+
+    #------ Kernel pool
+    def get_kernel_signature(self):
+        """Return the settings IPython kernels are started with (pooled
+        kernels started with other settings are discarded)"""
+        ipython_options = [item for item
+                           in CONF.items('ipython_console', raw=True)
+                           if not item[0].startswith('kernel_pool/')]
+        return ([self.get_option(option, None) for option in KERNEL_OPTIONS],
+                CONF.get('variable_explorer', 'autorefresh/timeout'),
+                self.main.get_spyder_pythonpath(), sorted(ipython_options))
+
+    def fill_kernel_pool(self):
+        """Remove stale kernels from the pool and start idle kernels until
+        the pool has the size set in Preferences"""
+        if self.light_mode or not self.kernel_pool_enabled:
+            return
+        signature = self.get_kernel_signature()
+        size = CONF.get('ipython_console', 'kernel_pool/size')
+        for kernel_signature, shellwidget in self.kernel_pool[:]:
+            if kernel_signature != signature or len(self.kernel_pool) > size:
+                self.close_pooled_kernel(shellwidget)
+        if len(self.kernel_pool) >= size:
+            return
+        # The kernel reads its options from the configuration file
+        CONF.flush()
+        for _index in range(size-len(self.kernel_pool)):
+            shellwidget = self.create_python_shell(None, getcwd(), '', True,
+                                                   False, True, '', True)
+            shellwidget.hide()
+            shellwidget.create_ipython_client.connect(
+                        lambda cf, sw=shellwidget:
+                        self.pooled_kernel_started(sw, cf))
+            shellwidget.sig_finished.connect(
+                        lambda sw=shellwidget: self.close_pooled_kernel(sw))
+            self.kernel_pool.append((signature, shellwidget))
+            shellwidget.start_shell()
+
+    def pooled_kernel_started(self, shellwidget, connection_file):
+        """Kernel *shellwidget* of the pool is ready"""
+        shellwidget.connection_file = connection_file
+
+    def take_pooled_kernel(self, wdir=None):
+        """Take a kernel from the pool, started with the current settings,
+        and change its working directory to *wdir*
+        Return None if there is no such kernel"""
+        if not self.kernel_pool_enabled:
+            return
+        # Replace the kernel (or stale kernels) later
+        QTimer.singleShot(KERNEL_POOL_DELAY, self.fill_kernel_pool)
+        signature = self.get_kernel_signature()
+        kernels = [shellwidget for kernel_signature, shellwidget
+                   in self.kernel_pool if kernel_signature == signature]
+        if not kernels:
+            return
+        # Kernels which are ready first
+        kernels.sort(key=lambda sw: sw.connection_file is None)
+        shellwidget = kernels[0]
+        self.kernel_pool = [item for item in self.kernel_pool
+                            if item[1] is not shellwidget]
+        if wdir and wdir != shellwidget.wdir:
+            shellwidget.wdir = wdir
+            if shellwidget.connection_file is not None:
+                shellwidget.shell.set_cwd(wdir)
+            else:
+                shellwidget.create_ipython_client.connect(
+                        lambda cf, sw=shellwidget: sw.shell.set_cwd(sw.wdir))
+        return shellwidget
+
+    def close_pooled_kernel(self, shellwidget):
+        """Close kernel *shellwidget* if it is still in the pool"""
+        for item in self.kernel_pool:
+            if item[1] is shellwidget:
+                self.kernel_pool.remove(item)
+                break
+        else:
+            return
+        shellwidget.close()
+        if shellwidget.connection_file is not None:
+            cleanup_connection_file(shellwidget.connection_file)
+        shellwidget.deleteLater()
+
+    def clear_kernel_pool(self):
+        """Close all kernels of the pool"""
+        for _signature, shellwidget in self.kernel_pool[:]:
+            self.close_pooled_kernel(shellwidget)
+
     def set_ipykernel_attrs(self, connection_file, kernel_widget, name):
         """Add the pid of the kernel process to an IPython kernel tab"""
         # Set connection file
         kernel_widget.connection_file = connection_file
         
-        # If we've reached this point then it's safe to assume IPython
-        # is available, and this import should be valid.
-        from IPython.core.application import get_ipython_dir
         # For each kernel we launch, setup to delete the associated
         # connection file at the time Spyder exits.
-        def cleanup_connection_file(connection_file):
-            connection_file = osp.join(get_ipython_dir(), 'profile_default',
-                                       'security', connection_file)
-            try:
-                os.remove(connection_file)
-            except OSError:
-                pass
         atexit.register(cleanup_connection_file, connection_file)   
         
         # Set tab name according to client master name
@@ -1079,6 +1230,7 @@ class ExternalConsole(SpyderPluginWidget):
         """Perform actions before parent main window is closed"""
         for shellwidget in self.shellwidgets:
             shellwidget.close()
+        self.clear_kernel_pool()
         return True
     
     def refresh_plugin(self):
@@ -1149,6 +1301,8 @@ class ExternalConsole(SpyderPluginWidget):
                 shellwidget.shell.set_codecompletion_enter(compenter_o)
             if mlc_n in options:
                 shellwidget.shell.setMaximumBlockCount(mlc_o)
+        # Pooled kernels may have been started with previous settings
+        self.fill_kernel_pool()
     
     #------ SpyderPluginMixin API ---------------------------------------------
     def toggle_view(self, checked):
@@ -1189,6 +1343,10 @@ class ExternalConsole(SpyderPluginWidget):
         
         if not wdir:
             wdir = getcwd()
+        # The kernel reads its options from the configuration file
+        CONF.flush()
+        # Kernels are preloaded once the user has opened an IPython console
+        self.kernel_pool_enabled = True
         self.main.ipyconsole.visibility_changed(True)
         self.start(fname=None, wdir=to_text_string(wdir), args='',
                    interact=True, debug=False, python=True, ipykernel=True,
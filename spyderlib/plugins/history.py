@@ -13,6 +13,7 @@ import sys
 # Third party imports
 from qtpy import PYQT5
 from qtpy.QtCore import Signal, Slot
+from qtpy.QtGui import QTextCursor
 from qtpy.QtWidgets import (QFontDialog, QGroupBox, QHBoxLayout, QInputDialog,
                             QMenu, QToolButton, QVBoxLayout, QWidget)
 
@@ -23,6 +24,7 @@ from spyderlib.config.base import _
 from spyderlib.plugins import PluginConfigPage, SpyderPluginWidget
 from spyderlib.py3compat import is_text_string, to_text_string
 from spyderlib.utils import icon_manager as ima
+from spyderlib.utils.historystore import get_history_store
 from spyderlib.utils.qthelpers import (add_actions, create_action,
                                        create_toolbutton)
 from spyderlib.widgets.tabs import Tabs
@@ -30,6 +32,11 @@ from spyderlib.widgets.sourcecode import codeeditor
 from spyderlib.widgets.findreplace import FindReplace
 
 
+# History lines loaded at once: the last lines are shown first, previous
+# ones are loaded when scrolling up to the top of the history
+LOADED_LINES = 1000
+
+
 class HistoryConfigPage(PluginConfigPage):
     def get_icon(self):
         return ima.icon('history')
@@ -79,6 +86,7 @@ class HistoryLog(SpyderPluginWidget):
         self.editors = []
         self.filenames = []
         self.icons = []
+        self.first_lines = []
         if PYQT5:        
             SpyderPluginWidget.__init__(self, parent, main = parent)
         else:
@@ -195,6 +203,10 @@ class HistoryLog(SpyderPluginWidget):
                 editor.set_color_scheme(color_scheme_o)
             if wrap_n in options:
                 editor.toggle_wrap_mode(wrap_o)
+        if 'max_entries' in options:
+            for filename in self.filenames:
+                get_history_store(filename).set_max_entries(
+                                                self.get_option('max_entries'))
         
     #------ Private API --------------------------------------------------------
     def move_tab(self, index_from, index_to):
@@ -204,10 +216,33 @@ class HistoryLog(SpyderPluginWidget):
         filename = self.filenames.pop(index_from)
         editor = self.editors.pop(index_from)
         icon = self.icons.pop(index_from)
+        first_line = self.first_lines.pop(index_from)
         
         self.filenames.insert(index_to, filename)
         self.editors.insert(index_to, editor)
         self.icons.insert(index_to, icon)
+        self.first_lines.insert(index_to, first_line)
+
+    def history_scrolled(self, editor, value):
+        """Load previous history lines when scrolling up to the top"""
+        if value == editor.verticalScrollBar().minimum():
+            self.load_previous_lines(editor)
+
+    def load_previous_lines(self, editor):
+        """Load history lines preceding the ones shown in *editor*"""
+        index = self.editors.index(editor)
+        store = get_history_store(self.filenames[index])
+        stop = self.first_lines[index]
+        start = max(store.get_line_range()[0], stop-LOADED_LINES)
+        if start >= stop:
+            return
+        self.first_lines[index] = start
+        text = store.read_lines(start, stop)
+        cursor = QTextCursor(editor.document())
+        cursor.movePosition(QTextCursor.Start)
+        cursor.insertText(text + '\n')
+        # Keep showing the same lines
+        editor.verticalScrollBar().setValue(stop-start)
         
     #------ Public API ---------------------------------------------------------
     def add_history(self, filename):
@@ -233,13 +268,19 @@ class HistoryLog(SpyderPluginWidget):
         editor.set_font( self.get_plugin_font(), color_scheme )
         editor.toggle_wrap_mode( self.get_option('wrap') )
 
-        text, _ = encoding.read(filename)
-        editor.set_text(text)
+        # Only the last lines are loaded
+        store = get_history_store(filename)
+        first_line, stop = store.get_line_range()
+        first_line = max(first_line, stop-LOADED_LINES)
+        editor.set_text(store.read_lines(first_line, stop))
         editor.set_cursor_position('eof')
+        editor.verticalScrollBar().valueChanged.connect(
+                        lambda value: self.history_scrolled(editor, value))
         
         self.editors.append(editor)
         self.filenames.append(filename)
         self.icons.append(icon)
+        self.first_lines.append(first_line)
         index = self.tabwidget.addTab(editor, osp.basename(filename))
         self.find_widget.set_editor(editor)
         self.tabwidget.setTabToolTip(index, filename)
@@ -269,6 +310,8 @@ class HistoryLog(SpyderPluginWidget):
                                        10, 10000)
         if valid:
             self.set_option('max_entries', depth)
+            for filename in self.filenames:
+                get_history_store(filename).set_max_entries(depth)
 
     @Slot(bool)
     def toggle_wrap_mode(self, checked):
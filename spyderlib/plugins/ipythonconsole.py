@@ -348,6 +348,24 @@ class IPythonConsoleConfigPage(PluginConfigPage):
         run_file_layout.addWidget(file_radio)
         run_file_layout.addWidget(run_file_browser)
         run_file_group.setLayout(run_file_layout)
+
+        # Kernel pool Group
+        kernel_pool_group = QGroupBox(_("Preloaded kernels"))
+        kernel_pool_label = QLabel(_("Kernels are started in advance so "
+                                     "that new consoles and kernel restarts "
+                                     "are immediately available. Preloaded "
+                                     "kernels are restarted when the options "
+                                     "above are changed."))
+        kernel_pool_label.setWordWrap(True)
+        kernel_pool_spin = self.create_spinbox(
+                _("Number of preloaded kernels:"), "", 'kernel_pool/size',
+                min_=0, max_=5, step=1,
+                tip=_("Each preloaded kernel is an idle Python process"))
+
+        kernel_pool_layout = QVBoxLayout()
+        kernel_pool_layout.addWidget(kernel_pool_label)
+        kernel_pool_layout.addWidget(kernel_pool_spin)
+        kernel_pool_group.setLayout(kernel_pool_layout)
         
         # ---- Advanced settings ----
         # Greedy completer group
@@ -454,8 +472,8 @@ class IPythonConsoleConfigPage(PluginConfigPage):
                                     bg_group, source_code_group), _("Display"))
         tabs.addTab(self.create_tab(pylab_group, backend_group, inline_group),
                                     _("Graphics"))
-        tabs.addTab(self.create_tab(run_lines_group, run_file_group),
-                                    _("Startup"))
+        tabs.addTab(self.create_tab(run_lines_group, run_file_group,
+                                    kernel_pool_group), _("Startup"))
         tabs.addTab(self.create_tab(greedy_group, autocall_group, sympy_group,
                                     prompts_group), _("Advanced Settings"))
 
@@ -665,6 +683,8 @@ class IPythonConsole(SpyderPluginWidget):
                 client.set_font(font_o)
             if help_n in options and control is not None:
                 control.set_help_enabled(help_o)
+        # Restart or resize the pool of preloaded kernels
+        self.extconsole.fill_kernel_pool()
 
     def toggle_view(self, checked):
         """Toggle view"""
@@ -8,6 +8,8 @@
 Source code analysis utilities
 """
 
+from collections import OrderedDict
+import hashlib
 import sys
 import re
 import os
@@ -17,7 +19,8 @@ import traceback
 # Local import
 from spyderlib.config.base import _, DEBUG
 from spyderlib.utils import programs, encoding
-from spyderlib.py3compat import to_text_string, to_binary_string, PY3
+from spyderlib.py3compat import (is_text_string, to_text_string,
+                                 to_binary_string, PY3)
 from spyderlib import dependencies
 DEBUG_EDITOR = DEBUG >= 3
 
@@ -25,19 +28,127 @@ DEBUG_EDITOR = DEBUG >= 3
 # Pyflakes/pep8 code analysis
 #==============================================================================
 TASKS_PATTERN = r"(^|#)[ ]*(TODO|FIXME|XXX|HINT|TIP|@todo)([^#]*)"
+TASKS_RE = re.compile(TASKS_PATTERN)
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def find_line_tasks(text):
+    """Find tasks in a single line of source code"""
+    return [todo[-1].strip().capitalize()
+            for todo in TASKS_RE.findall(text)]
+
 
 #TODO: this is a test for the following function
 def find_tasks(source_code):
     """Find tasks in source code (TODO, FIXME, XXX, ...)"""
     results = []
     for line, text in enumerate(source_code.splitlines()):
-        for todo in re.findall(TASKS_PATTERN, text):
-            results.append((todo[-1].strip().capitalize(), line+1))
+        for message in find_line_tasks(text):
+            results.append((message, line+1))
     return results
 
 
+class TaskIndex(object):
+    """
+    Tasks (TODO, FIXME, XXX, ...) of a source code, maintained line by line
+
+    Only the lines which have changed have to be scanned again (see `update`)
+    and the sorted task list is only rebuilt when tasks have moved.
+    """
+    def __init__(self):
+        self.lines = [[]]
+        self.count = 0
+        self._tasks = []
+
+    def update(self, first, removed, new_lines):
+        """
+        Replace *removed* lines starting at line *first* by *new_lines*
+
+        Line numbers are 0-based.
+        """
+        old_count = sum([len(tasks)
+                         for tasks in self.lines[first:first+removed]])
+        new_tasks = [find_line_tasks(line) for line in new_lines]
+        new_count = sum([len(tasks) for tasks in new_tasks])
+        self.lines[first:first+removed] = new_tasks
+        # Task list has to be rebuilt if tasks were removed, added or if
+        # they may have been shifted by the insertion/removal of lines
+        if old_count or new_count or \
+           (self.count and removed != len(new_lines)):
+            self._tasks = None
+        self.count += new_count-old_count
+
+    def get_tasks(self):
+        """Return the sorted list of (message, line number) tasks
+        (line numbers start from 1)"""
+        if self._tasks is None:
+            self._tasks = [(message, line_number+1)
+                           for line_number, tasks in enumerate(self.lines)
+                           for message in tasks]
+        return self._tasks
+
+
+# Cache of tasks found in files, validated by modification time and size
+# (least recently used files are dropped first)
+FILE_TASKS_CACHE_SIZE = 5000
+_file_tasks_cache = OrderedDict()
+
+
+def find_tasks_in_file(filename):
+    """Find tasks in file *filename*
+    Returns a list of (line number, column, line) tuples, like Find in Files
+    results: lines are split on '\\n' only and columns are byte offsets.
+    Results are cached until the file is modified."""
+    stat = os.stat(filename)
+    key = (stat.st_mtime, stat.st_size)
+    cached = _file_tasks_cache.pop(filename, None)
+    if cached is None or cached[0] != key:
+        with open(filename, 'rb') as textfile:
+            text, coding = encoding.decode(textfile.read())
+        coding = coding.replace('-bom', '').replace('-guessed', '')
+        results = []
+        lines = text.split('\n')
+        for lineno, line in enumerate(lines):
+            if lineno < len(lines)-1:
+                line += '\n'
+            for match in TASKS_RE.finditer(line):
+                column = len(line[:match.start()].encode(coding))
+                results.append((lineno+1, column, line))
+        cached = (key, results)
+    _file_tasks_cache[filename] = cached
+    while len(_file_tasks_cache) > FILE_TASKS_CACHE_SIZE:
+        _file_tasks_cache.popitem(last=False)
+    return cached[1]
+
+
+def get_word_length(text, column):
+    """Return length of the word starting at *column* in *text*
+    (1 if there is no word at this position)"""
+    match = WORD_RE.match(text, column)
+    return len(match.group()) if match else 1
+
+
+def get_name_span(text, column, name):
+    """Return (column, length) of the first occurrence of *name* in *text*
+    at or after *column*, defaulting to the word at *column*"""
+    match = re.compile(r"\b%s\b" % re.escape(name), re.UNICODE).search(text,
+                                                                     column)
+    if match:
+        return match.start(), len(name)
+    return column, get_word_length(text, column)
+
+
+def decode_line(line, coding):
+    """Decode source code *line* (a binary string) with *coding*"""
+    try:
+        return to_text_string(line, coding or 'utf-8')
+    except (UnicodeDecodeError, LookupError):
+        return to_text_string(line, 'latin-1')
+
+
 def check_with_pyflakes(source_code, filename=None):
     """Check source code with pyflakes
+    Returns a list of (message, line number, column, length) tuples
+    (line numbers start from 1, columns from 0)
     Returns an empty list if pyflakes is not installed"""
     try:
         if filename is None:
@@ -58,7 +169,8 @@ def check_with_pyflakes(source_code, filename=None):
             if value.text is None:
                 results = []
             else:
-                results = [(value.args[0], value.lineno)]
+                column = max((value.offset or 1)-1, 0)
+                results = [(value.args[0], value.lineno, column, 1)]
         except (ValueError, TypeError):
             # Example of ValueError: file contains invalid \x escape character
             # (see http://bugs.debian.org/cgi-bin/bugreport.cgi?bug=674797)
@@ -73,10 +185,23 @@ def check_with_pyflakes(source_code, filename=None):
             coding = encoding.get_coding(source_code)
             lines = source_code.splitlines()
             for warning in w.messages:
-                if 'analysis:ignore' not in \
-                   to_text_string(lines[warning.lineno-1], coding):
-                    results.append((warning.message % warning.message_args,
-                                    warning.lineno))
+                line = lines[warning.lineno-1]
+                text = decode_line(line, coding)
+                if 'analysis:ignore' in text:
+                    continue
+                # AST column offsets are byte offsets
+                column = len(decode_line(line[:getattr(warning, 'col', 0)],
+                                         coding))
+                names = [arg for arg in warning.message_args
+                         if is_text_string(arg)]
+                if names:
+                    # The reported column is the one of the statement, not
+                    # necessarily the one of the name the message is about
+                    column, length = get_name_span(text, column, names[0])
+                else:
+                    length = get_word_length(text, column)
+                results.append((warning.message % warning.message_args,
+                                warning.lineno, column, length))
     except Exception:
         # Never return None to avoid lock in spyderlib/widgets/editor.py
         # See Issue 1547
@@ -153,22 +278,34 @@ def check(args, source_code, filename=None, options=None):
     coding = encoding.get_coding(source_code)
     lines = source_code.splitlines()
     for line in output:
-        lineno = int(re.search(r'(\:[\d]+\:)', line).group()[1:-1])
+        match = re.search(r':(\d+):(?:(\d+):)?', line)
+        lineno = int(match.group(1))
+        column = int(match.group(2) or 1)-1
         try:
             text = to_text_string(lines[lineno-1], coding)
         except TypeError:
             text = to_text_string(lines[lineno-1])
         if 'analysis:ignore' not in text:
             message = line[line.find(': ')+2:]
-            results.append((message, lineno))
+            results.append((message, lineno, column,
+                            get_word_length(text, column)))
     return results
 
 
 def check_with_pep8(source_code, filename=None):
-    """Check source code with pep8"""
+    """Check source code with pep8
+    Returns a list of (message, line number, column, length) tuples
+    The pep8 module is used in-process when importable, the pep8 executable
+    is called otherwise"""
     try:
-        args = get_checker_executable('pep8')
-        results = check(args, source_code, filename=filename, options=['-r'])
+        try:
+            import pep8
+        except ImportError:
+            args = get_checker_executable('pep8')
+            results = check(args, source_code, filename=filename,
+                            options=['-r'])
+        else:
+            results = check_with_pep8_module(pep8, source_code)
     except Exception:
         # Never return None to avoid lock in spyderlib/widgets/editor.py
         # See Issue 1547
@@ -178,13 +315,76 @@ def check_with_pep8(source_code, filename=None):
     return results
 
 
+def check_with_pep8_module(pep8, source_code):
+    """Check source code with the (already imported) *pep8* module"""
+    results = []
+
+    class Report(pep8.BaseReport):
+        def error(self, line_number, offset, text, check):
+            code = pep8.BaseReport.error(self, line_number, offset, text,
+                                         check)
+            if code:
+                results.append((text, line_number, offset))
+            return code
+
+    coding = encoding.get_coding(source_code)
+    try:
+        source_code = to_text_string(source_code, coding or 'utf-8')
+    except TypeError:
+        # Already a text string
+        pass
+    lines = source_code.splitlines(True)
+    style = pep8.StyleGuide(reporter=Report)
+    checker = pep8.Checker(lines=lines, options=style.options)
+    checker.check_all()
+    return [(message, lineno, column,
+             get_word_length(lines[lineno-1], column))
+            for message, lineno, column in results
+            if 'analysis:ignore' not in lines[lineno-1]]
+
+
+#==============================================================================
+# Code analysis results cache
+#==============================================================================
+# Results are cached by checker and source code hash, so that analyzing again
+# unchanged source code (e.g. when switching tabs or reverting changes) is free
+RESULTS_CACHE_SIZE = 200
+_results_cache = OrderedDict()
+
+
+def get_cache_key(checker_name, source_code):
+    """Return code analysis results cache key"""
+    if not isinstance(source_code, bytes):
+        source_code = source_code.encode('utf-8')
+    return (checker_name, hashlib.md5(source_code).hexdigest())
+
+
+def get_cached_results(key):
+    """Return cached code analysis results for *key* (None if not cached)"""
+    results = _results_cache.pop(key, None)
+    if results is not None:
+        _results_cache[key] = results
+    return results
+
+
+def set_cached_results(key, results):
+    """Cache code analysis results for *key*"""
+    _results_cache.pop(key, None)
+    _results_cache[key] = results
+    while len(_results_cache) > RESULTS_CACHE_SIZE:
+        _results_cache.popitem(last=False)
+
+
 if __name__ == '__main__':
 #    fname = __file__
     fname = os.path.join(os.path.dirname(__file__),
                          os.pardir, os.pardir, 'bootstrap.py')
     code = open(fname).read()
     check_results = check_with_pyflakes(code, fname)+\
-                    check_with_pep8(code, fname)+find_tasks(code)
+                    check_with_pep8(code, fname)
 #    check_results = check_with_pep8(code, fname)
-    for message, line in check_results:
+    for message, line, column, _length in check_results:
+        sys.stdout.write("Message: %s -- Line: %s -- Column: %s\n"
+                         % (message, line, column))
+    for message, line in find_tasks(code):
         sys.stdout.write("Message: %s -- Line: %s\n" % (message, line))
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Filesystem watcher shared by Spyder's widgets
+
+Files are watched with a QFileSystemWatcher (which is backed
+by inotify, kqueue, ... depending on the platform) and by polling their
+modification time and size when the system watcher can't handle them.
+Events are debounced and file changes are only reported when the content of
+the file has actually changed.
+"""
+
+# Standard library imports
+import hashlib
+import os
+import os.path as osp
+
+# Third party imports
+from qtpy.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+# Local imports
+from spyderlib.config.base import debug_print
+
+
+# Delay (ms) during which events are accumulated before being processed
+DEBOUNCE_DELAY = 200
+
+# Polling interval (ms) for paths which are not handled by the system watcher
+POLLING_INTERVAL = 2000
+
+
+def normalize_path(path):
+    """Return normalized path, used as watched paths keys"""
+    return osp.normcase(osp.abspath(path))
+
+
+def get_file_hash(filename):
+    """Return content hash of file *filename* (None if unreadable)"""
+    try:
+        with open(filename, 'rb') as fdesc:
+            return hashlib.md5(fdesc.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+
+def get_path_signature(path):
+    """Return (modification time, size) of *path* (None if not found)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size)
+
+
+class FileWatcher(QObject):
+    """
+    Filesystem watcher
+
+    Each watched file has a set of owners (e.g. editor stacks): a file is
+    watched until all its owners stopped watching it.
+
+    Directories are not watched: the file and project explorers are based on
+    QFileSystemModel, which has its own watcher.
+    """
+    # Signals emitted with the path which was passed to watch
+    sig_file_changed = Signal(str)
+    sig_file_removed = Signal(str)
+
+    def __init__(self, parent=None, debounce_delay=DEBOUNCE_DELAY,
+                 polling_interval=POLLING_INTERVAL):
+        QObject.__init__(self, parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.path_changed)
+
+        self.owners = {}
+        self.paths = {}
+        self.hashes = {}
+        self.polled = {}
+        self.pending = set()
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_delay)
+        self.debounce_timer.timeout.connect(self.process_pending)
+        self.polling_timer = QTimer(self)
+        self.polling_timer.setInterval(polling_interval)
+        self.polling_timer.timeout.connect(self.poll)
+
+    #------ Public API
+    def watch(self, filename, owner):
+        """Watch file *filename* on behalf of *owner*
+        Return False if file does not exist"""
+        if not osp.isfile(filename):
+            return False
+        key = self._add_owner(filename, owner)
+        if key not in self.hashes:
+            self.hashes[key] = get_file_hash(filename)
+        return True
+
+    def unwatch(self, path, owner):
+        """Stop watching *path* on behalf of *owner*"""
+        key = normalize_path(path)
+        owners = self.owners.get(key)
+        if owners is None:
+            return
+        owners.discard(id(owner))
+        if not owners:
+            self.owners.pop(key)
+            path = self.paths.pop(key)
+            self.hashes.pop(key, None)
+            self.pending.discard(key)
+            if self.polled.pop(key, False) is False:
+                self.watcher.removePath(path)
+            elif not self.polled:
+                self.polling_timer.stop()
+
+    def update(self, filename):
+        """Take into account the current content of *filename*, which
+        was just written or read by Spyder (no change will be reported)"""
+        key = normalize_path(filename)
+        if key in self.hashes:
+            self.hashes[key] = get_file_hash(filename)
+            self.pending.discard(key)
+            if key in self.polled:
+                self.polled[key] = get_path_signature(filename)
+
+    def is_watched(self, path):
+        """Return True if *path* is watched"""
+        return normalize_path(path) in self.owners
+
+    #------ Private API
+    def _add_owner(self, path, owner):
+        """Add *owner* to *path* owners and start watching it if necessary"""
+        key = normalize_path(path)
+        if key not in self.owners:
+            self.owners[key] = set()
+            self.paths[key] = path
+            self._add_path(key)
+        self.owners[key].add(id(owner))
+        return key
+
+    def _add_path(self, key):
+        """Watch path with the system watcher, or poll it if not possible"""
+        path = self.paths[key]
+        # Note: addPath returns None with PyQt4
+        if self.watcher.addPath(path) is False:
+            debug_print('Polling %s' % path)
+            self.polled[key] = get_path_signature(path)
+            self.polling_timer.start()
+
+    def path_changed(self, path):
+        """A watched path has changed: process it after a short delay, so
+        that bursts of events (e.g. while saving) are handled only once"""
+        key = normalize_path(path)
+        if key in self.owners:
+            self.pending.add(key)
+            self.debounce_timer.start()
+
+    def poll(self):
+        """Check polled paths modification time and size"""
+        for key, signature in list(self.polled.items()):
+            new_signature = get_path_signature(self.paths[key])
+            if new_signature != signature:
+                self.polled[key] = new_signature
+                self.path_changed(self.paths[key])
+
+    def process_pending(self):
+        """Process accumulated events"""
+        pending, self.pending = self.pending, set()
+        for key in pending:
+            path = self.paths.get(key)
+            if path is None:
+                continue
+            if not osp.isfile(path):
+                self.hashes[key] = None
+                if key not in self.polled:
+                    # The system watcher drops removed files: poll the path
+                    # to detect when the file is created again
+                    self.watcher.removePath(path)
+                    self.polled[key] = None
+                    self.polling_timer.start()
+                self.sig_file_removed.emit(path)
+                continue
+            if key not in self.polled and path not in self.watcher.files():
+                # Files saved by replacing them (write + rename) are no
+                # longer watched by the system watcher
+                self._add_path(key)
+            new_hash = get_file_hash(path)
+            if new_hash != self.hashes.get(key):
+                self.hashes[key] = new_hash
+                self.sig_file_changed.emit(path)
+
+
+FILE_WATCHER = None
+
+def get_file_watcher():
+    """Return the filesystem watcher shared by all widgets"""
+    global FILE_WATCHER
+    if FILE_WATCHER is None:
+        FILE_WATCHER = FileWatcher()
+    return FILE_WATCHER
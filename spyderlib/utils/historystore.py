@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Command history store
+
+History files are append-only logs (one command per line, lines starting
+with '#' being comments, e.g. session separators) shared by all the consoles
+using the same file. They are indexed in memory when first opened:
+- offsets of lines, so that any range of lines may be read lazily (e.g. the
+  last lines in the History pane),
+- sorted entries, for prefix searches in O(log n),
+- trigrams of entries, for substring searches (reverse-i-search).
+Files are never rewritten when opened: once they exceed their maximum number
+of entries, they are compacted in a background thread.
+"""
+
+from __future__ import print_function
+
+import bisect
+import os
+import os.path as osp
+import threading
+
+from spyderlib.config.user import replace_file
+from spyderlib.utils import encoding
+
+
+# Compaction is started when the number of entries exceeds the maximum by
+# this margin, so that the file is not rewritten after each new command
+COMPACTION_MARGIN = 100
+
+# Upper bound of the entries starting with a given prefix
+PREFIX_END = u'\uffff'
+
+
+def get_trigrams(text):
+    """Return the set of trigrams of *text*"""
+    return set([text[index:index+3] for index in range(len(text)-2)])
+
+
+def decode_line(line):
+    """Decode line read from a history file (utf-8 or ascii, as written by
+    encoding.write)"""
+    return line.decode('utf-8', 'replace').rstrip(u'\r')
+
+
+class HistoryIndex(object):
+    """In-memory index of a history file"""
+    def __init__(self):
+        self.line_offsets = [0]     # offset of each line
+        self.last_line = b''        # last line (which may be incomplete)
+        self.size = 0
+        self.entries = []           # commands
+        self.entry_lines = []       # line number of each entry
+        self.keys = []              # sorted distinct entries
+        self.positions = {}         # entry: sorted entry indexes
+        self.trigrams = {}          # trigram: sorted entry indexes
+
+    def add_data(self, data):
+        """Index *data* (bytes) appended to the file"""
+        first_line = len(self.line_offsets)-1
+        # The last line is parsed again, with the data appended to it
+        if self.entry_lines and self.entry_lines[-1] == first_line:
+            self.remove_last_entry()
+        lines = (self.last_line + data).split(b'\n')
+        offset = self.line_offsets[-1]
+        new_keys = []
+        for number, line in enumerate(lines):
+            if number > 0:
+                offset += len(lines[number-1])+1
+                self.line_offsets.append(offset)
+            text = decode_line(line)
+            if text and not text.startswith('#'):
+                self.add_entry(text, first_line+number, new_keys)
+        self.last_line = lines[-1]
+        self.size += len(data)
+        if new_keys:
+            self.keys.extend(new_keys)
+            self.keys.sort()
+
+    def add_entry(self, entry, line_number, new_keys):
+        """Add *entry* found at line *line_number*
+        New distinct entries are added to *new_keys* (to be sorted)"""
+        index = len(self.entries)
+        self.entries.append(entry)
+        self.entry_lines.append(line_number)
+        positions = self.positions.get(entry)
+        if positions is None:
+            self.positions[entry] = [index]
+            new_keys.append(entry)
+        else:
+            positions.append(index)
+        for trigram in get_trigrams(entry):
+            self.trigrams.setdefault(trigram, []).append(index)
+
+    def remove_last_entry(self):
+        """Remove last entry (its line was not complete)"""
+        entry = self.entries.pop()
+        self.entry_lines.pop()
+        positions = self.positions[entry]
+        positions.pop()
+        if not positions:
+            self.positions.pop(entry)
+            self.keys.pop(bisect.bisect_left(self.keys, entry))
+        for trigram in get_trigrams(entry):
+            indexes = self.trigrams[trigram]
+            indexes.pop()
+            if not indexes:
+                self.trigrams.pop(trigram)
+
+    def find_prefix(self, prefix, start, backward=True):
+        """Return index of the closest entry starting with *prefix*, before
+        (or after) entry index *start*, wrapping around the history
+        Return None if there is no such entry"""
+        low = bisect.bisect_left(self.keys, prefix)
+        high = bisect.bisect_left(self.keys, prefix+PREFIX_END, low)
+        found = wrapped = None
+        for key in self.keys[low:high]:
+            positions = self.positions[key]
+            if backward:
+                position = bisect.bisect_left(positions, start)
+                if position > 0 and (found is None
+                                     or positions[position-1] > found):
+                    found = positions[position-1]
+                if wrapped is None or positions[-1] > wrapped:
+                    wrapped = positions[-1]
+            else:
+                position = bisect.bisect_right(positions, start)
+                if position < len(positions) and \
+                  (found is None or positions[position] < found):
+                    found = positions[position]
+                if wrapped is None or positions[0] < wrapped:
+                    wrapped = positions[0]
+        return wrapped if found is None else found
+
+    def find_substring(self, text, start, backward=True):
+        """Return index of the closest entry containing *text*, before
+        (or after) entry index *start* (without wrapping around)
+        Return None if there is no such entry"""
+        if len(text) < 3:
+            if backward:
+                candidates = range(min(start, len(self.entries))-1, -1, -1)
+            else:
+                candidates = range(max(start+1, 0), len(self.entries))
+            for index in candidates:
+                if text in self.entries[index]:
+                    return index
+            return None
+        # Entries containing *text* contain all its trigrams: only entries
+        # containing its least frequent trigram have to be checked
+        indexes = None
+        for trigram in get_trigrams(text):
+            trigram_indexes = self.trigrams.get(trigram)
+            if trigram_indexes is None:
+                return None
+            if indexes is None or len(trigram_indexes) < len(indexes):
+                indexes = trigram_indexes
+        if backward:
+            candidates = range(bisect.bisect_left(indexes, start)-1, -1, -1)
+        else:
+            candidates = range(bisect.bisect_right(indexes, start),
+                               len(indexes))
+        for position in candidates:
+            if text in self.entries[indexes[position]]:
+                return indexes[position]
+        return None
+
+
+class HistoryStore(object):
+    """
+    Command history file
+
+    Entries are indexed by their position in the history (from the oldest
+    to the most recent one); lines are numbered from the first line of the
+    file when it was opened (lines dropped by compaction are still counted)
+    """
+    def __init__(self, filename, header=(), max_entries=None):
+        self.filename = filename
+        self.header = list(header)
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self.compaction_thread = None
+        self.dropped_lines = 0
+        self.index = HistoryIndex()
+        if osp.isfile(filename):
+            self.reload()
+        elif header:
+            self.write(os.linesep.join(header))
+
+    def __len__(self):
+        return len(self.index.entries)
+
+    def __getitem__(self, index):
+        return self.index.entries[index]
+
+    def reload(self):
+        """Index the whole file again"""
+        with self.lock:
+            index = HistoryIndex()
+            try:
+                with open(self.filename, 'rb') as fdesc:
+                    index.add_data(fdesc.read())
+            except (IOError, OSError):
+                pass
+            self.index = index
+
+    def write(self, text):
+        """Append *text* to history file"""
+        data, _coding = encoding.encode(text, 'utf-8')
+        with self.lock:
+            try:
+                if osp.getsize(self.filename) != self.index.size:
+                    # The file was modified by another process
+                    self.reload()
+            except OSError:
+                pass
+            with open(self.filename, 'ab') as fdesc:
+                fdesc.write(data)
+            self.index.add_data(data)
+        self.compact_if_needed()
+
+    #------ Searching
+    def find_prefix(self, prefix, start, backward=True):
+        """Return index of the closest entry starting with *prefix*, before
+        (or after) entry *start*, wrapping around the history (None if there
+        is no such entry)"""
+        with self.lock:
+            return self.index.find_prefix(prefix, start, backward)
+
+    def find_substring(self, text, start, backward=True):
+        """Return index of the closest entry containing *text*, before
+        (or after) entry *start* (None if there is no such entry)"""
+        with self.lock:
+            return self.index.find_substring(text, start, backward)
+
+    #------ Reading lines
+    def get_line_range(self):
+        """Return (first line, last line + 1) of history file"""
+        with self.lock:
+            return (self.dropped_lines,
+                    self.dropped_lines+len(self.index.line_offsets))
+
+    def read_lines(self, start, stop):
+        """Return text of lines *start* to *stop* (excluded)"""
+        with self.lock:
+            offsets = self.index.line_offsets
+            start = max(start-self.dropped_lines, 0)
+            stop = min(stop-self.dropped_lines, len(offsets))
+            if start >= stop:
+                return u''
+            begin = offsets[start]
+            if stop < len(offsets):
+                end = offsets[stop]-1
+            else:
+                end = self.index.size
+            try:
+                with open(self.filename, 'rb') as fdesc:
+                    fdesc.seek(begin)
+                    data = fdesc.read(end-begin)
+            except (IOError, OSError):
+                return u''
+        return u'\n'.join([decode_line(line) for line in data.split(b'\n')])
+
+    #------ Compaction
+    def set_max_entries(self, max_entries):
+        """Set maximum number of entries"""
+        self.max_entries = max_entries
+        self.compact_if_needed()
+
+    def compact_if_needed(self):
+        """Compact history file in a background thread if it has too many
+        entries"""
+        with self.lock:
+            if not self.max_entries \
+              or len(self.index.entries) <= self.max_entries+COMPACTION_MARGIN \
+              or self.compaction_thread is not None:
+                return
+            self.compaction_thread = threading.Thread(target=self.compact)
+            self.compaction_thread.setDaemon(True)
+            self.compaction_thread.start()
+
+    def compact(self):
+        """Drop oldest entries of history file, keeping the last
+        *max_entries* ones (and the comments preceding them)"""
+        try:
+            with self.lock:
+                index = self.index
+                count = len(index.entries)
+                if not self.max_entries or count <= self.max_entries:
+                    return
+                # Lines following the last dropped entry are kept
+                first_line = index.entry_lines[count-self.max_entries-1]+1
+                begin, size = index.line_offsets[first_line], index.size
+                if self.header:
+                    header = os.linesep.join(self.header)+os.linesep
+                    header = encoding.encode(header, 'utf-8')[0]
+                else:
+                    # Keep the comments preceding the first entry
+                    header_end = index.line_offsets[index.entry_lines[0]]
+            if not self.header:
+                with open(self.filename, 'rb') as fdesc:
+                    header = fdesc.read(header_end)
+            with open(self.filename, 'rb') as fdesc:
+                fdesc.seek(begin)
+                data = header + fdesc.read(size-begin)
+            new_index = HistoryIndex()
+            new_index.add_data(data)
+            with self.lock:
+                if self.index is not index:
+                    # History was reloaded in the meantime
+                    return
+                if index.size > size:
+                    # Entries were added in the meantime
+                    with open(self.filename, 'rb') as fdesc:
+                        fdesc.seek(size)
+                        tail = fdesc.read(index.size-size)
+                    data += tail
+                    new_index.add_data(tail)
+                temp_filename = self.filename + '.tmp'
+                with open(temp_filename, 'wb') as fdesc:
+                    fdesc.write(data)
+                replace_file(temp_filename, self.filename)
+                self.dropped_lines += len(index.line_offsets) \
+                                      - len(new_index.line_offsets)
+                self.index = new_index
+        except (IOError, OSError):
+            pass
+        finally:
+            self.compaction_thread = None
+
+
+HISTORY_STORES = {}
+
+def get_history_store(filename, header=(), max_entries=None):
+    """Return the history store of file *filename*, shared by all widgets
+    *header*: lines written at the beginning of the file
+    *max_entries*: number of entries kept when compacting the file"""
+    key = osp.normcase(osp.abspath(filename))
+    store = HISTORY_STORES.get(key)
+    if store is None:
+        store = HISTORY_STORES[key] = HistoryStore(filename, header,
+                                                   max_entries)
+        store.compact_if_needed()
+    else:
+        if header and not store.header:
+            store.header = list(header)
+        if max_entries is not None and max_entries != store.max_entries:
+            store.set_max_entries(max_entries)
+    return store
+
+
+def test():
+    """Fill a history file and search it"""
+    import tempfile
+    import time
+    filename = osp.join(tempfile.mkdtemp(), 'history.py')
+    header = ['# -*- coding: utf-8 -*-', '# *** History ***']
+    store = HistoryStore(filename, header, max_entries=1000)
+    t0 = time.time()
+    for session in range(10):
+        text = os.linesep*2 + '##---(session %d)---' % session
+        for index in range(500):
+            text += os.linesep + 'x%d = f(%d, %d)' % (index, session, index)
+        store.write(text)
+    print("Wrote 5000 entries in %.3f s" % (time.time()-t0))
+    thread = store.compaction_thread
+    if thread is not None:
+        thread.join()
+    # Entries may have been added during the last background compaction
+    store.compact()
+    assert len(store) == 1000, len(store)
+    assert store[-1] == 'x499 = f(9, 499)'
+    assert store.read_lines(*store.get_line_range()).startswith(
+                                    '\n'.join(header) + '\n\n##---(session 8)')
+    reloaded = HistoryStore(filename)
+    assert reloaded.index.entries == store.index.entries
+    start = len(store)
+    index = store.find_prefix('x42', start)
+    assert store[index] == 'x429 = f(9, 429)', store[index]
+    index = store.find_substring('f(8, 42', start)
+    assert store[index] == 'x429 = f(8, 429)', store[index]
+    assert store.find_substring('f(7,', start) is None
+    store.write(os.linesep + u'print("é")')
+    assert store.find_substring(u'"é"', len(store)) == len(store)-1
+    print("Searched in %d entries" % len(store))
+
+
+if __name__ == '__main__':
+    test()
@@ -22,6 +22,14 @@ _resource = {
     'loaded': False,
 }
 
+# Icons cache: keys are (theme, name, extension, ...) tuples
+_cache = {
+    'theme': None,
+    'icons': {},
+    'hits': 0,
+    'misses': 0,
+}
+
 _qtaargs = {
     'log':                     [('fa.file-text-o',), {}],
     'configure':               [('fa.wrench',), {}],
@@ -248,8 +256,49 @@ def get_icon(name, default=None, resample=False):
         return icon
 
 
+def get_theme():
+    """Return current icon theme
+    The theme option is read once: call `clear_cache` when it changes"""
+    if _cache['theme'] is None:
+        _cache['theme'] = CONF.get('main', 'icon_theme')
+    return _cache['theme']
+
+
+def clear_cache():
+    """Drop cached icons and icon theme"""
+    _cache['icons'].clear()
+    _cache['theme'] = None
+
+
+def get_cache_info():
+    """Return (hits, misses, number of cached icons) of the icons cache"""
+    return _cache['hits'], _cache['misses'], len(_cache['icons'])
+
+
+def get_cached_icon(key, create_icon):
+    """Return icon identified by *key*, a (theme, name, extension, ...)
+    tuple, calling *create_icon()* only if it is not already cached"""
+    icons = _cache['icons']
+    try:
+        icon = icons[key]
+        _cache['hits'] += 1
+    except KeyError:
+        icon = icons[key] = create_icon()
+        _cache['misses'] += 1
+    # QIcon is implicitly shared: copies are cheap and callers can't alter
+    # the cached icon
+    return QIcon(icon) if icon is not None else None
+
+
 def icon(name, resample=False, icon_path=None):
-    theme = CONF.get('main', 'icon_theme')
+    theme = get_theme()
+    return get_cached_icon((theme, name, None, resample, icon_path),
+                           lambda: _create_icon(theme, name, resample,
+                                                icon_path))
+
+
+def _create_icon(theme, name, resample, icon_path):
+    """Create icon *name* of *theme* (see `icon`)"""
     if theme == 'spyder 3':
         if not _resource['loaded']:
             qta.load_font('spyder', 'spyder.ttf', 'spyder-charmap.json',
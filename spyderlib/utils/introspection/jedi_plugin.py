@@ -7,6 +7,7 @@
 """
 Jedi Introspection Plugin
 """
+from collections import OrderedDict
 import re
 import os.path as osp
 import sys
@@ -27,6 +28,10 @@ except ImportError:
     jedi = None
 
 
+# Number of files whose last Jedi script is kept
+SCRIPT_CACHE_SIZE = 10
+
+
 class JediPlugin(IntrospectionPlugin):
     """
     Jedi based introspection plugin for jedi
@@ -37,6 +42,20 @@ class JediPlugin(IntrospectionPlugin):
     # ---- IntrospectionPlugin API --------------------------------------------
     name = 'jedi'
 
+    def __init__(self):
+        # Last script of each file, with the results of the functions called
+        # on it: (filename, path): ((source, line, column), script, results)
+        # Scripts are reused by requests at the same position in the same
+        # buffer (e.g. completions, then calltip, then go-to-definition).
+        # Other requests create a new script, always with the file path when
+        # possible: Jedi's parser cache is keyed by path, so that an
+        # unchanged buffer isn't parsed again and a modified buffer is
+        # re-parsed incrementally.
+        self.scripts = OrderedDict()
+        # Files whose requests fail with their path (e.g. non-Python files):
+        # {filename: modification time of the file when Jedi failed}
+        self.failing_filenames = {}
+
     def load_plugin(self):
         """Load the Jedi introspection plugin"""
         if not programs.is_module_installed('jedi', JEDI_REQVER):
@@ -160,28 +179,63 @@ class JediPlugin(IntrospectionPlugin):
                     and hasattr(meta, 'forbid')):
                 sys.meta_path.remove(meta)
 
-        if use_filename:
-            filename = info['filename']
+        filename = info['filename']
+        if filename in self.failing_filenames:
+            try:
+                mtime = osp.getmtime(filename)
+            except OSError:
+                mtime = None
+            if self.failing_filenames[filename] != mtime:
+                # File has been saved since Jedi failed with its path
+                del self.failing_filenames[filename]
+        if use_filename and filename not in self.failing_filenames:
+            path = filename
         else:
-            filename = None
+            path = None
 
+        val, error = self.call_jedi_script(func_name, info, path)
+        if not val and path:
+            val, retry_error = self.call_jedi_script(func_name, info, None)
+            if error and not retry_error:
+                # Don't try again with this path until the file is saved
+                try:
+                    self.failing_filenames[filename] = osp.getmtime(filename)
+                except OSError:
+                    self.failing_filenames[filename] = None
+        if DEBUG_EDITOR:
+            log_dt(LOG_FILENAME, func_name, t0)
+        return val
+
+    def call_jedi_script(self, func_name, info, path):
+        """Call a desired function on the Jedi Script of *info* created with
+        *path*, and return (result, True if Jedi raised an exception)"""
+        key = (info['filename'], path)
+        position = (info['source_code'], info['line_num'], info['column'])
+        entry = self.scripts.pop(key, None)
+        if entry is None or entry[0] != position:
+            entry = (position, None, {})
+        # Most recently used scripts are last
+        self.scripts[key] = entry
+        while len(self.scripts) > SCRIPT_CACHE_SIZE:
+            self.scripts.popitem(last=False)
+        _position, script, results = entry
+        if func_name in results:
+            return results[func_name], False
         try:
-            script = jedi.Script(info['source_code'], info['line_num'],
-                                 info['column'], filename)
+            if script is None:
+                script = jedi.Script(info['source_code'], info['line_num'],
+                                     info['column'], path)
+                self.scripts[key] = (position, script, results)
             func = getattr(script, func_name)
             val = func()
         except Exception as e:
-            val = None
             debug_print('Jedi error (%s)' % func_name)
             debug_print(str(e))
             if DEBUG_EDITOR:
                 log_last_error(LOG_FILENAME, str(e))
-        if DEBUG_EDITOR:
-            log_dt(LOG_FILENAME, func_name, t0)
-        if not val and filename:
-            return self.get_jedi_object(func_name, info, False)
-        else:
-            return val
+            return None, True
+        results[func_name] = val
+        return val, False
 
     @staticmethod
     def get_definition_info(defn):
@@ -57,7 +57,11 @@ class PluginManager(QObject):
             debug_print('Introspection Plugin Loaded: %s' % name)
             plugins[name] = plugin
             plugin.received.connect(self.handle_response)
+            # Plugin servers are restarted if they crash
+            plugin.initialized.connect(
+                lambda plugin=plugin: self._initialize_plugin(plugin))
         self.plugins = plugins
+        self.project_paths = []
         self.timer = QTimer()
         self.desired = []
         self.ids = dict()
@@ -115,6 +119,12 @@ class PluginManager(QObject):
         for plugin in self.plugins.values():
             plugin.request('validate')
 
+    def set_project_paths(self, project_paths):
+        """Set root paths of opened projects"""
+        self.project_paths = list(project_paths)
+        for plugin in self.plugins.values():
+            plugin.request('set_project_paths', self.project_paths)
+
     def handle_response(self, response):
         name = self.ids.get(response['request_id'], None)
         if not name:
@@ -147,6 +157,11 @@ class PluginManager(QObject):
             self.pending_request = None
             self.send_request(info)
 
+    def _initialize_plugin(self, plugin):
+        """Send state to a plugin whose server has just started"""
+        if self.project_paths:
+            plugin.request('set_project_paths', self.project_paths)
+
     def _handle_timeout(self):
         self.waiting = False
         if self.pending:
@@ -169,10 +184,12 @@ class IntrospectionManager(QObject):
             self._introspection_complete)
 
     def change_executable(self, executable):
+        project_paths = self.plugin_manager.project_paths
         self.plugin_manager.close()
         self.plugin_manager = PluginManager(executable)
         self.plugin_manager.introspection_complete.connect(
             self._introspection_complete)
+        self.plugin_manager.project_paths = project_paths
 
     def _get_code_info(self, name, position=None, **kwargs):
 
@@ -214,6 +231,11 @@ class IntrospectionManager(QObject):
         """Validate the plugins"""
         self.plugin_manager.validate()
 
+    def set_project_paths(self, project_paths):
+        """Set root paths of opened projects (plugins may use them to
+        resolve project imports)"""
+        self.plugin_manager.set_project_paths(project_paths)
+
     def is_editor_ready(self):
         """Check if the main app is starting up"""
         if self.editor_widget:
@@ -349,3 +371,14 @@ class IntrospectionPlugin(object):
         """Validate the plugin"""
         pass
 
+    def set_project_paths(self, project_paths):
+        """Set root paths of opened projects"""
+        pass
+
+    def idle(self):
+        """Do a short unit of background work (the plugin server calls
+        this method while there is no request)
+
+        Return True if there is more work to do"""
+        return False
+
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Module server, runs the functions of a module in a separate process
+(see ClientPool in plugin_client.py)
+"""
+
+import sys
+
+from spyderlib.utils.introspection.plugin_server import AsyncServer
+
+
+class ModuleServer(AsyncServer):
+
+    """
+    Module server, provides a separate process for calling the functions
+    of a module, e.g. `spyderlib.utils.codeanalysis`.
+    """
+
+    def initialize(self, module_name):
+        """Import the module and return it.
+        """
+        return __import__(module_name, fromlist=[module_name])
+
+    def select_requests(self, requests):
+        """Handle all pending requests: each one has its own arguments.
+        """
+        return requests
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not len(args) == 2:
+        print('Usage: module_server.py client_port module_name')
+        sys.exit(0)
+    server = ModuleServer(*args)
+    print('Started')
+    server.run()
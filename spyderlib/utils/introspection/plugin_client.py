@@ -6,6 +6,7 @@
 
 # Local imports
 import imp
+import itertools
 import os
 import os.path as osp
 import sys
@@ -47,7 +48,7 @@ class AsyncClient(QObject):
         self.extra_args = extra_args
         self.target = target
         self.name = name or self
-        self.libs = libs
+        self.libs = libs or []
         self.cwd = cwd
         self.env = env
         self.is_initialized = False
@@ -89,7 +90,7 @@ class AsyncClient(QObject):
                     pass
             env.append("PYTHONPATH=%s" % python_path)
         if self.env:
-            env.update(self.env)
+            env += ['%s=%s' % item for item in self.env.items()]
         for envItem in env:
             envName, separator, envValue = envItem.partition('=')
             processEnvironment.insert(envName, envValue)
@@ -190,6 +191,170 @@ class PluginClient(AsyncClient):
         self.name = plugin_name
 
 
+class ModuleClient(AsyncClient):
+
+    def __init__(self, module_name, executable=None, name=None):
+        cwd = os.path.dirname(__file__)
+        # The server imports spyderlib, which may not be installed
+        python_path = osp.dirname(get_module_path('spyderlib'))
+        if os.environ.get('PYTHONPATH'):
+            python_path = osp.pathsep.join([python_path,
+                                            os.environ['PYTHONPATH']])
+        super(ModuleClient, self).__init__('module_server.py',
+            executable=executable, name=name or module_name, cwd=cwd,
+            env={'PYTHONPATH': python_path}, extra_args=[module_name],
+            libs=[])
+
+
+class ClientPool(QObject):
+
+    """
+    A pool of servers calling the functions of a module in separate
+    processes (see module_server.py).
+
+    Requests are sent to the least loaded server, or queued until a server
+    is ready. Requests lost by a server which restarts are sent again, and
+    callbacks are always called: with None if the request has failed.
+    """
+
+    def __init__(self, module_name, size=2):
+        super(ClientPool, self).__init__()
+        self.module_name = module_name
+        self.size = size
+        self.clients = []
+        self.started = False
+        # Requests by id: (func_name, args, callback, owner)
+        self.requests = {}
+        # Server handling each sent request, and ids of sent requests by
+        # server request id
+        self.assigned = {}
+        self.sent = {}
+        self.pending = []
+        self.counter = itertools.count()
+
+    def start(self):
+        """Start the server processes.
+        """
+        if self.started:
+            return
+        self.started = True
+        for index in range(self.size):
+            client = ModuleClient(self.module_name, name='%s-%d' % (
+                                  self.module_name.split('.')[-1], index))
+            client.received.connect(self.response_received)
+            client.initialized.connect(
+                    lambda client=client: self.restart_requests(client))
+            client.errored.connect(
+                    lambda client=client: self.restart_requests(client,
+                                                                True))
+            try:
+                client.run()
+            except IOError:
+                debug_print('Unable to start %s' % client.name)
+                continue
+            self.clients.append(client)
+
+    def is_ready(self):
+        """Return True if a server is ready to handle requests.
+        """
+        return any([client.is_initialized for client in self.clients])
+
+    def is_busy(self):
+        """Return True if some requests have not been answered.
+        """
+        return bool(self.requests)
+
+    def request(self, func_name, args, callback, owner=None):
+        """Request a call of function *func_name* with *args*.
+
+        *callback* is called with the result, or with None if the call has
+        failed. *owner* is used to cancel requests.
+        """
+        self.start()
+        request_id = next(self.counter)
+        self.requests[request_id] = (func_name, args, callback, owner)
+        self.pending.append(request_id)
+        self.send_requests()
+        return request_id
+
+    def cancel(self, match):
+        """Cancel the requests whose owner satisfies *match*: their
+        callbacks will not be called.
+        """
+        for request_id, request in list(self.requests.items()):
+            if match(request[-1]):
+                self.requests.pop(request_id)
+                self.assigned.pop(request_id, None)
+        self.pending = [request_id for request_id in self.pending
+                        if request_id in self.requests]
+
+    def send_requests(self):
+        """Send pending requests to the least loaded servers.
+        """
+        if not self.clients:
+            # No server can be started: fail all requests
+            while self.pending:
+                self.fail_request(self.pending[0])
+            return
+        load = dict((id(client), 0) for client in self.clients
+                    if client.is_initialized)
+        if not load:
+            return
+        for client in self.assigned.values():
+            if id(client) in load:
+                load[id(client)] += 1
+        while self.pending:
+            client = min([client for client in self.clients
+                          if id(client) in load],
+                         key=lambda client: load[id(client)])
+            request_id = self.pending[0]
+            func_name, args = self.requests[request_id][:2]
+            client_request_id = client.request(func_name, *args)
+            if client_request_id is None:
+                break
+            self.pending.pop(0)
+            load[id(client)] += 1
+            self.assigned[request_id] = client
+            self.sent[client_request_id] = request_id
+
+    def restart_requests(self, client, errored=False):
+        """Server *client* has been (re)started, or has *errored*: send
+        again the requests which have been lost.
+        """
+        if errored and client in self.clients:
+            # The server could not be restarted
+            self.clients.remove(client)
+        lost = sorted([request_id for request_id, _client
+                       in self.assigned.items() if _client is client])
+        for request_id in lost:
+            self.assigned.pop(request_id)
+        self.pending = lost + self.pending
+        self.sent = dict([(key, request_id) for key, request_id
+                          in self.sent.items() if request_id in self.assigned])
+        self.send_requests()
+
+    def fail_request(self, request_id):
+        """Call the callback of request *request_id* with None.
+        """
+        self.pending.remove(request_id)
+        callback = self.requests.pop(request_id)[2]
+        callback(None)
+
+    def response_received(self, response):
+        """Handle a response from a server.
+        """
+        request_id = self.sent.pop(response.get('request_id'), None)
+        if request_id not in self.requests:
+            return
+        self.assigned.pop(request_id, None)
+        callback = self.requests.pop(request_id)[2]
+        if 'error' in response:
+            debug_print(response['error'])
+            callback(None)
+        else:
+            callback(response['result'])
+
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     plugin = PluginClient('jedi')
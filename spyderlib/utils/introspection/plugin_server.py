@@ -5,6 +5,7 @@
 # (see spyderlib/__init__.py for details)
 
 import sys
+import time
 import traceback
 
 import zmq
@@ -13,6 +14,9 @@ import zmq
 # Timeout in milliseconds
 TIMEOUT = 10000
 
+# Plugin requests which must not be dropped for a more recent request
+STATE_REQUESTS = ('validate', 'set_project_paths')
+
 
 class AsyncServer(object):
 
@@ -36,13 +40,23 @@ class AsyncServer(object):
 
     def run(self):
         """Handle requests from the client.
+
+        Idle work (see `idle`) is done while there is no request to handle.
         """
+        busy = True
+        last_event = time.time()
         while 1:
             # Poll for events, handling a timeout.
-            events = self.socket.poll(TIMEOUT)
+            events = self.socket.poll(0 if busy else TIMEOUT)
             if events == 0:
-                print('Timed out')
-                return
+                if time.time() - last_event > TIMEOUT / 1000.:
+                    print('Timed out')
+                    return
+                if busy:
+                    busy = self.idle()
+                continue
+            last_event = time.time()
+            busy = True
             # Drain all exising requests, handling quit and heartbeat.
             requests = []
             while 1:
@@ -56,24 +70,35 @@ class AsyncServer(object):
                 events = self.socket.poll(0)
                 if events == 0:
                     break
-            # Select the most recent request.
-            if not requests:
-                continue
-            request = requests[-1]
+            for request in self.select_requests(requests):
+                # Gather the response
+                response = dict(func_name=request['func_name'],
+                                request_id=request['request_id'])
+                try:
+                    func = getattr(self.object, request['func_name'])
+                    args = request.get('args', [])
+                    kwargs = request.get('kwargs', {})
+                    response['result'] = func(*args, **kwargs)
+                except Exception:
+                    response['error'] = traceback.format_exc()
+
+                # Send the response to the client.
+                self.socket.send_pyobj(response)
+
+    def select_requests(self, requests):
+        """Return the requests to be handled among pending *requests*.
+
+        Only the most recent request is handled by default.
+        """
+        return requests[-1:]
 
-            # Gather the response
-            response = dict(func_name=request['func_name'],
-                            request_id=request['request_id'])
-            try:
-                func = getattr(self.object, request['func_name'])
-                args = request.get('args', [])
-                kwargs = request.get('kwargs', {})
-                response['result'] = func(*args, **kwargs)
-            except Exception:
-                response['error'] = traceback.format_exc()
+    def idle(self):
+        """Do a short unit of background work while there is no request.
 
-            # Send the response to the client.
-            self.socket.send_pyobj(response)
+        Return True if there is more work to do: requests are checked
+        between units of work.
+        """
+        return False
 
 
 class PluginServer(AsyncServer):
@@ -94,6 +119,23 @@ class PluginServer(AsyncServer):
         plugin.load_plugin()
         return plugin
 
+    def select_requests(self, requests):
+        """Return the requests to be handled among pending *requests*.
+
+        Requests changing the state of the plugin (see `STATE_REQUESTS`) are
+        all handled, in order, followed by the most recent other request.
+        """
+        state_requests = [request for request in requests
+                          if request['func_name'] in STATE_REQUESTS]
+        other_requests = [request for request in requests
+                          if request['func_name'] not in STATE_REQUESTS]
+        return state_requests + other_requests[-1:]
+
+    def idle(self):
+        """Do a short unit of background work while there is no request.
+        """
+        return self.object.idle()
+
 
 if __name__ == '__main__':
     args = sys.argv[1:]
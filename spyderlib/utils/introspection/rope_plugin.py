@@ -8,12 +8,15 @@
 Rope introspection plugin
 """
 
-import time
+import hashlib
 import imp
+import os
+import os.path as osp
+import time
 
 from spyderlib.config.base import get_conf_path, STDERR
 from spyderlib.utils import encoding, programs
-from spyderlib.py3compat import PY2
+from spyderlib.py3compat import pickle, PY2, to_binary_string
 from spyderlib.utils.dochelpers import getsignaturefromtext
 from spyderlib.utils import sourcecode
 from spyderlib.utils.debug import log_last_error, log_dt
@@ -43,6 +46,162 @@ ROPE_PREFS = {'ignore_syntax_errors': True,
               'extension_modules': [],
               }
 
+# Directory of the rope folders (usually '.ropeproject') of Spyder projects:
+# rope data is kept out of projects and reused between sessions
+ROPE_CACHE_PATH = get_conf_path('rope')
+
+# Directories which are not walked to find project modules
+EXCLUDED_DIRNAMES = ('build', 'dist', '__pycache__')
+
+
+def get_rope_folder(root_path):
+    """Return cache directory of the Spyder project *root_path* and the
+    corresponding rope folder name (relative to *root_path*, None if the
+    cache directory can't be reached from the project)"""
+    digest = hashlib.md5(to_binary_string(osp.normcase(root_path),
+                                          'utf-8')).hexdigest()
+    name = osp.basename(osp.normpath(root_path))
+    cache_path = osp.join(ROPE_CACHE_PATH, '%s-%s' % (name, digest[:10]))
+    if not osp.isdir(cache_path):
+        os.makedirs(cache_path)
+    try:
+        ropefolder = osp.relpath(cache_path, root_path)
+    except ValueError:
+        # Not on the same drive (Windows)
+        return cache_path, None
+    # Rope resource paths use slashes
+    return cache_path, ropefolder.replace(os.sep, '/')
+
+
+class PersistentRopeProject(object):
+    """
+    Rope project of a Spyder project
+
+    Modules are validated by modification time: only modules modified since
+    the last validation are validated by rope. Modules are analyzed by
+    `analyze_next` (in the idle time of the introspection server), modules
+    which were analyzed in a previous session are only loaded: a module is
+    recorded as analyzed once its object data has been saved.
+    """
+
+    def __init__(self, root_path, project, cache_path):
+        self.root_path = root_path
+        self.project = project
+        self.mtimes_filename = osp.join(cache_path, 'mtimes.pickle')
+        self.analyzed = {}      # filename: modification time when analyzed
+        try:
+            with open(self.mtimes_filename, 'rb') as fdesc:
+                self.analyzed = pickle.load(fdesc)
+        except Exception:
+            pass
+        self.unsaved = {}       # analyzed modules whose data is not saved
+        self.mtimes = {}        # filename: modification time when validated
+        self.pending = []       # (filename, analyze) modules to be warmed up
+        self.validate()
+        # Modules analyzed in a previous session are only loaded, after
+        # modified modules are analyzed
+        self.pending += [(filename, False) for filename, mtime
+                         in sorted(self.mtimes.items())
+                         if self.analyzed.get(filename) == mtime]
+
+    def get_filenames(self):
+        """Return Python modules of project"""
+        filenames = []
+        for dirpath, dirnames, files in os.walk(self.root_path):
+            dirnames[:] = [dirname for dirname in dirnames
+                           if not dirname.startswith('.')
+                           and dirname not in EXCLUDED_DIRNAMES]
+            filenames += [osp.join(dirpath, fname) for fname in files
+                          if osp.splitext(fname)[1] in ('.py', '.pyw')]
+        return filenames
+
+    def get_resource(self, path):
+        """Return rope resource of *path*"""
+        if PY2:
+            path = encoding.to_fs_from_unicode(path)
+        return rope.base.libutils.path_to_resource(self.project, path)
+
+    def validate_resource(self, path):
+        """Validate rope resource of *path*"""
+        try:
+            self.project.validate(self.get_resource(path))
+        except Exception:
+            if DEBUG_EDITOR:
+                log_last_error(LOG_FILENAME, "validate: %r" % path)
+
+    def validate(self):
+        """Validate modules whose modification time changed since the last
+        validation: modified modules are analyzed again"""
+        mtimes = {}
+        for filename in self.get_filenames():
+            try:
+                mtimes[filename] = osp.getmtime(filename)
+            except OSError:
+                continue
+        modified = [filename for filename, mtime in sorted(mtimes.items())
+                    if self.mtimes.get(filename) != mtime
+                    and self.analyzed.get(filename) != mtime]
+        for filename in modified:
+            self.validate_resource(filename)
+        # Modified modules are analyzed first
+        modified_set = set(modified)
+        self.pending = [(filename, True) for filename in modified] + \
+                       [(filename, analyze) for filename, analyze
+                        in self.pending if filename not in modified_set
+                        and filename in mtimes]
+        for filename in set(self.mtimes)-set(mtimes):
+            # Removed module
+            self.analyzed.pop(filename, None)
+            self.unsaved.pop(filename, None)
+            if osp.isdir(osp.dirname(filename)):
+                self.validate_resource(osp.dirname(filename))
+        self.mtimes = mtimes
+
+    def analyze_next(self):
+        """Analyze or load the next pending module, to warm up rope caches
+        and object database
+
+        Return True if there are modules left"""
+        if not self.pending:
+            return False
+        filename, analyze = self.pending.pop(0)
+        try:
+            resource = self.get_resource(filename)
+            if analyze:
+                rope.base.libutils.analyze_module(self.project, resource)
+                self.unsaved[filename] = self.mtimes.get(filename)
+            elif hasattr(self.project, 'get_pymodule'):
+                self.project.get_pymodule(resource)
+            else:
+                # rope < 0.10
+                self.project.pycore.resource_to_pyobject(resource)
+        except Exception:
+            if DEBUG_EDITOR:
+                log_last_error(LOG_FILENAME, "analyze_module: %r" % filename)
+        if not self.pending:
+            self.save()
+        return bool(self.pending)
+
+    def save(self):
+        """Save rope data and modification times of analyzed modules"""
+        try:
+            self.project.sync()
+            # Object data is saved only in the rope folder, if enabled
+            if self.project.ropefolder is not None and \
+               self.project.prefs.get('save_objectdb', False):
+                self.analyzed.update(self.unsaved)
+            self.unsaved = {}
+            with open(self.mtimes_filename, 'wb') as fdesc:
+                pickle.dump(self.analyzed, fdesc, 2)
+        except Exception:
+            if DEBUG_EDITOR:
+                log_last_error(LOG_FILENAME, "save: %r" % self.root_path)
+
+    def close(self):
+        """Close rope project"""
+        self.save()
+        self.project.close()
+
 
 class RopePlugin(IntrospectionPlugin):
     """
@@ -52,6 +211,7 @@ class RopePlugin(IntrospectionPlugin):
     """
 
     project = None
+    projects = None
 
     # ---- IntrospectionPlugin API --------------------------------------------
     name = 'rope'
@@ -60,8 +220,9 @@ class RopePlugin(IntrospectionPlugin):
         """Load the Rope introspection plugin"""
         if not programs.is_module_installed('rope', ROPE_REQVER):
             raise ImportError('Requires Rope %s' % ROPE_REQVER)
-        self.project = None
-        self.create_rope_project(root_path=get_conf_path())
+        self.projects = {}  # root path: PersistentRopeProject
+        self.project = self.create_rope_project(root_path=get_conf_path())
+        self.validate()
         submods = get_preferred_submodules()
         actual = []
         for submod in submods:
@@ -70,14 +231,16 @@ class RopePlugin(IntrospectionPlugin):
                 actual.append(submod)
             except ImportError:
                 pass
+        self.extension_modules = actual
         if self.project is not None:
             self.project.prefs.set('extension_modules', actual)
 
     def get_completions(self, info):
         """Get a list of (completion, type) tuples using Rope"""
-        if self.project is None:
-            return []
         filename = info['filename']
+        project = self.get_rope_project(filename)
+        if project is None:
+            return []
         source_code = info['source_code']
         offset = info['position']
 
@@ -96,8 +259,7 @@ class RopePlugin(IntrospectionPlugin):
             # Python 3 with a user account containing unicode characters
             pass
         try:
-            resource = rope.base.libutils.path_to_resource(self.project,
-                                                           filename)
+            resource = rope.base.libutils.path_to_resource(project, filename)
         except Exception as _error:
             if DEBUG_EDITOR:
                 log_last_error(LOG_FILENAME, "path_to_resource: %r" % filename)
@@ -105,7 +267,7 @@ class RopePlugin(IntrospectionPlugin):
         try:
             if DEBUG_EDITOR:
                 t0 = time.time()
-            proposals = rope.contrib.codeassist.code_assist(self.project,
+            proposals = rope.contrib.codeassist.code_assist(project,
                                     source_code, offset, resource, maxfixes=3)
             proposals = rope.contrib.codeassist.sorted_proposals(proposals)
             if DEBUG_EDITOR:
@@ -118,9 +280,10 @@ class RopePlugin(IntrospectionPlugin):
 
     def get_info(self, info):
         """Get a formatted calltip and docstring from Rope"""
-        if self.project is None:
-            return
         filename = info['filename']
+        project = self.get_rope_project(filename)
+        if project is None:
+            return
         source_code = info['source_code']
         offset = info['position']
 
@@ -131,8 +294,7 @@ class RopePlugin(IntrospectionPlugin):
             # Python 3 with a user account containing unicode characters
             pass
         try:
-            resource = rope.base.libutils.path_to_resource(self.project,
-                                                           filename)
+            resource = rope.base.libutils.path_to_resource(project, filename)
         except Exception as _error:
             if DEBUG_EDITOR:
                 log_last_error(LOG_FILENAME, "path_to_resource: %r" % filename)
@@ -141,7 +303,7 @@ class RopePlugin(IntrospectionPlugin):
             if DEBUG_EDITOR:
                 t0 = time.time()
             cts = rope.contrib.codeassist.get_calltip(
-                            self.project, source_code, offset, resource,
+                            project, source_code, offset, resource,
                             ignore_unknown=False, remove_self=True, maxfixes=3)
             if DEBUG_EDITOR:
                 log_dt(LOG_FILENAME, "get_calltip", t0)
@@ -151,7 +313,7 @@ class RopePlugin(IntrospectionPlugin):
                 if '(.)' in cts:
                     cts = cts.replace('(.)', '(...)')
             try:
-                doc_text = rope.contrib.codeassist.get_doc(self.project,
+                doc_text = rope.contrib.codeassist.get_doc(project,
                                      source_code, offset, resource, maxfixes=3)
                 if DEBUG_EDITOR:
                     log_dt(LOG_FILENAME, "get_doc", t0)
@@ -208,10 +370,11 @@ class RopePlugin(IntrospectionPlugin):
 
     def get_definition(self, info):
         """Find a definition location using Rope"""
-        if self.project is None:
+        filename = info['filename']
+        project = self.get_rope_project(filename)
+        if project is None:
             return
 
-        filename = info['filename']
         source_code = info['source_code']
         offset = info['position']
 
@@ -222,8 +385,7 @@ class RopePlugin(IntrospectionPlugin):
             # Python 3 with a user account containing unicode characters
             pass
         try:
-            resource = rope.base.libutils.path_to_resource(self.project,
-                                                           filename)
+            resource = rope.base.libutils.path_to_resource(project, filename)
         except Exception as _error:
             if DEBUG_EDITOR:
                 log_last_error(LOG_FILENAME, "path_to_resource: %r" % filename)
@@ -232,7 +394,7 @@ class RopePlugin(IntrospectionPlugin):
             if DEBUG_EDITOR:
                 t0 = time.time()
             resource, lineno = rope.contrib.codeassist.get_definition_location(
-                    self.project, source_code, offset, resource, maxfixes=3)
+                    project, source_code, offset, resource, maxfixes=3)
             if DEBUG_EDITOR:
                 log_dt(LOG_FILENAME, "get_definition_location", t0)
             if resource is not None:
@@ -250,37 +412,79 @@ class RopePlugin(IntrospectionPlugin):
                 self.project.validate(self.project.root)
             except RuntimeError:
                 pass
+        for project in self.projects.values():
+            project.validate()
+
+    def set_project_paths(self, project_paths):
+        """Open rope projects of Spyder projects *project_paths* (and close
+        rope projects of closed Spyder projects)"""
+        project_paths = [osp.normpath(root_path) for root_path in project_paths]
+        for root_path in list(self.projects.keys()):
+            if root_path not in project_paths:
+                self.projects.pop(root_path).close()
+        for root_path in project_paths:
+            if root_path not in self.projects and osp.isdir(root_path):
+                cache_path, ropefolder = get_rope_folder(root_path)
+                project = self.create_rope_project(root_path, ropefolder,
+                                                   save_objectdb=True)
+                if project is not None:
+                    project.prefs.set('extension_modules',
+                                      self.extension_modules)
+                    self.projects[root_path] = PersistentRopeProject(
+                                            root_path, project, cache_path)
+
+    def idle(self):
+        """Warm up rope projects of Spyder projects, one module at a time"""
+        for project in self.projects.values():
+            if project.analyze_next():
+                return True
+        return False
 
     # ---- Private API -------------------------------------------------------
 
-    def create_rope_project(self, root_path):
-        """Create a Rope project on a desired path"""
+    def get_rope_project(self, filename):
+        """Return rope project of *filename*: the project of the innermost
+        Spyder project containing it, or the default project"""
+        filename = osp.normpath(filename)
+        root_paths = [root_path for root_path in self.projects
+                      if filename.startswith(osp.join(root_path, ''))]
+        if root_paths:
+            return self.projects[max(root_paths, key=len)].project
+        return self.project
+
+    def create_rope_project(self, root_path, ropefolder='.ropeproject',
+                            **prefs):
+        """Create a Rope project on a desired path and return it
+
+        *prefs* override the default preferences (`ROPE_PREFS`)"""
         if PY2:
             root_path = encoding.to_fs_from_unicode(root_path)
         else:
             #TODO: test if this is working without any further change in
             # Python 3 with a user account containing unicode characters
             pass
+        project_prefs = ROPE_PREFS.copy()
+        project_prefs.update(prefs)
         try:
             import rope.base.project
-            self.project = rope.base.project.Project(root_path, **ROPE_PREFS)
+            return rope.base.project.Project(root_path, ropefolder=ropefolder,
+                                             **project_prefs)
         except ImportError:
             print >>STDERR, 'project error'
-            self.project = None
             if DEBUG_EDITOR:
                 log_last_error(LOG_FILENAME,
                                "create_rope_project: %r" % root_path)
         except TypeError:
-            self.project = None
             if DEBUG_EDITOR:
                 log_last_error(LOG_FILENAME,
                                "create_rope_project: %r" % root_path)
-        self.validate()
 
     def close_rope_project(self):
         """Close the Rope project"""
         if self.project is not None:
             self.project.close()
+        for project in self.projects.values():
+            project.close()
 
 
 if __name__ == '__main__':
@@ -166,6 +166,7 @@ class CodeInfo(object):
         return state
 
 
+@memoize
 def find_lexer_for_filename(filename):
     """Get a Pygments Lexer given a filename.
     """
@@ -181,6 +182,7 @@ def find_lexer_for_filename(filename):
     return lexer
 
 
+@memoize
 def get_keywords(lexer):
     """Get the keywords for a given lexer.
     """
@@ -6,11 +6,16 @@
 
 """Miscellaneous utilities"""
 
+import collections
 import functools
+import itertools
+import multiprocessing
 import os
 import os.path as osp
 import sys
 import stat
+import threading
+import time
 
 
 def __remove_pyc_pyo(fname):
@@ -82,40 +87,181 @@ def select_port(default_port=20128):
     return default_port
 
 
-def count_lines(path, extensions=None, excluded_dirnames=None):
-    """Return number of source code lines for all filenames in subdirectories
-    of *path* with names ending with *extensions*
-    Directory names *excluded_dirnames* will be ignored"""
+# Default extensions and excluded directory names of line counting
+COUNT_LINES_EXTENSIONS = ['.py', '.pyw', '.ipy', '.enaml', '.c', '.h', '.cpp',
+                          '.hpp', '.inc', '.', '.hh', '.hxx', '.cc', '.cxx',
+                          '.cl', '.f', '.for', '.f77', '.f90', '.f95', '.f2k']
+COUNT_LINES_EXCLUDED_DIRNAMES = ['build', 'dist', '.hg', '.svn']
+
+# Size of the chunks read to count lines (bytes)
+COUNT_LINES_CHUNK_SIZE = 64*1024
+
+# Number of files counted by each task of the worker pool
+COUNT_LINES_FILES_PER_TASK = 200
+
+# Characters of blank lines (besides line feeds), like bytes.strip
+_BLANK_CHARS = b' \t\r\x0b\x0c'
+
+
+def count_file_lines(filename, chunk_size=COUNT_LINES_CHUNK_SIZE):
+    """Return number of lines and of code (non-blank) lines of *filename*
+    Lines are counted from the first to the last non-blank line (leading and
+    trailing blank lines are ignored). The file is read in binary chunks of
+    *chunk_size* bytes: it is never loaded in memory at once"""
+    line = 0                # index of the current line
+    first = last = None     # indexes of the first and last non-blank lines
+    code_lines = 0
+    current_nonblank = False
+    with open(filename, 'rb') as textfile:
+        while True:
+            chunk = textfile.read(chunk_size)
+            if not chunk:
+                break
+            # Once whitespace is removed, blank lines are empty: lines are
+            # counted with bytes methods only. The first piece of the chunk
+            # continues the current line, the last one starts a line which
+            # is not terminated yet
+            text = chunk.translate(None, _BLANK_CHARS)
+            last_index = text.count(b'\n')
+            body = text.lstrip(b'\n')
+            if body:
+                pieces = text.split(b'\n')
+                nonblank = len(pieces)-pieces.count(b'')
+                leading = len(text)-len(body)
+                trailing = len(body)-len(body.rstrip(b'\n'))
+                if current_nonblank and not leading:
+                    # Current line has already been counted
+                    nonblank -= 1
+                code_lines += nonblank
+                if first is None:
+                    first = line+leading
+                last = line+last_index-trailing
+                current_nonblank = not trailing
+            elif last_index:
+                current_nonblank = False
+            line += last_index
+            if len(chunk) < chunk_size:
+                # Buffered reads are only short at the end of the file
+                break
+    if first is None:
+        return 0, 0
+    return last-first+1, code_lines
+
+
+def _count_files_lines(args):
+    """Return totals of *files* by extension:
+    {extension: [files, lines, code lines]} (worker pool task)"""
+    files, chunk_size = args
+    totals = {}
+    for filename, extension in files:
+        try:
+            lines, code_lines = count_file_lines(filename, chunk_size)
+        except (IOError, OSError):
+            continue
+        total = totals.get(extension)
+        if total is None:
+            total = totals[extension] = [0, 0, 0]
+        total[0] += 1
+        total[1] += lines
+        total[2] += code_lines
+    return totals
+
+
+def _iter_file_groups(path, extensions, excluded_dirnames, size):
+    """Yield groups of *size* files (filename, extension) with names ending
+    with *extensions* in subdirectories of *path* (directory names
+    *excluded_dirnames* are skipped before descending into them)"""
+    group = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = [dirname for dirname in dirnames
+                       if dirname not in excluded_dirnames]
+        for fname in filenames:
+            extension = osp.splitext(fname)[1]
+            if extension in extensions:
+                group.append((osp.join(dirpath, fname), extension))
+                if len(group) == size:
+                    yield group
+                    group = []
+    if group:
+        yield group
+
+
+def count_lines_by_extension(path, extensions=None, excluded_dirnames=None,
+                             processes=None, callback=None,
+                             chunk_size=COUNT_LINES_CHUNK_SIZE):
+    """Return number of files, lines and code lines by extension:
+    {extension: (files, lines, code lines)} for all filenames in
+    subdirectories of *path* with names ending with *extensions*
+    Directory names *excluded_dirnames* will be ignored
+    
+    Files are counted by a pool of *processes* worker processes (default:
+    number of CPUs, counting is done in this process if *processes* is 1 or
+    if the pool can't be created) while the tree is walked.
+    The pool must not be used from Spyder's GUI process: with the 'spawn'
+    start method (Windows, macOS), each worker would run Spyder's startup
+    script again.
+    *callback* is called with partial totals each time a group of files has
+    been counted: callback({extension: (files, lines, code lines)}), and
+    counting stops if it returns True (partial totals are returned)"""
     if extensions is None:
-        extensions = ['.py', '.pyw', '.ipy', '.enaml', '.c', '.h', '.cpp',
-                      '.hpp', '.inc', '.', '.hh', '.hxx', '.cc', '.cxx',
-                      '.cl', '.f', '.for', '.f77', '.f90', '.f95', '.f2k']
+        extensions = COUNT_LINES_EXTENSIONS
     if excluded_dirnames is None:
-        excluded_dirnames = ['build', 'dist', '.hg', '.svn']
-    def get_filelines(path):
-        dfiles, dlines = 0, 0
-        if osp.splitext(path)[1] in extensions:
-            dfiles = 1
-            with open(path, 'rb') as textfile:
-                dlines = len(textfile.read().strip().splitlines())
-        return dfiles, dlines
-    lines = 0
-    files = 0
+        excluded_dirnames = COUNT_LINES_EXCLUDED_DIRNAMES
+    extensions = set(extensions)
+    excluded_dirnames = set(excluded_dirnames)
     if osp.isdir(path):
-        for dirpath, dirnames, filenames in os.walk(path):
-            for d in dirnames[:]:
-                if d in excluded_dirnames:
-                    dirnames.remove(d)
-            if excluded_dirnames is None or \
-               osp.dirname(dirpath) not in excluded_dirnames:
-                for fname in filenames:
-                    dfiles, dlines = get_filelines(osp.join(dirpath, fname))
-                    files += dfiles
-                    lines += dlines
+        groups = _iter_file_groups(path, extensions, excluded_dirnames,
+                                   COUNT_LINES_FILES_PER_TASK)
+    elif osp.splitext(path)[1] in extensions:
+        groups = iter([[(path, osp.splitext(path)[1])]])
     else:
-        dfiles, dlines = get_filelines(path)
-        files += dfiles
-        lines += dlines
+        groups = iter([])
+    # The tree is walked while files are counted: groups are only consumed
+    # as tasks are dispatched to the pool
+    first_groups = [group for group in (next(groups, None),
+                                        next(groups, None))
+                    if group is not None]
+    tasks = ((files, chunk_size) for files
+             in itertools.chain(first_groups, groups))
+    pool = None
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes > 1 and len(first_groups) > 1:
+        try:
+            pool = multiprocessing.Pool(processes)
+        except (ImportError, OSError):
+            # e.g. no working semaphore implementation on this platform
+            pool = None
+    if pool is None:
+        results = (_count_files_lines(task) for task in tasks)
+    else:
+        results = pool.imap_unordered(_count_files_lines, tasks)
+    totals = {}
+    try:
+        for task_totals in results:
+            for extension, (files, lines, code_lines) in task_totals.items():
+                total = totals.get(extension, (0, 0, 0))
+                totals[extension] = (total[0]+files, total[1]+lines,
+                                     total[2]+code_lines)
+            if callback is not None and callback(dict(totals)):
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return totals
+
+
+def count_lines(path, extensions=None, excluded_dirnames=None,
+                processes=None):
+    """Return number of source code lines for all filenames in subdirectories
+    of *path* with names ending with *extensions*
+    Directory names *excluded_dirnames* will be ignored
+    (see count_lines_by_extension)"""
+    totals = count_lines_by_extension(path, extensions, excluded_dirnames,
+                                      processes)
+    files = sum([total[0] for total in totals.values()])
+    lines = sum([total[1] for total in totals.values()])
     return files, lines
 
 
@@ -229,26 +375,101 @@ def get_common_path(pathlist):
                 return osp.abspath(common)
 
 
-def memoize(obj):
+CacheInfo = collections.namedtuple('CacheInfo',
+                                   ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def make_hashable(obj):
+    """Return a hashable equivalent of *obj* (lists, dicts and sets are
+    converted recursively)
+    Raise TypeError if *obj* can't be made hashable"""
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), tuple([make_hashable(item) for item in obj]))
+    elif isinstance(obj, dict):
+        return (dict, frozenset([(make_hashable(key), make_hashable(value))
+                                 for key, value in obj.items()]))
+    elif isinstance(obj, (set, frozenset)):
+        return (type(obj), frozenset([make_hashable(item) for item in obj]))
+    hash(obj)
+    return obj
+
+
+def memoize(obj=None, maxsize=100, ttl=None):
     """
     Memoize objects to trade memory for execution speed
 
     Use a limited size cache to store the value, which takes into account
-    The calling args and kwargs
+    the calling args and kwargs: only the *maxsize* most recently used
+    values are kept (no limit if *maxsize* is None), for at most *ttl*
+    seconds (no limit if *ttl* is None). Calls with arguments which can't
+    be made hashable are not cached.
+
+    May be used as `@memoize` or `@memoize(maxsize=..., ttl=...)`.
+    The decorated function has the following methods:
+    cache_info() -> CacheInfo(hits, misses, maxsize, currsize)
+    cache_clear() -> drop all values
+    cache_invalidate(*args, **kwargs) -> drop value of these arguments
 
     See https://wiki.python.org/moin/PythonDecoratorLibrary#Memoize
     """
-    cache = obj.cache = {}
+    if obj is None:
+        return functools.partial(memoize, maxsize=maxsize, ttl=ttl)
+
+    cache = obj.cache = collections.OrderedDict()
+    stats = {'hits': 0, 'misses': 0}
+    lock = threading.RLock()
+
+    def make_key(args, kwargs):
+        try:
+            return (make_hashable(args),
+                    make_hashable(kwargs) if kwargs else None)
+        except TypeError:
+            return None
 
     @functools.wraps(obj)
     def memoizer(*args, **kwargs):
-        key = str(args) + str(kwargs)
-        if key not in cache:
-            cache[key] = obj(*args, **kwargs)
-        # only keep the most recent 100 entries
-        if len(cache) > 100:
-            cache.popitem(last=False)
-        return cache[key]
+        key = make_key(args, kwargs)
+        if key is None:
+            with lock:
+                stats['misses'] += 1
+            return obj(*args, **kwargs)
+        with lock:
+            if key in cache:
+                value, timestamp = cache.pop(key)
+                if ttl is None or time.time()-timestamp < ttl:
+                    # Move value to the end: it is the most recently used
+                    cache[key] = (value, timestamp)
+                    stats['hits'] += 1
+                    return value
+            stats['misses'] += 1
+        # The lock is not held while calling obj, which may be slow or
+        # call the memoized function itself
+        value = obj(*args, **kwargs)
+        with lock:
+            cache[key] = (value, time.time())
+            while maxsize is not None and len(cache) > maxsize:
+                cache.popitem(last=False)
+        return value
+
+    def cache_info():
+        with lock:
+            return CacheInfo(stats['hits'], stats['misses'], maxsize,
+                             len(cache))
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            stats['hits'] = stats['misses'] = 0
+
+    def cache_invalidate(*args, **kwargs):
+        with lock:
+            cache.pop(make_key(args, kwargs), None)
+
+    memoizer.cache_info = cache_info
+    memoizer.cache_clear = cache_clear
+    memoizer.cache_invalidate = cache_invalidate
+    # Not set by functools.wraps on Python 2
+    memoizer.__wrapped__ = obj
     return memoizer
 
 if __name__ == '__main__':
@@ -266,3 +487,14 @@ if __name__ == '__main__':
                                 '/Python/spyder/spyderlib/widgets',
                                 '/Python/spyder-v21/spyderlib/utils',
                                 ]) == '/Python'
+    calls = []
+    @memoize(maxsize=2)
+    def twice(x):
+        calls.append(x)
+        return x*2
+    assert [twice(2), twice(3), twice(2), twice([4])] == [4, 6, 4, [4, 4]]
+    assert twice(5) == 10 and twice([4]) == [4, 4]
+    assert calls == [2, 3, [4], 5]
+    assert twice.cache_info() == CacheInfo(2, 4, 2, 2)
+    twice.cache_invalidate(5)
+    assert twice(5) == 10 and calls[-1] == 5
@@ -8,6 +8,7 @@
 
 from __future__ import print_function
 
+import ast
 from distutils.version import LooseVersion
 import imp
 import inspect
@@ -20,7 +21,8 @@ import tempfile
 
 # Local imports
 from spyderlib.utils import encoding
-from spyderlib.py3compat import PY2, is_text_string
+from spyderlib.utils.misc import memoize
+from spyderlib.py3compat import PY2, is_text_string, to_text_string
 
 
 class ProgramError(Exception):
@@ -33,6 +35,10 @@ else:
     username = encoding.to_unicode_from_fs(os.environ.get('USER'))
     TEMPDIR = tempfile.gettempdir() + osp.sep + 'spyder-' + username
 
+# Lifetime (in seconds) of cached program lookups: programs may be installed
+# while Spyder is running
+LOOKUP_CACHE_TTL = 60
+
 
 def is_program_installed(basename):
     """
@@ -46,6 +52,7 @@ def is_program_installed(basename):
             return abspath
 
 
+@memoize(ttl=LOOKUP_CACHE_TTL)
 def find_program(basename):
     """
     Find program in PATH and return absolute path
@@ -368,10 +375,170 @@ def check_version(actver, version, cmp_op):
         return True
 
 
+def get_module_info(module_name):
+    """
+    Return (installed, version) tuple of module *module_name*
+
+    When possible, the version is read from the metadata (.dist-info or
+    .egg-info) of the distribution providing the module, so that the module
+    is not imported. Otherwise, the module is imported and its version is
+    read from its __version__ or VERSION attribute (version is None if the
+    module has none of these attributes).
+
+    Note: this function is also run by other interpreters (see
+    `get_module_versions`), so it has to be self-contained
+    """
+    import os
+    import sys
+    module = sys.modules.get(module_name)
+    if module is None and '.' not in module_name:
+        location = None
+        try:
+            try:
+                from importlib.util import find_spec
+            except ImportError:
+                # Python 2
+                import imp
+                fd, location, _description = imp.find_module(module_name)
+                if fd is not None:
+                    fd.close()
+            else:
+                spec = find_spec(module_name)
+                if spec is None:
+                    return (False, None)
+                if spec.submodule_search_locations:
+                    location = list(spec.submodule_search_locations)[0]
+                else:
+                    location = spec.origin
+        except ImportError:
+            return (False, None)
+        if location and os.path.exists(location):
+            site_dir = os.path.dirname(location)
+            try:
+                entries = [entry for entry in os.listdir(site_dir)
+                           if entry.endswith(('.dist-info', '.egg-info'))]
+            except OSError:
+                entries = []
+            normalized_name = module_name.lower().replace('-', '_')
+            distributions = []
+            for entry in entries:
+                parts = entry.rsplit('.', 1)[0].split('-')
+                if len(parts) > 1:
+                    distributions.append((parts[0].lower().replace('-', '_'),
+                                          parts[1], entry))
+            versions = set([version for name, version, _entry in distributions
+                            if name == normalized_name])
+            if not versions:
+                # Distribution and module names may differ (e.g. pyzmq/zmq)
+                for _name, version, entry in distributions:
+                    top_level = os.path.join(site_dir, entry, 'top_level.txt')
+                    try:
+                        with open(top_level) as fd:
+                            if module_name in fd.read().split():
+                                versions.add(version)
+                    except (IOError, OSError):
+                        pass
+            if len(versions) == 1:
+                return (True, versions.pop())
+    if module is None:
+        try:
+            module = __import__(module_name)
+        except ImportError:
+            return (False, None)
+    return (True, getattr(module, '__version__',
+                          getattr(module, 'VERSION', None)))
+
+
+# Modules information cache: interpreter -> dictionary with
+# 'paths': module search paths of the interpreter
+# 'signature': modification times of these paths (a module which is installed
+#              or removed changes the modification time of its parent path)
+# 'modules': {module_name: (installed, version)}
+_MODULES_INFO = {}
+
+
+def _get_paths_signature(paths):
+    """Return modification times of *paths*"""
+    signature = []
+    for path in paths:
+        try:
+            signature.append(os.stat(path).st_mtime)
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def _probe_interpreter(interpreter, module_names):
+    """Return (module search paths, {module_name: (installed, version)}) of
+    interpreter *interpreter* (None if it can't be probed)
+    All modules are probed in a single process"""
+    script = '\n'.join([
+        "import sys",
+        inspect.getsource(get_module_info),
+        "def get_info(name):",
+        "    try:",
+        "        return get_module_info(name)",
+        "    except Exception:",
+        "        return (False, None)",
+        "print(repr((sys.path, dict([(name, get_info(name))",
+        "                            for name in %r]))))" % module_names,
+        ])
+    try:
+        proc = run_program(interpreter, ['-c', script])
+        output, _err = proc.communicate()
+        paths, modules = ast.literal_eval(output.decode().strip())
+    except Exception:
+        return None
+    return [to_text_string(path) for path in paths if path], modules
+
+
+def get_module_versions(module_names, interpreter=None):
+    """
+    Return a dictionary mapping the modules of *module_names* to
+    (installed, version) tuples (see `get_module_info`)
+
+    interpreter: path of the interpreter in which modules are looked up
+    (default: current interpreter). All the modules which were already
+    looked up in this interpreter are probed again in the same subprocess.
+    installed is None if the interpreter can't be probed.
+
+    Results are cached until modules are installed or removed (i.e. until
+    the modification time of a module search path changes).
+    """
+    info = _MODULES_INFO.get(interpreter)
+    if info is not None and interpreter is None and info['paths'] != sys.path:
+        info = None
+    if info is not None and \
+      _get_paths_signature(info['paths']) != info['signature']:
+        info = None
+    modules = info['modules'] if info is not None else {}
+    missing = [name for name in module_names if name not in modules]
+    if missing:
+        if interpreter is None:
+            paths = list(sys.path)
+            modules.update([(name, get_module_info(name))
+                            for name in missing])
+        else:
+            names = sorted(set(missing) | set(modules.keys()))
+            result = _probe_interpreter(interpreter, names)
+            if result is None:
+                return dict([(name, modules.get(name, (None, None)))
+                             for name in module_names])
+            paths, modules = result
+        if info is None:
+            info = _MODULES_INFO[interpreter] = {'paths': paths,
+                                    'signature': _get_paths_signature(paths)}
+        info['modules'] = modules
+    return dict([(name, modules[name]) for name in module_names])
+
+
 def get_module_version(module_name):
-    """Return module version or None if version can't be retrieved."""
-    mod = __import__(module_name)
-    return getattr(mod, '__version__', getattr(mod, 'VERSION', None))
+    """Return module version or None if version can't be retrieved.
+    Raise ImportError if module is not installed"""
+    installed, version = get_module_versions([module_name])[module_name]
+    if not installed:
+        raise ImportError("No module named %s" % module_name)
+    return version
 
 
 def is_module_installed(module_name, version=None, installed_version=None,
@@ -389,71 +556,48 @@ def is_module_installed(module_name, version=None, installed_version=None,
     in a determined interpreter
     """
     if interpreter:
-        if not osp.isdir(TEMPDIR):
-            os.mkdir(TEMPDIR)
-        
         if osp.isfile(interpreter) and ('python' in interpreter):
-            checkver = inspect.getsource(check_version)
-            get_modver = inspect.getsource(get_module_version)
-            stable_ver = inspect.getsource(is_stable_version)
-            ismod_inst = inspect.getsource(is_module_installed)
-            fd, script = tempfile.mkstemp(suffix='.py', dir=TEMPDIR)
-            with os.fdopen(fd, 'w') as f:
-                f.write("# -*- coding: utf-8 -*-" + "\n\n")
-                f.write("from distutils.version import LooseVersion" + "\n")
-                f.write("import re" + "\n\n")
-                f.write(stable_ver + "\n")
-                f.write(checkver + "\n")
-                f.write(get_modver + "\n")
-                f.write(ismod_inst + "\n")
-                if version:
-                    f.write("print(is_module_installed('%s','%s'))"\
-                            % (module_name, version))
-                else:
-                    f.write("print(is_module_installed('%s'))" % module_name)
-            try:
-                proc = run_program(interpreter, [script])
-                output, _err = proc.communicate()
-            except subprocess.CalledProcessError:
+            versions = get_module_versions([module_name], interpreter)
+            installed, actver = versions[module_name]
+            if installed is None:
+                # The interpreter can't be probed
                 return True
-            if output:  # TODO: Check why output could be empty!
-                return eval(output.decode())
-            else:
+            elif not installed:
                 return False
         else:
             # Try to not take a wrong decision if there is no interpreter
             # available (needed for the change_pystartup method of ExtConsole
             # config page)
             return True
-    else:
-        if installed_version is None:
-            try:
-                actver = get_module_version(module_name)
-            except ImportError:
-                # Module is not installed
-                return False
-        else:
-            actver = installed_version
-        if actver is None and version is not None:
+    elif installed_version is None:
+        try:
+            actver = get_module_version(module_name)
+        except ImportError:
+            # Module is not installed
             return False
-        elif version is None:
-            return True
-        else:
-            if ';' in version:
-                output = True
-                for ver in version.split(';'):
-                    output = output and is_module_installed(module_name, ver)
-                return output
-            match = re.search('[0-9]', version)
-            assert match is not None, "Invalid version number"
-            symb = version[:match.start()]
-            if not symb:
-                symb = '='
-            assert symb in ('>=', '>', '=', '<', '<='),\
-                    "Invalid version condition '%s'" % symb
-            version = version[match.start():]
-            
-            return check_version(actver, version, symb)
+    else:
+        actver = installed_version
+    if actver is None and version is not None:
+        return False
+    elif version is None:
+        return True
+    else:
+        if ';' in version:
+            output = True
+            for ver in version.split(';'):
+                output = output and is_module_installed(module_name, ver,
+                                                        actver)
+            return output
+        match = re.search('[0-9]', version)
+        assert match is not None, "Invalid version number"
+        symb = version[:match.start()]
+        if not symb:
+            symb = '='
+        assert symb in ('>=', '>', '=', '<', '<='),\
+                "Invalid version condition '%s'" % symb
+        version = version[match.start():]
+        
+        return check_version(actver, version, symb)
 
 
 def test_programs():
@@ -467,6 +611,10 @@ def test_programs():
     assert is_module_installed('qtconsole', '>=4.0')
     assert not is_module_installed('IPython', '>=1.0;<3.0')
     assert is_module_installed('jedi', '>=0.7.0')
+    assert is_module_installed('jedi', '>=0.7.0', interpreter=sys.executable)
+    assert get_module_versions(['zmq', 'nonexistent_module']) == \
+           {'zmq': (True, get_module_info('zmq')[1]),
+            'nonexistent_module': (False, None)}
 
 
 if __name__ == '__main__':
@@ -399,7 +399,8 @@ def get_filetype_icon(fname):
     ext = osp.splitext(fname)[1]
     if ext.startswith('.'):
         ext = ext[1:]
-    return get_icon( "%s.png" % ext, ima.icon('FileIcon') )
+    return ima.get_cached_icon((ima.get_theme(), 'FileIcon', ext),
+                    lambda: get_icon("%s.png" % ext, ima.icon('FileIcon')))
 
 
 class ShowStdIcons(QWidget):
@@ -121,11 +121,96 @@ def get_identifiers(source_code):
     return [token for token in tokens if re.match(valid, token)]
 
 
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class IdentifierIndex(object):
+    """
+    Incrementally maintained index of word positions in a document
+
+    The index is stored line by line (each line maps words to the list of
+    their columns), so that it can be spliced when lines are inserted or
+    removed without having to shift any stored line number. A global counter
+    allows to discard words which are not in the document without scanning
+    anything.
+    """
+    def __init__(self, text=''):
+        self.lines = []
+        self.counts = {}
+        self.reset(text)
+
+    def reset(self, text):
+        """Index *text* from scratch"""
+        self.lines = []
+        self.counts = {}
+        self.update(0, 0, re.split(r'\r\n|\r|\n', text))
+
+    def _index_line(self, line):
+        words = {}
+        for match in WORD_PATTERN.finditer(line):
+            words.setdefault(match.group(), []).append(match.start())
+        return words
+
+    def update(self, first, removed, new_lines):
+        """
+        Replace *removed* lines starting at line *first* by *new_lines*
+
+        Line numbers are 0-based.
+        """
+        counts = self.counts
+        for words in self.lines[first:first+removed]:
+            for word, columns in words.items():
+                count = counts[word] - len(columns)
+                if count:
+                    counts[word] = count
+                else:
+                    del counts[word]
+        indexed = [self._index_line(line) for line in new_lines]
+        for words in indexed:
+            for word, columns in words.items():
+                counts[word] = counts.get(word, 0) + len(columns)
+        self.lines[first:first+removed] = indexed
+
+    def count(self, word):
+        """Return the number of occurrences of *word*"""
+        return self.counts.get(word, 0)
+
+    def find(self, word, start=0, stop=None):
+        """
+        Return the list of (line, columns) where *word* occurs, between lines
+        *start* and *stop* (0-based, *stop* excluded)
+        """
+        remaining = self.counts.get(word, 0)
+        results = []
+        if not remaining:
+            return results
+        line_number = start
+        for words in self.lines[start:stop]:
+            columns = words.get(word)
+            if columns is not None:
+                results.append((line_number, columns))
+                remaining -= len(columns)
+                if remaining <= 0:
+                    break
+            line_number += 1
+        return results
+
+    def find_lines(self, word):
+        """Return the list of line numbers (0-based) where *word* occurs"""
+        return [line_number for line_number, _columns in self.find(word)]
+
+
 if __name__ == '__main__':
     code = 'import functools\nfunctools.partial'
     assert get_primary_at(code, len(code)) == 'functools.partial'
     assert set(get_identifiers(code)) == set(['import', 'functools',
                                               'functools.partial'])
     assert split_source(code) == ['import functools', 'functools.partial']
+    index = IdentifierIndex('a = b\nb = a + a\n')
+    assert index.count('a') == 3
+    assert index.find('a') == [(0, [0]), (1, [4, 8])]
+    index.update(1, 1, ['c = a', 'b = c'])
+    assert index.count('a') == 2 and index.count('c') == 2
+    assert index.find_lines('b') == [0, 2]
     code = code.replace('\n', '\r\n')
     assert split_source(code) == ['import functools', 'functools.partial']
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Startup profiler
+
+Import and construction times of Spyder's plugins and startup milestones are
+always recorded (this costs a few calls to time.time), the report is only
+shown when Spyder is started with the --profile-startup option.
+"""
+
+from __future__ import print_function
+
+# Standard library imports
+from collections import OrderedDict
+from contextlib import contextmanager
+import time
+
+
+# Steps measured for each plugin
+IMPORT, CONSTRUCTION = 'import', 'construction'
+
+
+class StartupProfiler(object):
+    """Record duration of startup steps"""
+    def __init__(self):
+        self.start_time = time.time()
+        self.steps = OrderedDict()      # name: {step: duration}
+        self.milestones = []            # (name, time since start)
+
+    @contextmanager
+    def measure(self, name, step=CONSTRUCTION):
+        """Context manager recording the duration of *step* of *name*
+        (e.g. the import of a plugin module)"""
+        t0 = time.time()
+        try:
+            yield
+        finally:
+            durations = self.steps.setdefault(name, {})
+            durations[step] = durations.get(step, 0.) + time.time()-t0
+
+    def add_milestone(self, name):
+        """Record time elapsed since start when reaching milestone *name*"""
+        self.milestones.append((name, time.time()-self.start_time))
+
+    def get_report(self):
+        """Return profiling report (text)"""
+        lines = ["Spyder startup profile",
+                 "======================",
+                 "",
+                 "%-30s %12s %14s" % ("Step", "import (ms)",
+                                      "construction (ms)")]
+        total_import = total_construction = 0.
+        for name, durations in self.steps.items():
+            import_time = durations.get(IMPORT, 0.)*1000
+            construction_time = durations.get(CONSTRUCTION, 0.)*1000
+            total_import += import_time
+            total_construction += construction_time
+            lines.append("%-30s %12.1f %14.1f" % (name, import_time,
+                                                  construction_time))
+        lines.append("%-30s %12.1f %14.1f" % ("Total", total_import,
+                                              total_construction))
+        lines += ["", "%-30s %12s" % ("Milestone", "time (ms)")]
+        for name, elapsed in self.milestones:
+            lines.append("%-30s %12.1f" % (name, elapsed*1000))
+        return "\n".join(lines)
+
+    def save_report(self, filename):
+        """Save profiling report in file *filename*"""
+        with open(filename, 'w') as fdesc:
+            fdesc.write(self.get_report() + "\n")
+
+
+STARTUP_PROFILER = StartupProfiler()
+
+
+def test():
+    """Profile a few fake steps and print report"""
+    profiler = StartupProfiler()
+    with profiler.measure('Editor', IMPORT):
+        time.sleep(.01)
+    with profiler.measure('Editor'):
+        time.sleep(.02)
+    profiler.add_milestone('Main window shown')
+    report = profiler.get_report()
+    assert 'Editor' in report and 'Main window shown' in report
+    print(report)
+
+
+if __name__ == '__main__':
+    test()
@@ -8,12 +8,16 @@
 String search and match utilities usefull when filtering a list of texts.
 """
 
+import heapq
 import re
 
 
 NOT_FOUND_SCORE = -1
 NO_SCORE = 0
 
+# Python's re module can't handle more groups than this
+MAX_SUBSEQUENCE_LENGTH = 99
+
 
 def get_search_regex(query, ignore_case=True):
     """Returns a compiled regex pattern to search for query letters in order.
@@ -176,8 +180,322 @@ def get_search_score(query, choice, ignore_case=True, apply_regex=True,
     return original_choice, enriched_text, score
 
 
+def get_subsequence_regex(query):
+    """Returns a compiled regex pattern to find query letters in order.
+
+    Each letter is matched by a group, so that the positions of the letters
+    found by the leftmost (lazy) match are the ones found by the letter by
+    letter scan of `get_search_score`.
+    """
+    regex = '.*?'.join(['({0})'.format(re.escape(char)) for char in query])
+    return re.compile(regex, re.DOTALL)
+
+
+def get_match(query, choice, subsequence):
+    """Returns the score and the position of query letters in choice.
+
+    This gives the same score as `get_search_score` for a choice which has
+    already been found to match the search regex, but relies on string
+    methods and regular expressions instead of character lists.
+
+    Parameters
+    ----------
+    query : str
+        String with letters to search in choice (without spaces, lowercase if
+        the search is case insensitive).
+    choice : str
+        Sentence/words in which to search for the 'query' letters (lowercase
+        if the search is case insensitive).
+    subsequence : SRE_Pattern
+        Pattern returned by `get_subsequence_regex` for this query.
+
+    Returns
+    -------
+    result : tuple or None
+        Tuple of the score, the position of the query if found as a whole in
+        choice and the position of each query letter otherwise (None).
+        None if query letters were not found in choice.
+    """
+    length = len(query)
+    start = choice.find(query)
+    if u'-' in choice:
+        # Dashes of choice are counted as matched letters: see below
+        return get_dashed_match(query, choice, subsequence, start)
+
+    if start != -1:
+        if query == choice or (u' ' in choice and
+                               query in choice.split(u' ')):
+            score = start + 1
+        else:
+            score = start + 100
+        return score + get_groups_score(length, [length]), start, None
+
+    match = subsequence.search(choice)
+    if match is None:
+        return None
+    positions = [match.start(group) for group in range(1, length + 1)]
+
+    # Groups of consecutive letters
+    groups = []
+    previous = -2
+    for index in positions:
+        if index == previous + 1:
+            groups[-1] += 1
+        else:
+            groups.append(1)
+        previous = index
+
+    # Spaces and other letters between the first and the last letter
+    first, last = positions[0], positions[-1]
+    spaces = choice.count(u' ', first, last)
+    letters = last - first + 1 - spaces - length
+
+    score = (first + get_groups_score(length, groups) + spaces*10000 +
+             letters*100)
+    return score, start, positions
+
+
+_GROUPS_SCORES = {}
+
+def get_groups_score(length, groups):
+    """Returns the score of query letters found in groups of consecutive
+    letters (the fewer groups, the better)."""
+    key = (length, tuple(groups))
+    score = _GROUPS_SCORES.get(key)
+    if score is None:
+        score = 0
+        for i in range(1, length + 1):
+            score += (length - sum([group // i for group in groups]))*100000
+        if len(_GROUPS_SCORES) < 10000:
+            _GROUPS_SCORES[key] = score
+    return score
+
+
+def get_dashed_match(query, choice, subsequence, start):
+    """Same as `get_match`, for a choice containing dashes."""
+    length = len(query)
+    if start != -1:
+        if query in choice.split(u' '):
+            score = start + 1
+        else:
+            score = start + 100
+        positions = None
+        text = choice[:start] + u'-'*length + choice[start+length:]
+    else:
+        match = subsequence.search(choice)
+        if match is None:
+            return None
+        positions = [match.start(group) for group in range(1, length + 1)]
+        score = positions[0]
+        text = list(choice)
+        for index in positions:
+            text[index] = u'-'
+        text = u''.join(text)
+
+    # Query letters (and dashes of choice) are counted as separators: the
+    # fewer groups of consecutive separators, the better
+    for i in range(1, length + 1):
+        score += (length - text.count(u'-'*i))*100000
+
+    # Spaces and letters between the first and the last separator
+    inner_text = text[text.find(u'-'):text.rfind(u'-') + 1]
+    spaces = inner_text.count(u' ')
+    letters = len(inner_text) - spaces - inner_text.count(u'-')
+    score += spaces*10000 + letters*100
+
+    return score, start, positions
+
+
+def get_enriched_text(choice, length, start, positions, template):
+    """Returns choice with the letters found by `get_match` surrounded by
+    template."""
+    if positions is None:
+        end = start + length
+        return (choice[:start] + template.format(choice[start:end]) +
+                choice[end:])
+    text = list(choice)
+    for index in positions:
+        text[index] = template.format(text[index])
+    return u''.join(text)
+
+
+class SearchScorer(object):
+    """Fast search scorer for a (possibly very long) list of choices.
+
+    Scores are the ones of `get_search_score`, but choices are first filtered
+    with a single regex search on all choices, scores are computed with
+    `get_match` and enriched texts are only built for the returned results.
+
+    The choices which matched the last query are kept, so that only these are
+    scored again when the query grows (i.e. while the user is typing).
+    """
+
+    def __init__(self, choices, ignore_case=True):
+        self.choices = list(choices)
+        self.ignore_case = ignore_case
+        self._lower_choices = None
+        self._text = None
+        self._last_query = None
+        self._last_indexes = None
+
+    @property
+    def lower_choices(self):
+        if self._lower_choices is None:
+            if self.ignore_case:
+                self._lower_choices = [choice.lower()
+                                       for choice in self.choices]
+            else:
+                self._lower_choices = self.choices
+        return self._lower_choices
+
+    def get_text(self):
+        """Return all choices as a single text (one choice per line), or None
+        if choices can't be searched this way (choices containing line
+        breaks, or non ASCII characters for which the case insensitive search
+        regex may not be equivalent)"""
+        if self._text is None:
+            text = u'\n'.join(self.lower_choices)
+            try:
+                text.encode('ascii')
+            except UnicodeError:
+                text = False
+            else:
+                if text.count(u'\n') != max(len(self.choices) - 1, 0):
+                    text = False
+            self._text = text
+        if self._text is not False:
+            return self._text
+
+    def get_indexes(self, query):
+        """Return indexes of the choices matching the search regex."""
+        if self._last_query is not None and query.startswith(self._last_query):
+            # Letters of the new query include the ones of the last query
+            indexes = self._last_indexes
+            search = get_search_regex(query, self.ignore_case).search
+            choices = self.choices
+            indexes = [index for index in indexes if search(choices[index])]
+        else:
+            indexes = self.search_text(query)
+            if indexes is None:
+                search = get_search_regex(query, self.ignore_case).search
+                indexes = [index for index, choice in enumerate(self.choices)
+                           if search(choice)]
+        self._last_query = query
+        self._last_indexes = indexes
+        return indexes
+
+    def search_text(self, query):
+        """Return indexes of the choices matching the search regex, found by
+        a single search in the text of all choices (None if not possible)"""
+        if not re.match(r'^[A-Za-z0-9_]+$', query):
+            return
+        text = self.get_text()
+        if text is None:
+            return
+        if self.ignore_case:
+            query = query.lower()
+        # Same as the search regex, without backtracking (the end of the
+        # line is consumed, so that there is one match per choice at most)
+        regex = query[0] + u''.join([u'[^{0}\n]*{0}'.format(char)
+                                     for char in query[1:]]) + u'[^\n]*'
+        indexes = []
+        index, position = 0, 0
+        count = text.count
+        for match in re.finditer(regex, text):
+            start = match.start()
+            index += count(u'\n', position, start)
+            position = start
+            indexes.append(index)
+        return indexes
+
+    def get_scores(self, query, indexes=None):
+        """Return (score, index, match) for the choices matching query.
+
+        *indexes* are the indexes of the choices which have to be scored (by
+        default, all choices matching the search regex).
+        """
+        query = query.replace(' ', '')
+        if indexes is None:
+            indexes = self.get_indexes(query)
+        if self.ignore_case:
+            query = query.lower()
+        results = []
+        if len(query) > MAX_SUBSEQUENCE_LENGTH:
+            subsequence = None
+        else:
+            subsequence = get_subsequence_regex(query)
+        choices, lower_choices = self.choices, self.lower_choices
+        # Score of a query found as a whole in a single word (most common
+        # case, handled here without calling get_match)
+        length = len(query)
+        word_score = get_groups_score(length, [length]) + 100
+        for index in indexes:
+            choice = lower_choices[index]
+            if len(choice) != len(choices[index]):
+                match = None
+            else:
+                start = choice.find(query)
+                if start != -1 and u'-' not in choice \
+                  and u' ' not in choice and choice != query:
+                    score = start + word_score
+                    results.append((score, index, (score, start, None)))
+                    continue
+                elif subsequence is not None:
+                    match = get_match(query, choice, subsequence)
+                else:
+                    match = None
+            if match is None:
+                # Letters which change length when converted to lowercase or
+                # which are matched differently by the case insensitive regex
+                try:
+                    score = get_search_score(query, choices[index],
+                                             ignore_case=self.ignore_case,
+                                             apply_regex=False)[-1]
+                except ValueError:
+                    continue
+                match = (score, None, None)
+            results.append((match[0], index, match))
+        return results
+
+    def get_enriched_text(self, query, index, match, template):
+        """Return enriched text of a choice scored by `get_scores`."""
+        score, start, positions = match
+        if start is None:
+            # Score was computed by get_search_score
+            return get_search_score(query.replace(' ', ''),
+                                    self.choices[index],
+                                    ignore_case=self.ignore_case,
+                                    apply_regex=False, template=template)[1]
+        return get_enriched_text(self.choices[index],
+                                 len(query.replace(' ', '')), start,
+                                 positions, template)
+
+    def search(self, query, template='{}', limit=None, exclude=None):
+        """Search for query and return the best results.
+
+        Returns a list of (index, text, enriched text, score) tuples sorted by
+        score (lower scores mean better matches). At most *limit* results
+        are returned (all by default), the *limit* best ones being selected
+        with a bounded heap. Choices whose index is in *exclude* are skipped.
+        """
+        query = query.replace(' ', '')
+        if not query:
+            return []
+        indexes = self.get_indexes(query)
+        if exclude:
+            indexes = [index for index in indexes if index not in exclude]
+        scores = self.get_scores(query, indexes)
+        if limit is None:
+            scores.sort(key=lambda item: item[:2])
+        else:
+            scores = heapq.nsmallest(limit, scores, key=lambda item: item[:2])
+        return [(index, self.choices[index],
+                 self.get_enriched_text(query, index, match, template), score)
+                for score, index, match in scores]
+
+
 def get_search_scores(query, choices, ignore_case=True, template='{}',
-                      valid_only=False, sort=False):
+                      valid_only=False, sort=False, limit=None):
     """Search for query inside choices and return a list of tuples.
 
     Returns a list of tuples of text with the enriched text (if a template is
@@ -195,6 +513,13 @@ def get_search_scores(query, choices, ignore_case=True, template='{}',
         Optional template string to surround letters found in choices. This is
         useful when using a rich text editor ('{}' by default).
         Examples: '<b>{}</b>', '<code>{}</code>', '<i>{}</i>'
+    valid_only : bool, optional
+        Optional value to only return matching choices (False by default).
+    sort : bool, optional
+        Optional value to sort results by score (False by default).
+    limit : int, optional
+        Optional maximum number of results. If given, only the best matching
+        choices are returned, sorted by score (None by default).
 
     Returns
     -------
@@ -204,25 +529,30 @@ def get_search_scores(query, choices, ignore_case=True, template='{}',
     """
     # First remove spaces from query
     query = query.replace(' ', '')
-    pattern = get_search_regex(query, ignore_case)
-    results = []
-
-    for choice in choices:
-        r = re.search(pattern, choice)
-        if query and r:
-            result = get_search_score(query, choice, ignore_case=ignore_case,
-                                      apply_regex=False, template=template)
-        else:
-            if query:
-                result = (choice, choice, NOT_FOUND_SCORE)
-            else:
-                result = (choice, choice, NO_SCORE)
 
+    if not query:
+        if limit is not None:
+            choices = choices[:limit]
+        return [(choice, choice, NO_SCORE) for choice in choices]
+
+    scorer = SearchScorer(choices, ignore_case=ignore_case)
+    if limit is not None:
+        return [result[1:] for result in scorer.search(query, template,
+                                                       limit=limit)]
+
+    scores = scorer.get_scores(query)
+    if valid_only:
+        results = []
+    else:
+        results = [(choice, choice, NOT_FOUND_SCORE) for choice in choices]
+    for score, index, match in scores:
+        result = (scorer.choices[index],
+                  scorer.get_enriched_text(query, index, match, template),
+                  score)
         if valid_only:
-            if result[-1] != NOT_FOUND_SCORE:
-                results.append(result)
-        else:
             results.append(result)
+        else:
+            results[index] = result
 
     if sort:
         results = sorted(results, key=lambda row: row[-1])
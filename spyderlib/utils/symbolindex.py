@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Project symbol index
+
+Classes and functions defined in the Python files of a set of projects are
+extracted with the `ast` module (the extraction functions are run in
+separate processes, see ClientPool in introspection/plugin_client.py) and
+indexed with the modification time of their file, so that only modified
+files have to be parsed again.
+"""
+
+from __future__ import print_function
+
+import ast
+import hashlib
+import os
+import os.path as osp
+import pickle
+
+from spyderlib.py3compat import to_text_string
+
+
+PYTHON_EXTENSIONS = ('.py', '.pyw')
+
+# Increase when the format of the persisted index changes
+INDEX_VERSION = 1
+
+# Symbol tuple: (line number (0-based), name, nesting level, token)
+CLASS_TOKEN, FUNCTION_TOKEN = 'class', 'def'
+
+
+def get_source_symbols(source_code):
+    """Return classes and functions defined in *source_code*, as a list of
+    (line number (0-based), name, nesting level, token) tuples sorted by line
+    Return an empty list if *source_code* can't be parsed"""
+    try:
+        tree = ast.parse(source_code)
+    except (SyntaxError, TypeError, ValueError):
+        return []
+    symbols = []
+    nodes = [(node, 0) for node in ast.iter_child_nodes(tree)]
+    while nodes:
+        node, level = nodes.pop()
+        if isinstance(node, ast.ClassDef):
+            token = CLASS_TOKEN
+        elif isinstance(node, ast.FunctionDef) \
+          or type(node).__name__ == 'AsyncFunctionDef':
+            token = FUNCTION_TOKEN
+        else:
+            token = None
+        if token is not None:
+            symbols.append((node.lineno-1, to_text_string(node.name), level,
+                            token))
+            level += 1
+        nodes.extend([(child, level) for child in ast.iter_child_nodes(node)])
+    return sorted(symbols)
+
+
+def get_file_symbols(filename):
+    """Return classes and functions defined in file *filename*
+    (see `get_source_symbols`)"""
+    try:
+        with open(filename, 'rb') as fdesc:
+            source_code = fdesc.read()
+    except (IOError, OSError):
+        return []
+    return get_source_symbols(source_code)
+
+
+def get_files_symbols(filenames):
+    """Return a dictionary mapping each file of *filenames* to its
+    modification time and symbols (this is what the symbol server runs)"""
+    results = {}
+    for filename in filenames:
+        try:
+            mtime = osp.getmtime(filename)
+        except OSError:
+            continue
+        results[filename] = (mtime, get_file_symbols(filename))
+    return results
+
+
+def get_project_files(root_paths):
+    """Return a dictionary mapping Python files found in *root_paths*
+    (hidden directories excepted) to their modification time"""
+    files = {}
+    for root_path in root_paths:
+        for dirpath, dirnames, filenames in os.walk(root_path):
+            dirnames[:] = [dirname for dirname in dirnames
+                           if not dirname.startswith('.')]
+            for basename in filenames:
+                if osp.splitext(basename)[1] not in PYTHON_EXTENSIONS:
+                    continue
+                filename = osp.join(dirpath, basename)
+                try:
+                    files[filename] = osp.getmtime(filename)
+                except OSError:
+                    pass
+    return files
+
+
+def get_module_name(filename, root_paths):
+    """Return dotted module name of *filename* relative to the project root
+    path (among *root_paths*) which contains it"""
+    for root_path in root_paths:
+        root_path = osp.join(root_path, '')
+        if filename.startswith(root_path):
+            relpath = osp.splitext(filename[len(root_path):])[0]
+            names = relpath.split(os.sep)
+            if names[-1] == '__init__' and len(names) > 1:
+                names = names[:-1]
+            return '.'.join(names)
+    return osp.splitext(osp.basename(filename))[0]
+
+
+class SymbolIndex(object):
+    """Symbols of the Python files of a set of projects"""
+    def __init__(self, root_paths=()):
+        self.root_paths = list(root_paths)
+        self.files = {}             # filename: (mtime, symbols)
+        self.__filenames = None
+        self.__symbols = None
+
+    def get_stale_files(self, files):
+        """Update the list of indexed files with *files* (a dictionary
+        returned by `get_project_files`) and return the files which have to
+        be parsed (new or modified files)"""
+        for filename in list(self.files.keys()):
+            if filename not in files:
+                self.files.pop(filename)
+                self.__filenames = self.__symbols = None
+        return [filename for filename, mtime in files.items()
+                if self.files.get(filename, (None, ))[0] != mtime]
+
+    def update(self, results):
+        """Update index with *results* (returned by `get_files_symbols`)"""
+        self.files.update(results)
+        self.__filenames = self.__symbols = None
+
+    def get_filenames(self):
+        """Return sorted indexed file names
+        The list is cached until the index changes"""
+        if self.__filenames is None:
+            self.__filenames = sorted(self.files.keys())
+        return self.__filenames
+
+    def get_symbols(self):
+        """Return all indexed symbols, as a list of
+        (filename, line number (0-based), name, nesting level, token) tuples
+        The list is cached until the index changes"""
+        if self.__symbols is None:
+            self.__symbols = [(filename, ) + symbol
+                              for filename, (_mtime, symbols)
+                              in sorted(self.files.items())
+                              for symbol in symbols]
+        return self.__symbols
+
+    #------ Persistence
+    def get_key(self):
+        """Return the key identifying the set of indexed projects"""
+        text = u'\n'.join(sorted(self.root_paths))
+        return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    def load(self, dirname):
+        """Load index persisted in directory *dirname*, if any"""
+        filename = osp.join(dirname, self.get_key())
+        try:
+            with open(filename, 'rb') as fdesc:
+                version, files = pickle.load(fdesc)
+        except Exception:
+            return
+        if version == INDEX_VERSION:
+            self.files = files
+            self.__filenames = self.__symbols = None
+
+    def save(self, dirname):
+        """Persist index in directory *dirname*"""
+        filename = osp.join(dirname, self.get_key())
+        try:
+            if not osp.isdir(dirname):
+                os.makedirs(dirname)
+            with open(filename, 'wb') as fdesc:
+                pickle.dump((INDEX_VERSION, self.files), fdesc,
+                            pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError):
+            pass
+
+
+def test():
+    """Index this package and print index statistics"""
+    import time
+    root_path = osp.dirname(osp.dirname(osp.abspath(__file__)))
+    index = SymbolIndex([root_path])
+    t0 = time.time()
+    files = get_project_files(index.root_paths)
+    index.update(get_files_symbols(index.get_stale_files(files)))
+    symbols = index.get_symbols()
+    print("Indexed %d symbols in %d files in %.2f s"
+          % (len(symbols), len(files), time.time()-t0))
+    t0 = time.time()
+    assert not index.get_stale_files(get_project_files(index.root_paths))
+    print("Index checked in %.3f s" % (time.time()-t0))
+    source = "class A:\n    def f(self):\n        pass\ndef g():\n    pass\n"
+    assert get_source_symbols(source) == [(0, 'A', 0, 'class'),
+                                          (1, 'f', 1, 'def'),
+                                          (3, 'g', 0, 'def')]
+    assert get_source_symbols("def (") == []
+    assert get_module_name(osp.join(root_path, 'utils', '__init__.py'),
+                           [root_path]) == 'utils'
+
+
+if __name__ == '__main__':
+    test()
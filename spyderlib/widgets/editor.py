@@ -13,6 +13,7 @@
 
 # Local imports
 from __future__ import print_function
+import functools
 import os
 import os.path as osp
 import sys
@@ -35,7 +36,9 @@ from spyderlib.py3compat import qbytearray_to_str, to_text_string, u
 from spyderlib.utils import icon_manager as ima
 from spyderlib.utils import (codeanalysis, encoding, sourcecode,
                              syntaxhighlighters)
+from spyderlib.utils.filewatcher import get_file_watcher
 from spyderlib.utils.introspection.manager import IntrospectionManager
+from spyderlib.utils.introspection.plugin_client import ClientPool
 from spyderlib.utils.qthelpers import (add_actions, create_action,
                                        create_toolbutton, get_filetype_icon,
                                        mimedata2url)
@@ -71,6 +74,21 @@ class AnalysisThread(QThread):
                 traceback.print_exc(file=STDERR)
 
 
+ANALYSIS_POOL = None
+
+def get_analysis_pool():
+    """Return the code analysis server pool shared by all editors
+
+    Source code is sent to the least loaded server, which runs checkers from
+    the `codeanalysis` module in-process (no GIL contention with the GUI and
+    no new process spawned for each check)"""
+    global ANALYSIS_POOL
+    if ANALYSIS_POOL is None:
+        ANALYSIS_POOL = ClientPool('spyderlib.utils.codeanalysis')
+        ANALYSIS_POOL.start()
+    return ANALYSIS_POOL
+
+
 class ThreadManager(QObject):
     """Analysis thread manager"""
     def __init__(self, parent, max_simultaneous_threads=2):
@@ -84,6 +102,10 @@ class ThreadManager(QObject):
         """Close threads associated to parent_id"""
         if DEBUG_EDITOR:
             print("Call to 'close_threads'", file=STDOUT)
+        if ANALYSIS_POOL is not None:
+            parent_id = None if parent is None else id(parent)
+            ANALYSIS_POOL.cancel(lambda owner: owner[0] == id(self) and
+                                 parent_id in (None, owner[1]))
         if parent is None:
             # Closing all threads
             self.pending_threads = []
@@ -119,6 +141,34 @@ class ThreadManager(QObject):
             print("Added thread %r to queue" % thread, file=STDOUT)
         QTimer.singleShot(50, self.update_queue)
 
+    def add_analysis(self, checker, end_callback, source_code, parent):
+        """Add code analysis task
+        Results are taken from the code analysis cache if *source_code* has
+        already been checked, and computed by the code analysis server pool
+        otherwise (or by a thread if no server is available)"""
+        key = codeanalysis.get_cache_key(checker.__name__, source_code)
+        results = codeanalysis.get_cached_results(key)
+        if results is not None:
+            end_callback(results)
+            return
+        callback = functools.partial(self.analysis_finished, key,
+                                     end_callback)
+        pool = get_analysis_pool()
+        if pool.is_ready():
+            pool.request(checker.__name__, (source_code,), callback,
+                         owner=(id(self), id(parent)))
+        else:
+            self.add_thread(checker, callback, source_code, parent)
+
+    def analysis_finished(self, key, end_callback, results):
+        """Code analysis task has finished: cache results
+        *results* is None if the analysis has failed (not cached)"""
+        if results is None:
+            results = []
+        else:
+            codeanalysis.set_cached_results(key, results)
+        end_callback(results)
+
     def update_queue(self):
         """Update queue"""
         started = 0
@@ -177,7 +227,8 @@ class FileInfo(QObject):
         self.classes = (filename, None, None)
         self.analysis_results = []
         self.todo_results = []
-        self.lastmodified = QFileInfo(filename).lastModified()
+        # Changes detected by the file watcher: None, 'modified' or 'removed'
+        self.disk_status = None
 
         self.editor.textChanged.connect(self.text_changed)
         self.editor.breakpoints_changed.connect(self.breakpoints_changed)
@@ -210,13 +261,13 @@ class FileInfo(QObject):
             if run_pep8:
                 self.pep8_results = None
             if run_pyflakes:
-                self.threadmanager.add_thread(codeanalysis.check_with_pyflakes,
-                                              self.pyflakes_analysis_finished,
-                                              source_code, self)
+                self.threadmanager.add_analysis(
+                        codeanalysis.check_with_pyflakes,
+                        self.pyflakes_analysis_finished, source_code, self)
             if run_pep8:
-                self.threadmanager.add_thread(codeanalysis.check_with_pep8,
-                                              self.pep8_analysis_finished,
-                                              source_code, self)
+                self.threadmanager.add_analysis(codeanalysis.check_with_pep8,
+                                                self.pep8_analysis_finished,
+                                                source_code, self)
 
     def pyflakes_analysis_finished(self, results):
         """Pyflakes code analysis thread has finished"""
@@ -246,11 +297,16 @@ class FileInfo(QObject):
         self.editor.cleanup_code_analysis()
 
     def run_todo_finder(self):
-        """Run TODO finder"""
+        """Run TODO finder
+        Tasks are tracked incrementally by the editor as the document changes,
+        so there is no need to scan the whole source code again here"""
         if self.editor.is_python():
-            self.threadmanager.add_thread(codeanalysis.find_tasks,
-                                          self.todo_finished,
-                                          self.get_source_code(), self)
+            results = self.editor.get_todo_results()
+            if results != self.todo_results:
+                self.todo_finished(results)
+            else:
+                # Markers may have to be moved even if results are the same
+                self.editor.process_todo(results)
 
     def todo_finished(self, results):
         """Code analysis thread has finished"""
@@ -411,6 +467,11 @@ class EditorStack(QWidget):
 
         self.__file_status_flag = False
 
+        # Detecting external modifications of opened files
+        self.file_watcher = get_file_watcher()
+        self.file_watcher.sig_file_changed.connect(self.file_changed_on_disk)
+        self.file_watcher.sig_file_removed.connect(self.file_removed_from_disk)
+
         # Real-time code analysis
         self.analysis_timer = QTimer(self)
         self.analysis_timer.setSingleShot(True)
@@ -550,6 +611,11 @@ class EditorStack(QWidget):
         self.fileswitcher_dlg = FileSwitcher(self, self.tabs, self.data)
         self.fileswitcher_dlg.sig_goto_file.connect(self.set_stack_index)
         self.fileswitcher_dlg.sig_close_file.connect(self.close_file)
+        self.fileswitcher_dlg.sig_open_file.connect(
+                lambda fname: self.plugin_load.emit(fname))
+        self.fileswitcher_dlg.sig_edit_goto.connect(
+                lambda fname, lineno, name:
+                self.edit_goto.emit(fname, lineno, name))
         self.fileswitcher_dlg.show()
 
     def update_fileswitcher_dlg(self):
@@ -885,7 +951,8 @@ class EditorStack(QWidget):
     def remove_from_data(self, index):
         self.tabs.blockSignals(True)
         self.tabs.removeTab(index)
-        self.data.pop(index)
+        finfo = self.data.pop(index)
+        self.file_watcher.unwatch(finfo.filename, self)
         self.tabs.blockSignals(False)
         self.update_actions()
         self.update_fileswitcher_dlg()
@@ -935,6 +1002,8 @@ class EditorStack(QWidget):
         self.data.sort(key=self.__get_sorting_func())
         index = self.data.index(finfo)
         fname, editor = finfo.filename, finfo.editor
+        if not finfo.newly_created:
+            self.file_watcher.watch(fname, self)
         self.tabs.insertTab(index, editor, get_filetype_icon(fname),
                             self.get_tab_text(fname))
         self.set_stack_title(index, False)
@@ -969,7 +1038,10 @@ class EditorStack(QWidget):
             finfo.editor.set_language(language)
         set_new_index = index == self.get_stack_index()
         current_fname = self.get_current_filename()
+        self.file_watcher.unwatch(finfo.filename, self)
         finfo.filename = new_filename
+        finfo.disk_status = None
+        self.file_watcher.watch(new_filename, self)
         self.data.sort(key=self.__get_sorting_func())
         new_index = self.data.index(finfo)
         self.__repopulate_stack()
@@ -1217,7 +1289,9 @@ class EditorStack(QWidget):
                                             finfo.encoding)
             finfo.newly_created = False
             self.encoding_changed.emit(finfo.encoding)
-            finfo.lastmodified = QFileInfo(finfo.filename).lastModified()
+            self.file_watcher.watch(finfo.filename, self)
+            self.file_watcher.update(finfo.filename)
+            finfo.disk_status = None
 
             # We pass self object ID as a QString, because otherwise it would
             # depend on the platform: long for 64bit, int for 32bit. Replacing
@@ -1256,8 +1330,10 @@ class EditorStack(QWidget):
         """
         finfo = self.data[index]
         finfo.newly_created = False
+        self.file_watcher.unwatch(finfo.filename, self)
         finfo.filename = to_text_string(filename)
-        finfo.lastmodified = QFileInfo(finfo.filename).lastModified()
+        self.file_watcher.watch(finfo.filename, self)
+        finfo.disk_status = None
 
     def select_savename(self, original_filename):
         self.redirect_stdio.emit(False)
@@ -1453,10 +1529,32 @@ class EditorStack(QWidget):
         finfo.editor.setReadOnly(read_only)
         self.readonly_changed.emit(read_only)
 
+    def file_changed_on_disk(self, filename):
+        """File *filename* has been modified outside Spyder"""
+        self.set_disk_status(filename, 'modified')
+
+    def file_removed_from_disk(self, filename):
+        """File *filename* has been removed, moved or renamed outside Spyder"""
+        self.set_disk_status(filename, 'removed')
+
+    def set_disk_status(self, filename, status):
+        """File *filename* has been modified or removed outside Spyder
+        (the file watcher reports only actual content changes)"""
+        for index, finfo in enumerate(self.data):
+            if finfo.filename == filename:
+                finfo.disk_status = status
+                if index == self.get_stack_index() \
+                   and finfo.editor.hasFocus():
+                    self.__check_file_status(index)
+                break
+
     def __check_file_status(self, index):
         """Check if file has been changed in any way outside Spyder:
         1. removed, moved or renamed outside Spyder
-        2. modified outside Spyder"""
+        2. modified outside Spyder
+
+        Changes are detected by the file watcher, so that this check is
+        cheap enough to be done each time the editor gets focus"""
         if self.__file_status_flag:
             # Avoid infinite loop: when the QMessageBox.question pops, it
             # gets focus and then give it back to the CodeEditor instance,
@@ -1472,7 +1570,7 @@ class EditorStack(QWidget):
             # (do not return because of the clean-up at the end of the method)
             pass
 
-        elif not osp.isfile(finfo.filename):
+        elif finfo.disk_status == 'removed':
             # File doesn't exist (removed, moved or offline):
             answer = QMessageBox.warning(self, self.title,
                                 _("<b>%s</b> is unavailable "
@@ -1483,28 +1581,26 @@ class EditorStack(QWidget):
             if answer == QMessageBox.Yes:
                 self.close_file(index)
             else:
+                finfo.disk_status = None
                 finfo.newly_created = True
                 finfo.editor.document().setModified(True)
                 self.modification_changed(index=index)
 
-        else:
-            # Else, testing if it has been modified elsewhere:
-            lastm = QFileInfo(finfo.filename).lastModified()
-            if to_text_string(lastm.toString()) \
-               != to_text_string(finfo.lastmodified.toString()):
-                if finfo.editor.document().isModified():
-                    answer = QMessageBox.question(self,
-                                self.title,
-                                _("<b>%s</b> has been modified outside Spyder."
-                                  "<br>Do you want to reload it and lose all "
-                                  "your changes?") % name,
-                                QMessageBox.Yes | QMessageBox.No)
-                    if answer == QMessageBox.Yes:
-                        self.reload(index)
-                    else:
-                        finfo.lastmodified = lastm
-                else:
+        elif finfo.disk_status == 'modified':
+            # File has been modified elsewhere:
+            if finfo.editor.document().isModified():
+                answer = QMessageBox.question(self,
+                            self.title,
+                            _("<b>%s</b> has been modified outside Spyder."
+                              "<br>Do you want to reload it and lose all "
+                              "your changes?") % name,
+                            QMessageBox.Yes | QMessageBox.No)
+                if answer == QMessageBox.Yes:
                     self.reload(index)
+                else:
+                    finfo.disk_status = None
+            else:
+                self.reload(index)
 
         # Finally, resetting temporary flag:
         self.__file_status_flag = False
@@ -1568,7 +1664,8 @@ class EditorStack(QWidget):
         """Reload file from disk"""
         finfo = self.data[index]
         txt, finfo.encoding = encoding.read(finfo.filename)
-        finfo.lastmodified = QFileInfo(finfo.filename).lastModified()
+        self.file_watcher.update(finfo.filename)
+        finfo.disk_status = None
         position = finfo.editor.get_position('cursor')
         finfo.editor.set_text(txt)
         finfo.editor.document().setModified(False)
@@ -293,7 +293,9 @@ class ExternalShellBase(QWidget):
         return self.transcode(qba)
 
     def write_output(self):
-        self.shell.write(self.get_stdout(), flush=True)
+        # Output is not flushed immediately: high output rates are coalesced
+        # by the shell widget (see ShellBaseWidget.write)
+        self.shell.write(self.get_stdout())
         # Commenting the line below improves crashes on long
         # output. See Issue 2251
         # QApplication.processEvents()
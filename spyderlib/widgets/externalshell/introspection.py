@@ -33,6 +33,9 @@ if DEBUG_INTROSPECTION:
 
 SPYDER_PORT = 20128
 
+# Maximum time (s) the debugger waits for Spyder to process a step
+PDB_STEP_TIMEOUT = 1.
+
 
 class IntrospectionServer(threading.Thread):
     """Introspection server"""
@@ -149,7 +152,13 @@ class NotificationThread(QThread):
     def __init__(self):
         QThread.__init__(self)
         self.notify_socket = None
+        self.pdb_step_consumed = threading.Event()
         
+    def consume_pdb_step(self):
+        """Acknowledge the last pdb step notification (the debugger is
+        waiting for it)"""
+        self.pdb_step_consumed.set()
+
     def set_notify_socket(self, notify_socket):
         """Set the notification socket"""
         self.notify_socket = notify_socket
@@ -181,8 +190,12 @@ class NotificationThread(QThread):
                 data = cdict.get('data')
                 if command == 'pdb_step':
                     fname, lineno = data
+                    self.pdb_step_consumed.clear()
                     self.sig_pdb.emit(fname, lineno)
                     self.refresh_namespace_browser.emit()
+                    # Reply when the step has been processed, so that
+                    # the debugger doesn't have to sleep after each step
+                    self.pdb_step_consumed.wait(PDB_STEP_TIMEOUT)
                 elif command == 'refresh':
                     self.refresh_namespace_browser.emit()
                 elif command == 'remote_view':
@@ -132,6 +132,8 @@ class Monitor(threading.Thread):
         self.ipython_shell = None
         
         self.pdb_obj = None
+        # Breakpoints pushed by Spyder (None until they are received)
+        self.spyder_breakpoints = None
         
         self.timeout = None
         self.set_timeout(timeout)
@@ -319,12 +321,14 @@ class Monitor(threading.Thread):
         self.pdb_obj = pdb_obj
 
     def notify_pdb_step(self, fname, lineno):
-        """Notify the ExternalPythonShell regarding pdb current frame"""
+        """Notify the ExternalPythonShell regarding pdb current frame
+        (returns once Spyder has processed the notification)"""
         communicate(self.n_request,
                     dict(command="pdb_step", data=(fname, lineno)))
 
     def set_spyder_breakpoints(self):
-        """Set all Spyder breakpoints in active pdb session"""
+        """Receive Spyder breakpoints and set them in active pdb session"""
+        self.spyder_breakpoints = read_packet(self.i_request)
         if not self.pdb_obj:
             return
         self.pdb_obj.set_spyder_breakpoints()    
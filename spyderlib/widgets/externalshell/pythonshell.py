@@ -20,6 +20,7 @@ from qtpy.QtWidgets import QApplication, QMenu, QMessageBox, QSplitter
 # Local imports
 from spyderlib.config.base import (_, DEBUG, get_module_source_path,
                                    MAC_APP_NAME, running_in_mac_app)
+from spyderlib.config.main import CONF
 from spyderlib.py3compat import (is_text_string, to_binary_string,
                                  to_text_string)
 from spyderlib.utils import icon_manager as ima
@@ -36,6 +37,14 @@ from spyderlib.widgets.variableexplorer.namespacebrowser import NamespaceBrowser
 from spyderlib.widgets.variableexplorer.collectionseditor import CollectionsEditor
 
 
+def get_spyder_breakpoints():
+    """Return Spyder breakpoints, sent to the debugger of external shells
+    (empty if breakpoints are disabled)"""
+    if CONF.get('run', 'breakpoints/enabled', True):
+        return CONF.get('run', 'breakpoints', {})
+    return {}
+
+
 class ExtPythonShellWidget(PythonShellWidget):
     
     wait_for_ready_read = Signal()
@@ -154,7 +163,8 @@ class ExtPythonShellWidget(PythonShellWidget):
 
     def set_spyder_breakpoints(self):
         """Set Spyder breakpoints into debugging session"""
-        return self.ask_monitor("set_spyder_breakpoints()")
+        return self.ask_monitor("set_spyder_breakpoints()",
+                                settings=[get_spyder_breakpoints()])
         
 
 class ExternalPythonShell(ExternalShellBase):
@@ -172,6 +182,7 @@ class ExternalPythonShell(ExternalShellBase):
                  path=[], python_args='',
                  ipykernel=False, arguments='', stand_alone=None,
                  umr_enabled=True, umr_namelist=[], umr_verbose=True,
+                 umr_smart=False,
                  pythonstartup=None, pythonexecutable=None,
                  external_interpreter=False,
                  monitor_enabled=True, mpl_backend=None, ets_backend='qt4',
@@ -201,6 +212,7 @@ class ExternalPythonShell(ExternalShellBase):
         self.umr_enabled = umr_enabled
         self.umr_namelist = umr_namelist
         self.umr_verbose = umr_verbose
+        self.umr_smart = umr_smart
         self.autorefresh_timeout = autorefresh_timeout
         self.autorefresh_state = autorefresh_state
                 
@@ -264,6 +276,10 @@ class ExternalPythonShell(ExternalShellBase):
             settings = self.namespacebrowser.get_view_settings()
             communicate(introspection_socket,
                         'set_remote_view_settings()', settings=[settings])
+        # Breakpoints are sent now so that the debugger doesn't have to
+        # read them from Spyder's configuration file
+        communicate(introspection_socket, 'set_spyder_breakpoints()',
+                    settings=[get_spyder_breakpoints()])
         
     def set_autorefresh_timeout(self, interval):
         if self.introspection_socket is not None:
@@ -450,9 +466,7 @@ class ExternalPythonShell(ExternalShellBase):
             introspection_server.register(self)
             notification_server = introspection.start_notification_server()
             self.notification_thread = notification_server.register(self)
-            self.notification_thread.sig_pdb.connect(
-                                              lambda fname, lineno:
-                                              self.sig_pdb.emit(fname, lineno))
+            self.notification_thread.sig_pdb.connect(self.pdb_step)
             self.notification_thread.new_ipython_kernel.connect(
                                          lambda args:
                                          self.create_ipython_client.emit(args))
@@ -484,6 +498,7 @@ class ExternalPythonShell(ExternalShellBase):
             env.append('UMR_ENABLED=%r' % self.umr_enabled)
             env.append('UMR_NAMELIST=%s' % ','.join(self.umr_namelist))
             env.append('UMR_VERBOSE=%r' % self.umr_verbose)
+            env.append('UMR_SMART=%r' % self.umr_smart)
             env.append('MATPLOTLIB_ION=True')
         else:
             if self.interact:
@@ -603,6 +618,12 @@ class ExternalPythonShell(ExternalShellBase):
         if os.name == 'nt':
             self.write_error()
         
+    def pdb_step(self, fname, lineno):
+        """Debugger has stopped at line *lineno* of file *fname*"""
+        self.sig_pdb.emit(fname, lineno)
+        # The debugger may go on
+        self.notification_thread.consume_pdb_step()
+
     def keyboard_interrupt(self):
         if self.introspection_socket is not None:
             communicate(self.introspection_socket, "thread.interrupt_main()")
@@ -17,6 +17,8 @@ import bdb
 import time
 import traceback
 import shlex
+import types
+import importlib
 
 
 PY2 = sys.version[0] == '2'
@@ -509,16 +511,22 @@ class SpyderPdb(pdb.Pdb):
         bdb.Breakpoint.bplist = {}
         bdb.Breakpoint.bpbynumber = [None]
         #------
-        from spyderlib.config.main import CONF
-        CONF.load_from_ini()
-        if CONF.get('run', 'breakpoints/enabled', True):
-            breakpoints = CONF.get('run', 'breakpoints', {})
-            i = 0
-            for fname, data in list(breakpoints.items()):
-                for linenumber, condition in data:
-                    i += 1
-                    self.set_break(self.canonic(fname), linenumber,
-                                   cond=condition)
+        breakpoints = None
+        if monitor is not None:
+            breakpoints = monitor.spyder_breakpoints
+        if breakpoints is None:
+            # Breakpoints were not sent by Spyder (e.g. the monitor is
+            # disabled): read them from Spyder's configuration file
+            from spyderlib.config.main import CONF
+            CONF.load_from_ini()
+            if CONF.get('run', 'breakpoints/enabled', True):
+                breakpoints = CONF.get('run', 'breakpoints', {})
+            else:
+                breakpoints = {}
+        for fname, data in list(breakpoints.items()):
+            for linenumber, condition in data:
+                self.set_break(self.canonic(fname), linenumber,
+                               cond=condition)
 
     def notify_spyder(self, frame):
         if not frame:
@@ -532,8 +540,8 @@ class SpyderPdb(pdb.Pdb):
         lineno = frame.f_lineno
         if isinstance(fname, basestring) and isinstance(lineno, int):
             if osp.isfile(fname) and monitor is not None:
+                # Returns once Spyder has processed the notification
                 monitor.notify_pdb_step(fname, lineno)
-                time.sleep(0.1)
                 
 pdb.Pdb = SpyderPdb
 
@@ -654,6 +662,44 @@ except ValueError:
 #==============================================================================
 # User module reloader
 #==============================================================================
+def get_module_mtime(module):
+    """Return modification time of *module* source file (None if unknown)"""
+    filename = getattr(module, '__file__', None)
+    if filename is None:
+        return
+    if filename.endswith(('.pyc', '.pyo')) and osp.isfile(filename[:-1]):
+        filename = filename[:-1]
+    try:
+        return os.stat(filename).st_mtime
+    except (OSError, TypeError):
+        return
+
+
+def get_module_dependencies(module, modnames):
+    """Return the names of the modules among *modnames* which *module*
+    depends on, i.e. which are referenced in its namespace (imported
+    modules, or functions and classes imported from them)"""
+    dependencies = set()
+    prefix = module.__name__ + '.'
+    for value in list(vars(module).values()):
+        if isinstance(value, types.ModuleType):
+            name = value.__name__
+            if name.startswith(prefix):
+                # Submodules are bound again in their package when they
+                # are imported again
+                continue
+        else:
+            try:
+                name = getattr(value, '__module__', None)
+            except Exception:
+                # Objects with a broken __getattr__
+                continue
+        if isinstance(name, str) and name in modnames:
+            dependencies.add(name)
+    dependencies.discard(module.__name__)
+    return dependencies
+
+
 class UserModuleReloader(object):
     """
     User Module Reloader (UMR) aims at deleting user modules 
@@ -661,8 +707,10 @@ class UserModuleReloader(object):
 
     pathlist [list]: blacklist in terms of module path
     namelist [list]: blacklist in terms of module name
+    smart [bool]: only delete modules whose source file has changed since
+    they were imported, and the modules which depend on them
     """
-    def __init__(self, namelist=None, pathlist=None):
+    def __init__(self, namelist=None, pathlist=None, smart=False):
         if namelist is None:
             namelist = []
         spy_modules = ['sitecustomize', 'spyderlib', 'spyderplugins']
@@ -672,7 +720,74 @@ class UserModuleReloader(object):
         if pathlist is None:
             pathlist = []
         self.pathlist = pathlist
-        self.previous_modules = list(sys.modules.keys())
+        self.previous_modules = set(sys.modules.keys())
+
+        self.smart = smart
+        self.mtimes = {}    # modname: mtime of source file when imported
+        self.imports = {}   # modname: names of the modules it has imported
+        self.original_import = None
+        self.original_import_module = None
+        self.run_time = time.time()
+
+    def install_import_hook(self):
+        """
+        Record the modules imported by each module, until
+        `remove_import_hook` is called: a module may depend on modules which
+        are not referenced in its namespace, e.g. after
+        'from module import value'
+
+        Return False if the hook was already installed
+        """
+        if self.original_import is not None:
+            return False
+        original_import = builtins.__import__
+        original_import_module = importlib.import_module
+        imports = self.imports
+
+        def __import__(name, *args, **kwargs):
+            module = original_import(name, *args, **kwargs)
+            try:
+                importer = (args[0] if args else kwargs['globals'])['__name__']
+                fromlist = args[2] if len(args) > 2 else \
+                           kwargs.get('fromlist')
+                if fromlist:
+                    names = [module.__name__]
+                    for attr in fromlist:
+                        value = getattr(module, attr, None)
+                        if isinstance(value, types.ModuleType):
+                            names.append(value.__name__)
+                else:
+                    # The top-level package is returned: name of the module
+                    # is its name followed by the submodules in *name*
+                    names = [module.__name__ + name[len(name.split('.')[0]):]]
+                imports.setdefault(importer, set()).update(names)
+            except Exception:
+                pass
+            return module
+
+        def import_module(name, package=None):
+            module = original_import_module(name, package)
+            try:
+                importer = sys._getframe(1).f_globals['__name__']
+                imports.setdefault(importer, set()).add(module.__name__)
+            except Exception:
+                pass
+            return module
+
+        self.original_import = original_import
+        self.original_import_module = original_import_module
+        builtins.__import__ = __import__
+        importlib.import_module = import_module
+        return True
+
+    def remove_import_hook(self):
+        """Restore the import functions replaced by `install_import_hook`"""
+        if self.original_import is None:
+            return
+        builtins.__import__ = self.original_import
+        importlib.import_module = self.original_import_module
+        self.original_import = None
+        self.original_import_module = None
 
     def is_module_blacklisted(self, modname, modpath):
         for path in [sys.prefix]+self.pathlist:
@@ -681,15 +796,15 @@ class UserModuleReloader(object):
         else:
             return set(modname.split('.')) & set(self.namelist)
 
-    def run(self, verbose=False):
+    def get_user_modules(self):
         """
-        Del user modules to force Python to deeply reload them
+        Return user modules (dictionary), i.e. modules imported since UMR
+        was created which are not blacklisted
 
-        Do not del modules which are considered as system modules, i.e.
-        modules installed in subdirectories of Python interpreter's binary
-        Do not del C modules
+        Modules installed in subdirectories of Python interpreter's binary
+        are considered as system modules
         """
-        log = []
+        modules = {}
         for modname, module in list(sys.modules.items()):
             if modname not in self.previous_modules:
                 modpath = getattr(module, '__file__', None)
@@ -699,8 +814,74 @@ class UserModuleReloader(object):
                     # choose to ignore it.
                     continue
                 if not self.is_module_blacklisted(modname, modpath):
-                    log.append(modname)
-                    del sys.modules[modname]
+                    modules[modname] = module
+        return modules
+
+    def get_modified_modules(self, modules):
+        """
+        Return the names of the user *modules* which have to be reloaded:
+        modules whose source file was modified since they were imported
+        (or whose import time is unknown), the modules depending on them
+        and their submodules
+        """
+        modified = [modname for modname, module in modules.items()
+                    if modname not in self.mtimes
+                    or get_module_mtime(module) != self.mtimes[modname]]
+        if not modified:
+            return set()
+        dependents = {}
+        for modname, module in modules.items():
+            dependencies = get_module_dependencies(module, modules)
+            dependencies.update([name for name in self.imports.get(modname, [])
+                                 if name in modules and name != modname])
+            for name in dependencies:
+                dependents.setdefault(name, []).append(modname)
+        to_reload = set()
+        while modified:
+            modname = modified.pop()
+            if modname in to_reload:
+                continue
+            to_reload.add(modname)
+            modified.extend(dependents.get(modname, []))
+            # A package which is imported again has to import its
+            # submodules again to bind them
+            prefix = modname + '.'
+            modified.extend([name for name in modules
+                             if name.startswith(prefix)])
+        return to_reload
+
+    def record_mtimes(self):
+        """
+        Record source file modification time of user modules imported
+        since the last call to `run`
+        """
+        for modname, module in self.get_user_modules().items():
+            if modname not in self.mtimes:
+                mtime = get_module_mtime(module)
+                # Files modified while running can't be trusted
+                if mtime is not None and mtime <= self.run_time:
+                    self.mtimes[modname] = mtime
+
+    def run(self, verbose=False):
+        """
+        Del user modules to force Python to deeply reload them
+
+        Do not del modules which are considered as system modules, i.e.
+        modules installed in subdirectories of Python interpreter's binary
+        Do not del C modules
+        In smart mode, only del modified modules and their dependents
+        """
+        modules = self.get_user_modules()
+        if self.smart:
+            modnames = self.get_modified_modules(modules)
+        else:
+            modnames = modules.keys()
+        log = sorted(modnames)
+        for modname in log:
+            del sys.modules[modname]
+            self.mtimes.pop(modname, None)
+            self.imports.pop(modname, None)
+        self.run_time = time.time()
         if verbose and log:
             _print("\x1b[4;33m%s\x1b[24m%s\x1b[0m"\
                    % ("Reloaded modules", ": "+", ".join(log)))
@@ -810,12 +991,14 @@ def runfile(filename, args=None, wdir=None, namespace=None, post_mortem=False):
         # AttributeError --> systematically raised in Python 3
         pass
     global __umr__
-    if os.environ.get("UMR_ENABLED", "").lower() == "true":
+    umr_enabled = os.environ.get("UMR_ENABLED", "").lower() == "true"
+    if umr_enabled:
         if __umr__ is None:
             namelist = os.environ.get("UMR_NAMELIST", None)
             if namelist is not None:
                 namelist = namelist.split(',')
-            __umr__ = UserModuleReloader(namelist=namelist)
+            smart = os.environ.get("UMR_SMART", "").lower() == "true"
+            __umr__ = UserModuleReloader(namelist=namelist, smart=smart)
         else:
             verbose = os.environ.get("UMR_VERBOSE", "").lower() == "true"
             __umr__.run(verbose=verbose)
@@ -838,7 +1021,17 @@ def runfile(filename, args=None, wdir=None, namespace=None, post_mortem=False):
         os.chdir(wdir)
     if post_mortem:
         set_post_mortem()
-    execfile(filename, namespace)
+    # Imports are only tracked while running files, and if smart UMR is
+    # enabled (a nested runfile call leaves the hook to the outer one)
+    umr_hooked = umr_enabled and __umr__.smart and \
+                 __umr__.install_import_hook()
+    try:
+        execfile(filename, namespace)
+    finally:
+        if umr_enabled and __umr__.smart:
+            __umr__.record_mtimes()
+        if umr_hooked:
+            __umr__.remove_import_hook()
     clear_post_mortem()
     sys.argv = ['']
     namespace.pop('__file__')
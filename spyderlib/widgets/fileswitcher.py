@@ -6,6 +6,7 @@
 
 # Standard library imports
 from __future__ import print_function
+import bisect
 import os
 import os.path as osp
 
@@ -16,13 +17,23 @@ from qtpy.QtWidgets import (QDialog, QHBoxLayout, QLabel, QLineEdit,
                             QListWidget, QListWidgetItem, QVBoxLayout)
 
 # Local imports
-from spyderlib.config.base import _
+from spyderlib.config.base import _, get_conf_path
 from spyderlib.py3compat import iteritems, to_text_string
 from spyderlib.utils import icon_manager as ima
-from spyderlib.utils.stringmatching import get_search_scores
+from spyderlib.utils import symbolindex
+from spyderlib.utils.introspection.plugin_client import ClientPool
+from spyderlib.utils.qthelpers import get_filetype_icon
+from spyderlib.utils.stringmatching import get_search_scores, SearchScorer
 from spyderlib.widgets.helperwidgets import HelperToolButton, HTMLDelegate
 
 
+# Number of project files parsed by each symbol server request
+SYMBOL_CHUNK_SIZE = 50
+
+# Maximum number of project files or symbols shown in the file switcher
+MAX_PROJECT_RESULTS = 50
+
+
 # --- Python Outline explorer helpers
 def process_python_symbol_data(oedata):
     """Returns a list with line number, definition name, fold and token."""
@@ -185,6 +196,110 @@ def shorten_paths(path_list, is_unsaved):
     return [path.rstrip(os.sep) for path in new_path_list]
 
 
+def get_symbol_icon(token, level, name):
+    """Return icon of a symbol of the project symbol index"""
+    if token == symbolindex.CLASS_TOKEN:
+        return ima.icon('class')
+    elif level == 0:
+        return ima.icon('function')
+    elif name.startswith('__'):
+        return ima.icon('private2')
+    elif name.startswith('_'):
+        return ima.icon('private1')
+    else:
+        return ima.icon('method')
+
+
+class SymbolIndexer(QObject):
+    """
+    Background indexer of the symbols defined in the opened projects
+
+    Project files are listed and parsed by a pool of servers running the
+    functions of the `symbolindex` module. Only new or modified files are
+    parsed again and the index is persisted between sessions.
+    """
+    sig_index_updated = Signal()
+
+    def __init__(self, size=2):
+        QObject.__init__(self)
+        self.pool = ClientPool('spyderlib.utils.symbolindex', size=size)
+        self.changed = False
+        self.index = symbolindex.SymbolIndex()
+        self.dirname = get_conf_path('symbols')
+        self.scorers = {}
+
+    def set_root_paths(self, root_paths):
+        """Set root paths of the indexed projects"""
+        root_paths = sorted(set(root_paths))
+        if root_paths == self.index.root_paths:
+            return
+        # Responses to pending requests will be ignored
+        self.pool.cancel(lambda owner: True)
+        self.changed = False
+        self.index = symbolindex.SymbolIndex(root_paths)
+        if root_paths:
+            self.index.load(self.dirname)
+            self.refresh()
+        self.sig_index_updated.emit()
+
+    def get_scorer(self, name, source, get_choices):
+        """Return search scorer *name* for the choices returned by
+        *get_choices*, which are computed from the list *source* returned by
+        the index (the scorer is cached until the index changes)"""
+        cached_source, scorer = self.scorers.get(name, (None, None))
+        if cached_source is not source:
+            scorer = SearchScorer(get_choices())
+            self.scorers[name] = (source, scorer)
+        return scorer
+
+    def is_indexing(self):
+        """Return True if index is being updated"""
+        return self.pool.is_busy()
+
+    def refresh(self):
+        """Look for new or modified files in indexed projects"""
+        if not self.index.root_paths or self.is_indexing():
+            return
+        self.pool.request('get_project_files', (self.index.root_paths,),
+                          self.project_files_received)
+
+    def project_files_received(self, files):
+        """Project files have been listed: parse new or modified files"""
+        if files is not None:
+            count = len(self.index.files)
+            stale_files = self.index.get_stale_files(files)
+            self.changed = count != len(self.index.files)
+            for index in range(0, len(stale_files), SYMBOL_CHUNK_SIZE):
+                chunk = stale_files[index:index+SYMBOL_CHUNK_SIZE]
+                self.pool.request('get_files_symbols', (chunk,),
+                                  self.files_symbols_received)
+        self.request_finished()
+
+    def files_symbols_received(self, symbols):
+        """Symbols of project files have been extracted: update index"""
+        if symbols is not None:
+            self.index.update(symbols)
+            self.changed = True
+        self.request_finished()
+
+    def request_finished(self):
+        """Save index when it has been updated"""
+        if not self.is_indexing() and self.changed:
+            self.changed = False
+            self.index.save(self.dirname)
+            self.sig_index_updated.emit()
+
+
+SYMBOL_INDEXER = None
+
+def get_symbol_indexer():
+    """Return the project symbol indexer shared by all file switchers"""
+    global SYMBOL_INDEXER
+    if SYMBOL_INDEXER is None:
+        SYMBOL_INDEXER = SymbolIndexer()
+    return SYMBOL_INDEXER
+
+
 class KeyPressFilter(QObject):
     """
     Use with `installEventFilter` to get up/down arrow key press signal.
@@ -208,6 +323,8 @@ class FileSwitcher(QDialog):
     """A Sublime-like file switcher."""
     sig_goto_file = Signal(int)
     sig_close_file = Signal(int)
+    sig_open_file = Signal(str)
+    sig_edit_goto = Signal(str, int, str)
 
     # Constants that define the mode in which the list widget is working
     # FILE_MODE is for a list of files, SYMBOL_MODE if for a list of symbols
@@ -225,6 +342,11 @@ class FileSwitcher(QDialog):
         self.initial_path = None          # Fullpath of initial active editor
         self.initial_editor = None        # Initial active editor
         self.line_number = None           # Selected line number in filer
+        self.symbol_indexer = get_symbol_indexer()
+        self.filtered_path = []
+        self.filtered_symbol_lines = []
+        self.filtered_symbol_paths = []
+        self.filtered_symbol_names = []
 
         help_text = _("Press <b>Enter</b> to switch files or <b>Esc</b> to "
                       "cancel.<br><br>Type to filter filenames.<br><br>"
@@ -270,11 +392,13 @@ class FileSwitcher(QDialog):
         self.edit.textChanged.connect(self.setup)
         self.list.itemSelectionChanged.connect(self.item_selection_changed)
         self.list.clicked.connect(self.edit.setFocus)
+        self.symbol_indexer.sig_index_updated.connect(self.index_updated)
 
         # Setup
         self.save_initial_state()
         self.set_dialog_position()
         self.setup()
+        self.symbol_indexer.refresh()
 
     # --- Properties
     @property
@@ -326,6 +450,24 @@ class FileSwitcher(QDialog):
             self.initial_cursors[paths[i]] = editor.textCursor()
 
     def accept(self):
+        row = self.current_row()
+        if self.count() and row >= 0:
+            # Files and symbols of the project which are not opened in the
+            # editor are only opened when the selection is validated
+            if self.mode == self.FILE_MODE:
+                path = self.filtered_path[row]
+                if path not in self.paths:
+                    if self.line_number:
+                        self.sig_edit_goto.emit(path, int(self.line_number),
+                                                '')
+                    else:
+                        self.sig_open_file.emit(path)
+            else:
+                path = self.filtered_symbol_paths[row]
+                if path is not None:
+                    self.sig_edit_goto.emit(path,
+                                            self.filtered_symbol_lines[row],
+                                            self.filtered_symbol_names[row])
         QDialog.accept(self)
         self.list.clear()
 
@@ -417,6 +559,47 @@ class FileSwitcher(QDialog):
         else:
             return self.parent().get_current_editor()
 
+    # --- Helper methods: Project symbol index
+    def get_project_files(self, filter_text):
+        """Get the best matching project files which are not opened in the
+        editor, as a list of (score, path, rich text) tuples"""
+        index = self.symbol_indexer.index
+        if not filter_text or not index.files:
+            return []
+        paths = index.get_filenames()
+        scorer = self.symbol_indexer.get_scorer(
+                                'files', paths,
+                                lambda: [osp.basename(path) for path in paths])
+        exclude = set()
+        for path in self.paths:
+            row = bisect.bisect_left(paths, path)
+            if row < len(paths) and paths[row] == path:
+                exclude.add(row)
+        results = scorer.search(filter_text, template="<b>{0}</b>",
+                                limit=MAX_PROJECT_RESULTS, exclude=exclude)
+        return [(score, paths[row], rich_text)
+                for row, text, rich_text, score in results]
+
+    def get_project_symbols(self, symbol_text, current_path):
+        """Get the best matching symbols of the project files other than
+        *current_path*, as a list of (score, symbol, rich text) tuples, where
+        symbol is a (path, line, name, level, token) tuple"""
+        index = self.symbol_indexer.index
+        if not symbol_text or not index.files:
+            return []
+        symbols = index.get_symbols()
+        scorer = self.symbol_indexer.get_scorer(
+                            'symbols', symbols,
+                            lambda: [symbol[2] for symbol in symbols])
+        # Symbols are sorted by path
+        start = bisect.bisect_left(symbols, (current_path, ))
+        end = start + len(index.files.get(current_path, (None, []))[1])
+        results = scorer.search(symbol_text, template="<b>{0}</b>",
+                                limit=MAX_PROJECT_RESULTS,
+                                exclude=set(range(start, end)))
+        return [(score, symbols[row], rich_text)
+                for row, text, rich_text, score in results]
+
     def set_editor_cursor(self, editor, cursor):
         """Set the cursor of an editor."""
         pos = cursor.position()
@@ -455,10 +638,15 @@ class FileSwitcher(QDialog):
                     self.edit.setFocus()
                 except ValueError:
                     pass
-            else:
+            elif self.filtered_symbol_paths[row] is None:
                 line_number = self.filtered_symbol_lines[row]
                 self.goto_line(line_number)
 
+    def index_updated(self):
+        """Project symbol index has been updated"""
+        if self.isVisible():
+            self.setup()
+
     def setup_file_list(self, filter_text, current_path):
         """Setup list widget content for file list display."""
         short_paths = shorten_paths(self.paths, self.save_status)
@@ -501,6 +689,19 @@ class FileSwitcher(QDialog):
             self.list.addItem(item)
             self.filtered_path.append(path)
 
+        # Add project files which are not opened in the editor
+        root_paths = self.symbol_indexer.index.root_paths
+        for score_value, path, rich_text in self.get_project_files(
+                                                                filter_text):
+            text_item = '<big>' + rich_text + '</big>'
+            text_item += "<br><i>{0:}</i>".format(
+                symbolindex.get_module_name(path, root_paths))
+            item = QListWidgetItem(get_filetype_icon(path), text_item)
+            item.setToolTip(path)
+            item.setSizeHint(QSize(0, 25))
+            self.list.addItem(item)
+            self.filtered_path.append(path)
+
         # Move selected item in list accordingly and update list size
         if current_path in self.filtered_path:
             self.set_current_row(self.filtered_path.index(current_path))
@@ -530,6 +731,8 @@ class FileSwitcher(QDialog):
         results = []
         lines = []
         self.filtered_symbol_lines = []
+        self.filtered_symbol_paths = []
+        self.filtered_symbol_names = []
         for index, score in enumerate(scores):
             text, rich_text, score_value = score
             line, fold_level, token = line_fold_token[index]
@@ -546,12 +749,33 @@ class FileSwitcher(QDialog):
             fold_space = '&nbsp;'*(fold_level)
             line_number = line + 1
             self.filtered_symbol_lines.append(line_number)
+            self.filtered_symbol_paths.append(None)
+            self.filtered_symbol_names.append(text)
             textline = template_1.format(fold_space, token, rich_text)
             textline += template_2.format(fold_space, line_number)
             item = QListWidgetItem(icon, textline)
             item.setSizeHint(QSize(0, 16))
             self.list.addItem(item)
 
+        # Add symbols defined in the other files of the project
+        root_paths = self.symbol_indexer.index.root_paths
+        template_3 = '<br><code></code><i>[{0}, Line {1}]</i>'
+        for score, symbol, rich_text in self.get_project_symbols(symbol_text,
+                                                                 current_path):
+            path, line, text, level, token = symbol
+            module = symbolindex.get_module_name(path, root_paths)
+            lines.append(module + text)
+            self.filtered_symbol_lines.append(line + 1)
+            self.filtered_symbol_paths.append(path)
+            self.filtered_symbol_names.append(text)
+            textline = template_1.format('', token, rich_text)
+            textline += template_3.format(module, line + 1)
+            item = QListWidgetItem(get_symbol_icon(token, level, text),
+                                   textline)
+            item.setToolTip(path)
+            item.setSizeHint(QSize(0, 16))
+            self.list.addItem(item)
+
         # Move selected item in list accordingly
         # NOTE: Doing this is causing two problems:
         # 1. It makes the cursor to auto-jump to the last selected
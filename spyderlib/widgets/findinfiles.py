@@ -29,7 +29,7 @@ from qtpy.QtWidgets import (QHBoxLayout, QLabel, QRadioButton, QSizePolicy,
 # Local imports
 from spyderlib.config.base import _
 from spyderlib.py3compat import getcwd, to_text_string
-from spyderlib.utils import programs
+from spyderlib.utils import codeanalysis, programs
 from spyderlib.utils import icon_manager as ima
 from spyderlib.utils.misc import abspardir, get_common_path
 from spyderlib.utils.qthelpers import create_toolbutton, get_filetype_icon
@@ -234,10 +234,38 @@ class SearchThread(QThread):
                 return False
         return True
         
+    def is_tasks_search(self):
+        """Return True if searching for the default tasks pattern
+        (TODO, FIXME, XXX, ...)"""
+        if not self.text_re:
+            return False
+        pattern = codeanalysis.TASKS_PATTERN
+        return any([text == pattern.encode(enc) for text, enc in self.texts])
+
+    def find_tasks_in_files(self):
+        """Find tasks in files, using the code analysis tasks cache: only
+        files modified since the last search are read again"""
+        for fname in self.filenames:
+            with QMutexLocker(self.mutex):
+                if self.stopped:
+                    return
+            try:
+                res = codeanalysis.find_tasks_in_file(fname)
+            except (IOError, OSError):
+                self.error_flag = _("permission denied errors were encountered")
+                continue
+            if res:
+                self.results[osp.abspath(fname)] = list(res)
+                self.nb += len(res)
+        self.completed = True
+
     def find_string_in_files(self):
         self.results = {}
         self.nb = 0
         self.error_flag = False
+        if self.is_tasks_search():
+            self.find_tasks_in_files()
+            return
         for fname in self.filenames:
             with QMutexLocker(self.mutex):
                 if self.stopped:
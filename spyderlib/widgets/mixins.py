@@ -26,9 +26,10 @@ from qtpy.QtWidgets import QApplication, QToolTip
 # Local imports
 from spyderlib.config.base import _
 from spyderlib.py3compat import is_text_string, to_text_string, u
-from spyderlib.utils import encoding, sourcecode
+from spyderlib.utils import sourcecode
 from spyderlib.utils.dochelpers import (getargspecfromtext, getobj,
                                         getsignaturefromtext)
+from spyderlib.utils.historystore import get_history_store
 from spyderlib.utils.misc import get_error_match
 from spyderlib.widgets.arraybuilder import NumpyArrayDialog
 
@@ -685,7 +686,9 @@ class SaveHistoryMixin(object):
         self.histidx = None
         if len(self.history)>0 and self.history[-1] == command:
             return
-        self.history.append(command)
+        store = get_history_store(self.history_filename)
+        if self.history is not store:
+            self.history.append(command)
         text = os.linesep + command
         
         # When the first entry will be written in history file,
@@ -694,6 +697,6 @@ class SaveHistoryMixin(object):
             HISTORY_FILENAMES.append(self.history_filename)
             text = self.SEPARATOR + text
         
-        encoding.write(text, self.history_filename, mode='ab')
+        store.write(text)
         if self.append_to_history is not None:
             self.append_to_history.emit(self.history_filename, text)
@@ -19,10 +19,11 @@ import xml.etree.ElementTree as ElementTree
 # Third party imports
 from qtpy import PYQT5
 from qtpy.compat import getexistingdirectory
-from qtpy.QtCore import QFileInfo, Qt, Signal, Slot
+from qtpy.QtCore import QFileInfo, QThread, Qt, Signal, Slot
 from qtpy.QtWidgets import (QAbstractItemView, QFileIconProvider, QHBoxLayout,
                             QHeaderView, QInputDialog, QLabel, QLineEdit,
-                            QMessageBox, QPushButton, QVBoxLayout, QWidget)
+                            QMessageBox, QProgressDialog, QPushButton,
+                            QVBoxLayout, QWidget)
 
 # Local imports
 from spyderlib.config.base import _, get_image_path, STDERR
@@ -49,8 +50,31 @@ def is_drive_path(path):
     return osp.normpath(osp.join(path, osp.pardir)) == path
 
 
-def get_dir_icon(dirname, project):
-    """Return appropriate directory icon"""
+# Package flags of directories by path: (modification time, flag)
+# Adding or removing __init__.py changes the modification time of a directory
+PACKAGE_CACHE_SIZE = 10000
+_package_cache = {}
+
+
+def is_package(dirname, mtime=None):
+    """Return True if directory *dirname* is a Python package
+    If the modification time *mtime* of the directory is known, the flag is
+    cached until the directory changes"""
+    if mtime is not None:
+        cached = _package_cache.get(dirname)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    flag = osp.isfile(osp.join(dirname, '__init__.py'))
+    if mtime is not None:
+        if len(_package_cache) >= PACKAGE_CACHE_SIZE:
+            _package_cache.clear()
+        _package_cache[dirname] = (mtime, flag)
+    return flag
+
+
+def get_dir_icon(dirname, project, mtime=None):
+    """Return appropriate directory icon
+    *mtime*: modification time of the directory (see `is_package`)"""
     if is_drive_path(dirname):
         return ima.icon('DriveHDIcon')
     prefix = 'pp_' if dirname in project.get_pythonpath() else ''
@@ -59,7 +83,7 @@ def get_dir_icon(dirname, project):
             return get_icon(prefix + 'project.png')
         else:
             return get_icon('project_closed.png')
-    elif osp.isfile(osp.join(dirname, '__init__.py')):
+    elif is_package(dirname, mtime):
         return get_icon(prefix + 'package.png')
     else:
         return get_icon(prefix + 'folder.png')
@@ -455,6 +479,11 @@ class Workspace(object):
                 pythonpath += project.get_pythonpath()
         return pythonpath
 
+    def get_opened_project_paths(self):
+        """Return root paths of opened projects"""
+        return [project.root_path for project in self.projects
+                if project.is_opened()]
+
 
 def get_pydev_project_infos(project_path):
     """Return Pydev project infos: name, related projects and PYTHONPATH"""
@@ -477,6 +506,43 @@ def get_pydev_project_infos(project_path):
     return name, related_projects, path
 
 
+class CountLinesThread(QThread):
+    """Source files statistics thread (see misc.count_lines_by_extension)
+    Files are counted in this process: a pool of processes can't be created
+    from Spyder's GUI process"""
+    sig_progress = Signal(int, int, int)
+
+    def __init__(self, parent, pathlist):
+        QThread.__init__(self, parent)
+        self.pathlist = pathlist
+        self.stopped = False
+        self.totals = (0, 0, 0)
+
+    def stop(self):
+        """Stop counting"""
+        self.stopped = True
+
+    def run(self):
+        """Count files, lines and non-blank lines"""
+        for path in self.pathlist:
+            previous = self.totals
+            callback = lambda totals, previous=previous: \
+                       self.update_totals(previous, totals)
+            misc.count_lines_by_extension(path, processes=1,
+                                          callback=callback)
+            if self.stopped:
+                return
+
+    def update_totals(self, previous, totals):
+        """Add partial *totals* of current path to totals of *previous*
+        paths and report progress, return True to stop counting"""
+        self.totals = tuple([previous[index] +
+                             sum([total[index] for total in totals.values()])
+                             for index in range(3)])
+        self.sig_progress.emit(*self.totals)
+        return self.stopped
+
+
 class IconProvider(QFileIconProvider):
     """Project tree widget icon provider"""
     def __init__(self, treeview):
@@ -492,20 +558,32 @@ class IconProvider(QFileIconProvider):
         else:
             qfileinfo = icontype_or_qfileinfo
             fname = osp.normpath(to_text_string(qfileinfo.absoluteFilePath()))
-            if osp.isdir(fname):
+            # Note: the file info already knows the file type, there is no
+            # need to stat the file again
+            if qfileinfo.isDir():
                 project = self.treeview.get_source_project(fname)
                 if project is None:
                     return super(IconProvider, self).icon(qfileinfo)
                 else:
-                    return get_dir_icon(fname, project)
+                    mtime = qfileinfo.lastModified().toMSecsSinceEpoch()
+                    return get_dir_icon(fname, project, mtime)
             else:
                 ext = osp.splitext(fname)[1][1:]
-                icon_path = get_image_path(ext+'.png', default=None)
-                if icon_path is not None:
-                    return get_icon(icon_path)
+                icon = ima.get_cached_icon(
+                            (ima.get_theme(), 'ProjectFileIcon', ext),
+                            lambda: self.get_filetype_icon(ext))
+                if icon is not None:
+                    return icon
                 else:
                     return super(IconProvider, self).icon(qfileinfo)
 
+    def get_filetype_icon(self, ext):
+        """Return Spyder icon of file extension *ext*, or None if there is
+        no such icon"""
+        icon_path = get_image_path(ext+'.png', default=None)
+        if icon_path is not None:
+            return get_icon(icon_path)
+
 
 class ExplorerTreeWidget(FilteredDirView):
     """Explorer tree widget
@@ -524,6 +602,7 @@ class ExplorerTreeWidget(FilteredDirView):
         self.reset_icon_provider()
 
         self.last_folder = None
+        self.count_lines_thread = None
         
         self.setSelectionMode(FilteredDirView.ExtendedSelection)
         
@@ -743,6 +822,10 @@ class ExplorerTreeWidget(FilteredDirView):
     def get_pythonpath(self):
         """Return global PYTHONPATH (for all opened projects"""
         return self.workspace.get_pythonpath()
+
+    def get_opened_project_paths(self):
+        """Return root paths of opened projects"""
+        return self.workspace.get_opened_project_paths()
         
     def add_project(self, folder, silent=False):
         """Add project to tree"""
@@ -1093,18 +1176,40 @@ class ExplorerTreeWidget(FilteredDirView):
             for folder in dirlist:
                 if path != folder and path.startswith(folder):
                     pathlist.pop(pathlist.index(path))
-        files, lines = 0, 0
-        for path in pathlist:
-            f, l = misc.count_lines(path)
-            files += f
-            lines += l
+        if self.count_lines_thread is not None:
+            self.count_lines_thread.stop()
+        thread = CountLinesThread(self, pathlist)
+        dialog = QProgressDialog(_("Counting lines..."), _("Cancel"), 0, 0,
+                                 self)
+        dialog.setWindowTitle(_("Project Explorer"))
+        dialog.setMinimumDuration(500)
+        thread.sig_progress.connect(
+                lambda files, lines, code_lines: dialog.setLabelText(
+                _("Counting lines: %d files, %d lines...") % (files, lines)))
+        dialog.canceled.connect(thread.stop)
+        thread.finished.connect(lambda: self.lines_counted(thread, dialog))
+        self.count_lines_thread = thread
+        thread.start()
+        dialog.setValue(0)
+
+    def lines_counted(self, thread, dialog):
+        """Source files statistics thread has finished: show results"""
+        dialog.reset()
+        thread.setParent(None)
+        if self.count_lines_thread is thread:
+            self.count_lines_thread = None
+        if thread.stopped:
+            return
+        files, lines, code_lines = thread.totals
         QMessageBox.information(self, _("Project Explorer"),
                                 _("Statistics on source files only:<br>"
                                   "(Python, Cython, IPython, Enaml,"
                                   "C/C++, Fortran)<br><br>"
                                   "<b>%s</b> files.<br>"
-                                  "<b>%s</b> lines of code."
-                                  ) % (str(files), str(lines)))
+                                  "<b>%s</b> lines of code "
+                                  "(<b>%s</b> non-blank lines)."
+                                  ) % (str(files), str(lines),
+                                       str(code_lines)))
             
     #---- Internal drag & drop
     def dragMoveEvent(self, event):
@@ -1321,6 +1426,10 @@ class ProjectExplorerWidget(QWidget):
     def get_pythonpath(self):
         """Return PYTHONPATH"""
         return self.treewidget.get_pythonpath()
+
+    def get_opened_project_paths(self):
+        """Return root paths of opened projects"""
+        return self.treewidget.get_opened_project_paths()
     
     def get_source_project(self, fname):
         """Return project which contains source *fname*"""
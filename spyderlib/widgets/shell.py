@@ -22,7 +22,7 @@ import time
 
 # Third party imports
 from qtpy.compat import getsavefilename
-from qtpy.QtCore import Property, QCoreApplication, Qt, QTimer, Signal, Slot
+from qtpy.QtCore import Property, Qt, QTimer, Signal, Slot
 from qtpy.QtGui import QKeySequence, QTextCharFormat, QTextCursor
 from qtpy.QtWidgets import QApplication, QMenu, QMessageBox, QToolTip
 
@@ -34,6 +34,7 @@ from spyderlib.py3compat import (builtins, is_string, is_text_string,
                                  PY3, to_text_string)
 from spyderlib.utils import encoding
 from spyderlib.utils import icon_manager as ima
+from spyderlib.utils.historystore import get_history_store
 from spyderlib.utils.qthelpers import (add_actions, create_action, keybinding,
                                        restore_keyevent)
 from spyderlib.widgets.arraybuilder import SHORTCUT_INLINE, SHORTCUT_TABLE
@@ -42,6 +43,14 @@ from spyderlib.widgets.mixins import (GetHelpMixin, SaveHistoryMixin,
 from spyderlib.widgets.sourcecode.base import ConsoleBaseWidget
 
 
+# Output written in series is buffered and flushed at most every
+# MIN_FLUSH_INTERVAL ms, or less often when rendering is slow (high output
+# rates), so that rendering takes at most 1/FLUSH_LOAD_FACTOR of the time
+MIN_FLUSH_INTERVAL = 50
+MAX_FLUSH_INTERVAL = 500
+FLUSH_LOAD_FACTOR = 4
+
+
 class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
     """
     Shell base widget
@@ -66,6 +75,7 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
         # History
         self.histidx = None
         self.hist_wholeline = False
+        self.hist_search = None
         assert is_text_string(history_filename)
         self.history_filename = history_filename
         self.history = self.load_history()
@@ -84,6 +94,7 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
         # Buffer to increase performance of write/flush operations
         self.__buffer = []
         self.__timestamp = 0.0
+        self.__flush_interval = MIN_FLUSH_INTERVAL
         self.__flushtimer = QTimer(self)
         self.__flushtimer.setSingleShot(True)
         self.__flushtimer.timeout.connect(self.flush)
@@ -311,6 +322,9 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
     def preprocess_keyevent(self, event):
         """Pre-process keypress event:
         return True if event is accepted, false otherwise"""
+        # Pending output has to be written before any input
+        if self.__buffer:
+            self.flush()
         # Copy must be done first to be able to copy read-only text parts
         # (otherwise, right below, we would remove selection
         #  if not on current line)
@@ -335,6 +349,10 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
         """Post-process keypress event:
         in InternalShell, this is method is called when shell is ready"""
         event, text, key, ctrl, shift = restore_keyevent(event)
+        if not (key == Qt.Key_R and ctrl) and key not in (Qt.Key_Control,
+                                    Qt.Key_Shift, Qt.Key_Alt, Qt.Key_Meta):
+            # End of reverse search
+            self.hist_search = None
         
         # Is cursor on the last line? and after prompt?
         if len(text):
@@ -426,6 +444,9 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
                 
         elif key == Qt.Key_L and ctrl:
             self.clear_terminal()
+
+        elif key == Qt.Key_R and ctrl:
+            self.search_history()
             
         elif key == Qt.Key_V and ctrl:
             self.paste()
@@ -497,26 +518,11 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
         
     #------ History Management
     def load_history(self):
-        """Load history from a .py file in user home directory"""
-        if osp.isfile(self.history_filename):
-            rawhistory, _ = encoding.readlines(self.history_filename)
-            rawhistory = [line.replace('\n', '') for line in rawhistory]
-            if rawhistory[1] != self.INITHISTORY[1]:
-                rawhistory[1] = self.INITHISTORY[1]
-        else:
-            rawhistory = self.INITHISTORY
-        history = [line for line in rawhistory \
-                   if line and not line.startswith('#')]
-
-        # Truncating history to X entries:
-        while len(history) >= CONF.get('historylog', 'max_entries'):
-            del history[0]
-            while rawhistory[0].startswith('#'):
-                del rawhistory[0]
-            del rawhistory[0]
-        # Saving truncated history:
-        encoding.writelines(rawhistory, self.history_filename)
-        return history
+        """Load history from a .py file in user home directory
+        (the history store is shared by all shells using the same file and
+        is truncated to X entries in the background)"""
+        return get_history_store(self.history_filename, self.INITHISTORY,
+                                 CONF.get('historylog', 'max_entries'))
         
     def browse_history(self, backward):
         """Browse history"""
@@ -553,13 +559,29 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
             self.hist_wholeline = True
             return self.history[idx], idx
         else:
-            for index in range(len(self.history)):
-                idx = (start_idx+step*(index+1)) % len(self.history)
-                entry = self.history[idx]
-                if entry.startswith(tocursor):
-                    return entry[len(tocursor):], idx
-            else:
+            idx = self.history.find_prefix(tocursor, start_idx, backward)
+            if idx is None:
                 return None, start_idx
+            return self.history[idx][len(tocursor):], idx
+
+    def search_history(self):
+        """Reverse search: replace current line by the previous history
+        entry containing the text which was typed on it"""
+        if self.hist_search is None:
+            query, start_idx = self.input_buffer, len(self.history)
+        else:
+            query, start_idx = self.hist_search
+        if not query:
+            return
+        idx = self.history.find_substring(query, start_idx)
+        if idx is None:
+            QApplication.beep()
+            return
+        self.hist_search = (query, idx)
+        self.histidx = idx
+        self.hist_wholeline = True
+        self.clear_line()
+        self.insert_text(self.history[idx])
     
     
     #------ Simulation standards input/output
@@ -578,17 +600,17 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
             # This test is useful to discriminate QStrings from decoded str
             text = to_text_string(text)
         self.__buffer.append(text)
-        ts = time.time()
         if flush or prompt:
             self.flush(error=error, prompt=prompt)
-        elif ts - self.__timestamp > 0.05:
+        elif time.time()-self.__timestamp > self.__flush_interval/1000.:
             self.flush(error=error)
-            self.__timestamp = ts
-            # Timer to flush strings cached by last write() operation in series
-            self.__flushtimer.start(50)
+        elif not self.__flushtimer.isActive():
+            # Timer to flush strings cached by next write() operations in series
+            self.__flushtimer.start(self.__flush_interval)
 
     def flush(self, error=False, prompt=False):
         """Flush buffer, write text to console"""
+        self.__flushtimer.stop()
         # Fix for Issue 2452 
         if PY3:
             try:
@@ -603,9 +625,14 @@ class ShellBaseWidget(ConsoleBaseWidget, SaveHistoryMixin):
             text = "".join(self.__buffer)
 
         self.__buffer = []
+        t0 = time.time()
         self.insert_text(text, at_end=True, error=error, prompt=prompt)
-        QCoreApplication.processEvents()
-        self.repaint()
+        # Rendering is left to the event loop: adapt the flush interval to
+        # the time spent inserting text
+        self.__timestamp = time.time()
+        interval = FLUSH_LOAD_FACTOR*(self.__timestamp-t0)*1000
+        self.__flush_interval = int(min(max(interval, MIN_FLUSH_INTERVAL),
+                                        MAX_FLUSH_INTERVAL))
         # Clear input buffer:
         self.new_input_line = True
 
@@ -1289,6 +1289,38 @@ class ConsoleBaseWidget(TextEditBaseWidget):
             self.remove_selected_text()
         self.insert_text(QApplication.clipboard().text())
         
+    def set_ansi_codes(self, text):
+        """Process ANSI color sequences of *text* without inserting it
+        (the style is only updated once)"""
+        matches = list(self.COLOR_PATTERN.finditer(text))
+        if not matches:
+            return
+        for match in matches:
+            try:
+                for code in [int(_c) for _c in match.group(1).split(';')]:
+                    self.ansi_handler.set_code(code, update_style=False)
+            except ValueError:
+                pass
+        self.ansi_handler.set_style()
+        self.default_style.format = self.ansi_handler.get_format()
+
+    def drop_trimmed_text(self, text, ansi=True):
+        """Return the end of *text* which remains in the console once
+        inserted: the console only keeps its last maximumBlockCount lines,
+        so there is no point in inserting the other ones"""
+        max_blocks = self.maximumBlockCount()
+        if max_blocks <= 0:
+            return text
+        index = len(text)
+        for _i in range(max_blocks):
+            index = text.rfind('\n', 0, index)
+            if index == -1:
+                return text
+        if ansi:
+            # Colors set in dropped lines still apply to the next ones
+            self.set_ansi_codes(text[:index+1])
+        return text[index+1:]
+
     def append_text_to_shell(self, text, error, prompt):
         """
         Append text to Python shell
@@ -1310,6 +1342,11 @@ class ConsoleBaseWidget(TextEditBaseWidget):
                 break
             text = text[index+1:]
             self.clear()
+        if not prompt:
+            text = self.drop_trimmed_text(text, ansi=not error)
+        # Text is inserted in a single edit block: the layout is updated only
+        # once, when the block is closed
+        cursor.beginEditBlock()
         if error:
             is_traceback = False
             for text in text.splitlines(True):
@@ -1337,9 +1374,10 @@ class ConsoleBaseWidget(TextEditBaseWidget):
                 last_end = match.end()
                 try:
                     for code in [int(_c) for _c in match.group(1).split(';')]:
-                        self.ansi_handler.set_code(code)
+                        self.ansi_handler.set_code(code, update_style=False)
                 except ValueError:
                     pass
+                self.ansi_handler.set_style()
                 self.default_style.format = self.ansi_handler.get_format()
             insert_text_to(cursor, text[last_end:], self.default_style.format)
 #            # Slower alternative:
@@ -1351,6 +1389,7 @@ class ConsoleBaseWidget(TextEditBaseWidget):
 #                        self.ansi_handler.set_code(int(ansi_tag))
 #                    self.default_style.format = self.ansi_handler.get_format()
 #                    cursor.insertText(text, self.default_style.format)
+        cursor.endEditBlock()
         self.set_cursor_position('eof')
         self.setCurrentCharFormat(self.default_style.format)
 
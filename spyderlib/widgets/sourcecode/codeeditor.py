@@ -19,6 +19,7 @@ Editor widget based on QtGui.QPlainTextEdit
 
 # Standard library imports
 from __future__ import division
+import bisect
 from unicodedata import category
 import os.path as osp
 import re
@@ -29,7 +30,8 @@ import time
 # Third party imports
 from qtpy import is_pyqt46
 from qtpy.compat import to_qvariant
-from qtpy.QtCore import QRect, QRegExp, QSize, Qt, QTimer, Signal, Slot
+from qtpy.QtCore import (QObject, QPoint, QRect, QSize, Qt, QTimer, Signal,
+                         Slot)
 from qtpy.QtGui import (QBrush, QColor, QCursor, QFont, QIntValidator,
                         QKeySequence, QPaintEvent, QPainter,
                         QTextBlockUserData, QTextCharFormat, QTextCursor,
@@ -49,11 +51,12 @@ from spyderlib.config.main import CONF
 from spyderlib.py3compat import to_text_string
 from spyderlib.utils import icon_manager as ima
 from spyderlib.utils import syntaxhighlighters as sh
-from spyderlib.utils import encoding, sourcecode
+from spyderlib.utils import codeanalysis, encoding, sourcecode
 from spyderlib.utils.dochelpers import getobj
 from spyderlib.utils.qthelpers import (add_actions, create_action, keybinding,
                                        mimedata2url)
-from spyderlib.utils.sourcecode import ALL_LANGUAGES, CELL_LANGUAGES
+from spyderlib.utils.sourcecode import (ALL_LANGUAGES, CELL_LANGUAGES,
+                                        IdentifierIndex, WORD_PATTERN)
 from spyderlib.widgets.arraybuilder import SHORTCUT_INLINE, SHORTCUT_TABLE
 from spyderlib.widgets.editortools import PythonCFM
 from spyderlib.widgets.sourcecode.base import TextEditBaseWidget
@@ -281,16 +284,64 @@ class BlockUserData(QTextBlockUserData):
         self.breakpoint_condition = None
         self.code_analysis = []
         self.todo = ''
+        self.line_profile = None
         self.editor.blockuserdata_list.append(self)
 
     def is_empty(self):
-        return not self.breakpoint and not self.code_analysis and not self.todo
+        return not self.breakpoint and not self.code_analysis and \
+               not self.todo and not self.line_profile
 
     def __del__(self):
         bud_list = self.editor.blockuserdata_list
         bud_list.pop(bud_list.index(self))
 
 
+class DocumentIndexes(QObject):
+    """
+    Indexes of word positions (used to mark occurrences without searching the
+    whole document) and of tasks (TODO, FIXME, ...) of a QTextDocument, kept
+    up to date with document changes
+
+    The indexes are a child of the document: they are shared by all the
+    editors showing it (see `get_document_indexes`), which keep a reference
+    to them (the Python object would be garbage collected otherwise).
+    """
+    def __init__(self, document):
+        QObject.__init__(self, document)
+        self.identifier_index = IdentifierIndex()
+        self.task_index = codeanalysis.TaskIndex()
+        document.contentsChange.connect(self.update)
+
+    def update(self, position, chars_removed, chars_added):
+        """Update indexes after a document change: only the lines which
+        have changed are scanned again"""
+        document = self.parent()
+        first = document.findBlock(position).blockNumber()
+        end = min(position+chars_added, document.characterCount()-1)
+        last = document.findBlock(end).blockNumber()
+        added = document.blockCount()-len(self.identifier_index.lines)
+        removed = last-first+1-added
+        if first < 0 or last < first or removed < 0:
+            # Should not happen: indexing the whole document again
+            first, removed, last = 0, len(self.identifier_index.lines), \
+                                   document.blockCount()-1
+        block = document.findBlockByNumber(first)
+        new_lines = []
+        for _index in range(first, last+1):
+            new_lines.append(to_text_string(block.text()))
+            block = block.next()
+        self.identifier_index.update(first, removed, new_lines)
+        self.task_index.update(first, removed, new_lines)
+
+
+def get_document_indexes(document):
+    """Return the indexes of *document*, creating them if necessary"""
+    indexes = document.findChild(DocumentIndexes)
+    if indexes is None:
+        indexes = DocumentIndexes(document)
+    return indexes
+
+
 def set_scrollflagarea_painter(painter, light_color):
     """Set scroll flag area painter pen and brush colors"""
     painter.setPen(QColor(light_color).darker(120))
@@ -451,8 +502,10 @@ class CodeEditor(TextEditBaseWidget):
 
         # Indicate occurrences of the selected word
         self.cursorPositionChanged.connect(self.__cursor_position_changed)
-        self.__find_first_pos = None
-        self.__find_flags = None
+
+        # Indexes of word positions and of tasks, kept up to date with
+        # document changes
+        self.set_document_indexes()
 
         self.supported_language = False
         self.supported_cell_language = False
@@ -473,11 +526,13 @@ class CodeEditor(TextEditBaseWidget):
         self.occurrence_timer.setInterval(1500)
         self.occurrence_timer.timeout.connect(self.__mark_occurrences)
         self.occurrences = []
+        self.occurrence_word = None
         self.occurrence_color = QColor(Qt.yellow).lighter(160)
 
         # Mark found results
         self.textChanged.connect(self.__text_has_changed)
         self.found_results = []
+        self.__found_spans = []
         self.found_results_color = QColor(Qt.magenta).lighter(180)
 
         # Context menu
@@ -513,7 +568,11 @@ class CodeEditor(TextEditBaseWidget):
         self.painted.connect(self._draw_editor_cell_divider)
 
         self.verticalScrollBar().valueChanged.connect(
-                                       lambda value: self.rehighlight_cells())                                 
+                                       lambda value: self.rehighlight_cells())
+        # Occurrences and found results are only highlighted in the visible
+        # range, so they have to follow the scrollbar
+        self.verticalScrollBar().valueChanged.connect(
+                                 lambda value: self.__highlight_visible_range())
 
     def create_shortcuts(self):
         codecomp = create_shortcut(self.do_completion, context='Editor',
@@ -623,6 +682,7 @@ class CodeEditor(TextEditBaseWidget):
     def set_as_clone(self, editor):
         """Set as clone editor"""
         self.setDocument(editor.document())
+        self.set_document_indexes()
         self.document_id = editor.get_document_id()
         self.highlighter = editor.highlighter
         self._apply_highlighter_color_scheme()
@@ -917,24 +977,24 @@ class CodeEditor(TextEditBaseWidget):
         return sourcecode.get_primary_at(source_code, offset)
 
     #------Find occurrences
-    def __find_first(self, text):
-        """Find first occurrence: scan whole document"""
-        flags = QTextDocument.FindCaseSensitively|QTextDocument.FindWholeWords
-        cursor = self.textCursor()
-        # Scanning whole document
-        cursor.movePosition(QTextCursor.Start)
-        regexp = QRegExp(r"\b%s\b" % QRegExp.escape(text), Qt.CaseSensitive)
-        cursor = self.document().find(regexp, cursor, flags)
-        self.__find_first_pos = cursor.position()
-        return cursor
-
-    def __find_next(self, text, cursor):
-        """Find next occurrence"""
-        flags = QTextDocument.FindCaseSensitively|QTextDocument.FindWholeWords
-        regexp = QRegExp(r"\b%s\b" % QRegExp.escape(text), Qt.CaseSensitive)
-        cursor = self.document().find(regexp, cursor, flags)
-        if cursor.position() != self.__find_first_pos:
-            return cursor
+    def set_document_indexes(self):
+        """Use the identifier and task indexes of the current document,
+        which are shared with the clones of this editor"""
+        indexes = get_document_indexes(self.document())
+        self.document_indexes = indexes
+        self.identifier_index = indexes.identifier_index
+        self.task_index = indexes.task_index
+
+    def get_visible_line_range(self, margin=10):
+        """
+        Return the range of visible lines (0-based, last line included),
+        extended by *margin* lines on each side
+        """
+        first = self.firstVisibleBlock().blockNumber()
+        bottom = QPoint(0, self.viewport().height()-1)
+        last = self.cursorForPosition(bottom).blockNumber()
+        return (max(first-margin, 0),
+                min(last+margin, self.document().blockCount()-1))
 
     def __cursor_position_changed(self):
         """Cursor position has changed"""
@@ -955,6 +1015,7 @@ class CodeEditor(TextEditBaseWidget):
     def __clear_occurrences(self):
         """Clear occurrence markers"""
         self.occurrences = []
+        self.occurrence_word = None
         self.clear_extra_selections('occurrences')
         self.scrollflagarea.update()
 
@@ -963,6 +1024,19 @@ class CodeEditor(TextEditBaseWidget):
                         underline_style=QTextCharFormat.SpellCheckUnderline,
                         update=False):
         extra_selections = self.get_extra_selections(key)
+        extra_selections.append(self.__make_selection(cursor,
+                                    foreground_color=foreground_color,
+                                    background_color=background_color,
+                                    underline_color=underline_color,
+                                    underline_style=underline_style))
+        self.set_extra_selections(key, extra_selections)
+        if update:
+            self.update_extra_selections()
+
+    def __make_selection(self, cursor, foreground_color=None,
+                         background_color=None, underline_color=None,
+                         underline_style=QTextCharFormat.SpellCheckUnderline):
+        """Return an extra selection for *cursor*"""
         selection = QTextEdit.ExtraSelection()
         if foreground_color is not None:
             selection.format.setForeground(foreground_color)
@@ -976,10 +1050,14 @@ class CodeEditor(TextEditBaseWidget):
         selection.format.setProperty(QTextFormat.FullWidthSelection,
                                      to_qvariant(True))
         selection.cursor = cursor
-        extra_selections.append(selection)
-        self.set_extra_selections(key, extra_selections)
-        if update:
-            self.update_extra_selections()
+        return selection
+
+    def __make_span_cursor(self, start, end):
+        """Return a text cursor selecting text from *start* to *end*"""
+        cursor = self.textCursor()
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        return cursor
 
     def __mark_occurrences(self):
         """Marking occurrences of the currently selected word"""
@@ -999,46 +1077,96 @@ class CodeEditor(TextEditBaseWidget):
            to_text_string(text) == 'self'):
             return
 
-        # Highlighting all occurrences of word *text*
-        cursor = self.__find_first(text)
-        self.occurrences = []
-        while cursor:
-            self.occurrences.append(cursor.blockNumber())
-            self.__highlight_selection('occurrences', cursor,
-                                       background_color=self.occurrence_color)
-            cursor = self.__find_next(text, cursor)
-        self.update_extra_selections()
-        if len(self.occurrences) > 1 and self.occurrences[-1] == 0:
-            # XXX: this is never happening with PySide but it's necessary
-            # for PyQt4... this must be related to a different behavior for
-            # the QTextDocument.find function between those two libraries
-            self.occurrences.pop(-1)
+        # Occurrences are taken from the identifier index: scroll flags are
+        # set for all of them but only the visible ones are highlighted
+        text = to_text_string(text)
+        if WORD_PATTERN.match(text).group() != text:
+            return
+        self.occurrence_word = text
+        self.occurrences = self.identifier_index.find_lines(text)
+        self.__highlight_visible_occurrences()
         self.scrollflagarea.update()
 
+    def __highlight_visible_occurrences(self):
+        """Highlight occurrences of the current word in the visible range"""
+        text = self.occurrence_word
+        extra_selections = []
+        if text is not None:
+            first, last = self.get_visible_line_range()
+            document = self.document()
+            for line_number, columns in self.identifier_index.find(text,
+                                                               first, last+1):
+                position = document.findBlockByNumber(line_number).position()
+                for column in columns:
+                    start = position+column
+                    cursor = self.__make_span_cursor(start, start+len(text))
+                    extra_selections.append(self.__make_selection(cursor,
+                                    background_color=self.occurrence_color))
+        self.set_extra_selections('occurrences', extra_selections)
+        self.update_extra_selections()
+
+    def __highlight_visible_range(self):
+        """Update occurrences and found results highlighting after scrolling"""
+        if self.occurrence_word is not None:
+            self.__highlight_visible_occurrences()
+        if self.__found_spans:
+            self.__highlight_visible_found_results()
+
     #-----highlight found results (find/replace widget)
     def highlight_found_results(self, pattern, words=False, regexp=False):
         """Highlight all found patterns"""
         pattern = to_text_string(pattern)
         if not pattern:
             return
-        if not regexp:
-            pattern = re.escape(to_text_string(pattern))
-        pattern = r"\b%s\b" % pattern if words else pattern
-        text = to_text_string(self.toPlainText())
-        try:
-            regobj = re.compile(pattern)
-        except sre_constants.error:
-            return
-        extra_selections = []
+        self.__found_spans = []
         self.found_results = []
-        for match in regobj.finditer(text):
-            pos1, pos2 = match.span()
+        match = WORD_PATTERN.match(pattern)
+        if words and not regexp and match and match.group() == pattern:
+            # Whole words: use the identifier index instead of scanning text
+            document = self.document()
+            length = len(pattern)
+            for line_number, columns in self.identifier_index.find(pattern):
+                position = document.findBlockByNumber(line_number).position()
+                self.found_results.append(line_number)
+                for column in columns:
+                    start = position+column
+                    self.__found_spans.append((start, start+length))
+        else:
+            if not regexp:
+                pattern = re.escape(to_text_string(pattern))
+            pattern = r"\b%s\b" % pattern if words else pattern
+            text = to_text_string(self.toPlainText())
+            try:
+                regobj = re.compile(pattern)
+            except sre_constants.error:
+                return
+            line_number = 0
+            line_start = 0
+            for match in regobj.finditer(text):
+                pos1, pos2 = match.span()
+                line_number += text.count('\n', line_start, pos1)
+                line_start = pos1
+                if not self.found_results or \
+                   self.found_results[-1] != line_number:
+                    self.found_results.append(line_number)
+                self.__found_spans.append((pos1, pos2))
+        self.__highlight_visible_found_results()
+
+    def __highlight_visible_found_results(self):
+        """Highlight found results in the visible range"""
+        first, last = self.get_visible_line_range()
+        document = self.document()
+        start_pos = document.findBlockByNumber(first).position()
+        last_block = document.findBlockByNumber(last)
+        end_pos = last_block.position()+last_block.length()
+        index = bisect.bisect_left(self.__found_spans, (start_pos, ))
+        extra_selections = []
+        for pos1, pos2 in self.__found_spans[index:]:
+            if pos1 > end_pos:
+                break
             selection = QTextEdit.ExtraSelection()
             selection.format.setBackground(self.found_results_color)
-            selection.cursor = self.textCursor()
-            selection.cursor.setPosition(pos1)
-            self.found_results.append(selection.cursor.blockNumber())
-            selection.cursor.setPosition(pos2, QTextCursor.KeepAnchor)
+            selection.cursor = self.__make_span_cursor(pos1, pos2)
             extra_selections.append(selection)
         self.set_extra_selections('find', extra_selections)
         self.update_extra_selections()
@@ -1046,6 +1174,7 @@ class CodeEditor(TextEditBaseWidget):
     def clear_found_results(self):
         """Clear found results highlighting"""
         self.found_results = []
+        self.__found_spans = []
         self.clear_extra_selections('find')
         self.scrollflagarea.update()
 
@@ -1187,6 +1316,9 @@ class CodeEditor(TextEditBaseWidget):
         check = self.linenumberarea_released == -1
         if data and data.code_analysis and check:
             self.__show_code_analysis_results(line_number, data.code_analysis)
+        elif data and data.line_profile and check:
+            self.show_calltip(_("Profiler"), data.line_profile,
+                              color=self.warning_color, at_line=line_number)
 
         if event.buttons() == Qt.LeftButton:
             self.linenumberarea_released = line_number
@@ -1408,19 +1540,17 @@ class CodeEditor(TextEditBaseWidget):
                     painter.drawRect(make_flag(position))
             block = block.next()
 
-        # Occurrences
-        if self.occurrences:
-            set_scrollflagarea_painter(painter, self.occurrence_color)
-            for line_number in self.occurrences:
-                position = self.scrollflagarea.value_to_position(line_number)
-                painter.drawRect(make_flag(position))
-
-        # Found results
-        if self.found_results:
-            set_scrollflagarea_painter(painter, self.found_results_color)
-            for line_number in self.found_results:
-                position = self.scrollflagarea.value_to_position(line_number)
-                painter.drawRect(make_flag(position))
+        # Occurrences and found results (only one flag is painted per
+        # position, whatever the number of lines sharing it)
+        for line_numbers, color in ((self.occurrences, self.occurrence_color),
+                                    (self.found_results,
+                                     self.found_results_color)):
+            if line_numbers:
+                set_scrollflagarea_painter(painter, color)
+                positions = set([self.scrollflagarea.value_to_position(
+                                 line_number) for line_number in line_numbers])
+                for position in positions:
+                    painter.drawRect(make_flag(position))
 
         # Painting the slider range
         pen_color = QColor(Qt.white)
@@ -1622,48 +1752,27 @@ class CodeEditor(TextEditBaseWidget):
             # Not able to compile module
             return
         self.setUpdatesEnabled(False)
-        cursor = self.textCursor()
         document = self.document()
-        flags = QTextDocument.FindCaseSensitively|QTextDocument.FindWholeWords
-        for message, line_number in check_results:
+        extra_selections = []
+        for message, line_number, column, length in check_results:
             error = 'syntax' in message
             # Note: line_number start from 1 (not 0)
-            block = self.document().findBlockByNumber(line_number-1)
+            block = document.findBlockByNumber(line_number-1)
             data = block.userData()
             if not data:
                 data = BlockUserData(self)
             data.code_analysis.append( (message, error) )
             block.setUserData(data)
-            refs = re.findall(r"\'[a-zA-Z0-9_]*\'", message)
-            for ref in refs:
-                # Highlighting found references
-                text = ref[1:-1]
-                # Scanning line number *line* and following lines if continued
-                def is_line_splitted(line_no):
-                    text = to_text_string(
-                                document.findBlockByNumber(line_no).text())
-                    stripped = text.strip()
-                    return stripped.endswith('\\') or stripped.endswith(',') \
-                           or len(stripped) == 0
-                line2 = line_number-1
-                while line2 < self.blockCount()-1 and is_line_splitted(line2):
-                    line2 += 1
-                cursor.setPosition(block.position())
-                cursor.movePosition(QTextCursor.StartOfBlock)
-                regexp = QRegExp(r"\b%s\b" % QRegExp.escape(text),
-                                 Qt.CaseSensitive)
+            # Underlining the exact range reported by the checker
+            column = min(column, block.length()-1)
+            length = min(length, block.length()-1-column)
+            if length > 0:
+                start = block.position()+column
+                cursor = self.__make_span_cursor(start, start+length)
                 color = self.error_color if error else self.warning_color
-                # Highlighting all occurrences (this is a compromise as pyflakes
-                # do not provide the column number -- see Issue 709 on Spyder's
-                # GoogleCode project website)
-                cursor = document.find(regexp, cursor, flags)
-                if cursor:
-                    while cursor and cursor.blockNumber() <= line2 \
-                          and cursor.blockNumber() >= line_number-1 \
-                          and cursor.position() > 0:
-                        self.__highlight_selection('code_analysis', cursor,
-                                       underline_color=QColor(color))
-                        cursor = document.find(text, cursor, flags)
+                extra_selections.append(self.__make_selection(cursor,
+                                              underline_color=QColor(color)))
+        self.set_extra_selections('code_analysis', extra_selections)
         self.update_extra_selections()
         self.setUpdatesEnabled(True)
         self.linenumberarea.update()
@@ -1710,6 +1819,42 @@ class CodeEditor(TextEditBaseWidget):
         return self.get_position('cursor')
 
 
+    #------Line profile
+    def cleanup_line_profile(self):
+        """Remove line profile annotations"""
+        self.clear_extra_selections('line_profile')
+        for data in self.blockuserdata_list[:]:
+            data.line_profile = None
+        self.linenumberarea.update()
+
+    def set_line_profile(self, line_profile):
+        """Annotate lines with profiling results
+        line_profile: {line number: (text, weight)}, where weight (between 0
+        and 1) sets the intensity of the line highlighting"""
+        self.cleanup_line_profile()
+        if not line_profile:
+            return
+        document = self.document()
+        extra_selections = []
+        for line_number, (text, weight) in line_profile.items():
+            # Note: line_number start from 1 (not 0)
+            block = document.findBlockByNumber(line_number-1)
+            if not block.isValid():
+                continue
+            data = block.userData()
+            if not data:
+                data = BlockUserData(self)
+            data.line_profile = text
+            block.setUserData(data)
+            color = QColor(self.warning_color)
+            color.setAlphaF(0.05+0.55*min(max(weight, 0.), 1.))
+            extra_selections.append(self.__make_selection(QTextCursor(block),
+                                                      background_color=color))
+        self.set_extra_selections('line_profile', extra_selections)
+        self.update_extra_selections()
+        self.linenumberarea.update()
+
+
     #------Tasks management
     def go_to_next_todo(self):
         """Go to next todo and return new cursor position"""
@@ -1729,19 +1874,29 @@ class CodeEditor(TextEditBaseWidget):
                           color='#3096FC', at_line=line_number)
         return self.get_position('cursor')
 
+    def get_todo_results(self):
+        """Return todo finder results, from the (incrementally updated)
+        task index"""
+        return self.task_index.get_tasks()
+
     def process_todo(self, todo_results):
-        """Process todo finder results"""
-        for data in self.blockuserdata_list[:]:
-            data.todo = ''
-            if data.is_empty():
-                del data
+        """Process todo finder results
+        Only blocks whose todo has changed are updated"""
+        document = self.document()
+        todo_ids = set()
         for message, line_number in todo_results:
-            block = self.document().findBlockByNumber(line_number-1)
+            block = document.findBlockByNumber(line_number-1)
             data = block.userData()
             if not data:
                 data = BlockUserData(self)
+                block.setUserData(data)
             data.todo = message
-            block.setUserData(data)
+            todo_ids.add(id(data))
+        for data in self.blockuserdata_list[:]:
+            if data.todo and id(data) not in todo_ids:
+                data.todo = ''
+                if data.is_empty():
+                    del data
         self.scrollflagarea.update()
 
 
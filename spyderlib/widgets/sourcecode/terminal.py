@@ -56,7 +56,10 @@ class ANSIEscapeCodeHandler(object):
         self.default_foreground_color = 30
         self.default_background_color = 47
         
-    def set_code(self, code):
+    def set_code(self, code, update_style=True):
+        """Set ANSI code *code*
+        update_style=False: the style is not updated (set_style has to be
+        called once a sequence of codes has been set)"""
         assert isinstance(code, int)
         if code == 0:
             # Reset all settings
@@ -95,7 +98,8 @@ class ANSIEscapeCodeHandler(object):
         elif code == 49:
             # Default background color
             self.background_color = self.default_background_color
-        self.set_style()
+        if update_style:
+            self.set_style()
         
     def set_style(self):
         """
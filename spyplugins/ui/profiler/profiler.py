@@ -9,6 +9,7 @@
 """Profiler Plugin."""
 
 # Standard library imports
+import os
 import os.path as osp
 
 # Third party imports
@@ -20,7 +21,9 @@ from spyderlib.config.base import get_translation
 from spyderlib.plugins import SpyderPluginMixin, PluginConfigPage, runconfig
 from spyderlib.utils import icon_manager as ima
 from spyderlib.utils.qthelpers import create_action
-from .widgets.profilergui import (ProfilerWidget, is_profiler_installed)
+from .widgets.profilergui import (FUNCTIONS, ProfilerWidget,
+                                  is_profiler_installed)
+from .widgets.profilerrunner import SAMPLING_FREQUENCY
 
 
 _ = get_translation("profiler", "spyplugins.ui.profiler")
@@ -47,8 +50,25 @@ class ProfilerConfigPage(PluginConfigPage):
         results_layout.addWidget(results_label2)
         results_group.setLayout(results_layout)
 
+        modes_group = QGroupBox(_("Profiling modes"))
+        frequency_box = self.create_spinbox(_("Sampling frequency:"), _("Hz"),
+                                'sampling_frequency', SAMPLING_FREQUENCY,
+                                min_=1, max_=1000, step=10,
+                                tip=_("Frequency at which the call stack is "
+                                      "sampled in sampling mode"))
+        paths_edit = self.create_lineedit(_("Files or directories timed in "
+                                            "lines mode, in addition to the "
+                                            "profiled script (separated by "
+                                            "'%s'):") % os.pathsep,
+                                          'line_paths', '')
+        modes_layout = QVBoxLayout()
+        modes_layout.addWidget(frequency_box)
+        modes_layout.addWidget(paths_edit)
+        modes_group.setLayout(modes_layout)
+
         vlayout = QVBoxLayout()
         vlayout.addWidget(results_group)
+        vlayout.addWidget(modes_group)
         vlayout.addStretch(1)
         self.setLayout(vlayout)
 
@@ -63,6 +83,11 @@ class Profiler(ProfilerWidget, SpyderPluginMixin):
         ProfilerWidget.__init__(self, parent=parent,
                               max_entries=self.get_option('max_entries', 50))
         SpyderPluginMixin.__init__(self, parent)
+        self.set_mode(self.get_option('mode', FUNCTIONS))
+        self.mode_combo.currentIndexChanged.connect(
+                                lambda index: self.set_option('mode',
+                                                              self.get_mode()))
+        self.apply_mode_settings()
         
         # Initialize plugin
         self.initialize_plugin()
@@ -96,6 +121,7 @@ class Profiler(ProfilerWidget, SpyderPluginMixin):
     def register_plugin(self):
         """Register plugin in Spyder's main window"""
         self.edit_goto.connect(self.main.editor.load)
+        self.sig_line_profiles.connect(self.main.editor.set_line_profiles)
         self.redirect_stdio.connect(self.main.redirect_internalshell_stdio)
         self.main.add_dockwidget(self)
 
@@ -121,9 +147,17 @@ class Profiler(ProfilerWidget, SpyderPluginMixin):
         """Apply configuration file's plugin settings"""
         # The history depth option will be applied at 
         # next Spyder startup, which is soon enough
-        pass
+        self.apply_mode_settings()
         
     #------ Public API ---------------------------------------------------------        
+    def apply_mode_settings(self):
+        """Apply settings of the sampling and lines modes"""
+        self.sampling_frequency = self.get_option('sampling_frequency',
+                                                  SAMPLING_FREQUENCY)
+        self.line_paths = [path.strip() for path in
+                           self.get_option('line_paths', '').split(os.pathsep)
+                           if path.strip()]
+
     def run_profiler(self):
         """Run profiler"""
         if self.main.editor.save():
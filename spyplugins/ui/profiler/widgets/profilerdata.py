@@ -0,0 +1,496 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Profiler data
+
+Results saved by the profile/cProfile modules are processed here, without
+any Qt dependency, so that they may be loaded in a worker thread.
+
+The quantities calculated by the profiler are as follows
+(from profile.Profile), for each function (filename, line number, name):
+[0] = The number of times this function was called, not counting direct
+      or indirect recursion,
+[1] = Number of times this function appears on the stack, minus one
+[2] = Total time spent internal to this function
+[3] = Cumulative time that this function was present on the stack.  In
+      non-recursive functions, this is the total execution time from start
+      to finish of each invocation of a function, including time spent in
+      all subfunctions.
+[4] = A dictionary indicating for each function name, the number of times
+      it was called by us.
+
+Two results may be compared (see ProfileDiff), e.g. to detect performance
+regressions from the command line:
+python profilerdata.py [options] results.Result reference.Result
+(the exit status is 1 if regressions were found)
+
+Results of the sampling and lines modes (see profilerrunner) are loaded by
+SamplingData and LineTimingData.
+"""
+
+from __future__ import print_function
+
+import csv
+import json
+import optparse
+import os.path as osp
+import pstats
+import sys
+
+from spyderlib.py3compat import PY2
+
+
+# Values of a function which is not in the profile
+NO_STATS = (0, 0, 0., 0., {})
+
+# A function is flagged as a regression when its share of the total runtime
+# (self time) grew by more than this threshold (percentage points)
+REGRESSION_THRESHOLD = 1.
+
+
+def function_info(key):
+    """Return processed information about the name and file of function
+    *key*: (filename, line number, function name, file:line, node type)"""
+    node_type = 'function'
+    filename, line_number, function_name = key
+    if function_name == '<module>':
+        module_path, module_name = osp.split(filename)
+        node_type = 'module'
+        if module_name == '__init__.py':
+            module_path, module_name = osp.split(module_path)
+        function_name = '<' + module_name + '>'
+    if not filename or filename == '~':
+        file_and_line = '(built-in)'
+        node_type = 'builtin'
+    else:
+        if function_name == '__init__':
+            node_type = 'constructor'
+        file_and_line = '%s : %d' % (filename, line_number)
+    return filename, line_number, function_name, file_and_line, node_type
+
+
+class Hotspot(object):
+    """Profiled function, as shown in the flat hotspots view"""
+    __slots__ = ('key', 'name', 'file_and_line', 'node_type', 'self_time',
+                 'cum_time', 'calls', 'per_call', 'search_text')
+
+    def __init__(self, key, values):
+        primcalls, calls, self_time, cum_time, _callers = values
+        (_filename, _line_number, self.name, self.file_and_line,
+         self.node_type) = function_info(key)
+        self.key = key
+        self.self_time = self_time
+        self.cum_time = cum_time
+        self.calls = calls
+        self.per_call = cum_time/primcalls if primcalls else 0.
+        self.search_text = (self.name + ' ' + self.file_and_line).lower()
+
+
+class ProfilerData(object):
+    """Profiling results loaded from file *filename*"""
+    def __init__(self, filename):
+        self.filename = filename
+        self.pstats = pstats.Stats(filename)
+        self.pstats.calc_callees()
+        self.stats = self.pstats.stats
+        self.root = self.find_root()
+        self.hotspots = None
+
+    def find_root(self):
+        """Find a function without a caller"""
+        self.pstats.sort_stats("cumulative")
+        for func in self.pstats.fcn_list:
+            if ('~', 0) != func[0:2] and not func[2].startswith(
+                    '<built-in method exec>'):
+                # This skips the profiler function at the top of the list
+                # it does only occur in Python 3
+                return func
+
+    def get_callees(self, key):
+        """Return functions called by function *key*"""
+        return list(self.pstats.all_callees.get(key, {}).keys())
+
+    def has_callees(self, key):
+        """Return True if function *key* calls other functions"""
+        return len(self.pstats.all_callees.get(key, ())) > 0
+
+    def get_values(self, key):
+        """Return (calls, self time, cumulative time) of function *key*"""
+        return self.stats.get(key, NO_STATS)[1:4]
+
+    def get_total_time(self):
+        """Return total runtime (sum of self times)"""
+        return self.pstats.total_tt
+
+    def get_hotspots(self):
+        """Return the list of all profiled functions (Hotspot instances)"""
+        if self.hotspots is None:
+            self.hotspots = [Hotspot(key, values)
+                             for key, values in self.stats.items()]
+        return self.hotspots
+
+    def save(self, filename):
+        """Save profiling results to *filename*"""
+        self.pstats.dump_stats(filename)
+
+
+def open_csv_file(filename):
+    """Open *filename* to write CSV data"""
+    if PY2:
+        return open(filename, 'wb')
+    else:
+        return open(filename, 'w', newline='')
+
+
+def get_function_id(key, ambiguous_names=()):
+    """Return the identifier of function *key* used to compare results:
+    (filename, function name), so that functions which moved within their
+    file are still matched, or (filename, function name, first line) if
+    (filename, function name) is in *ambiguous_names*"""
+    if (key[0], key[2]) in ambiguous_names:
+        return key[0], key[2], key[1]
+    return key[0], key[2]
+
+
+def get_ambiguous_names(*profiles):
+    """Return the (filename, function name) pairs shared by several
+    functions of one of *profiles* (e.g. __init__, <lambda>, <genexpr>)"""
+    ambiguous_names = set()
+    for profdata in profiles:
+        lines = {}
+        for filename, line_number, function_name in profdata.stats:
+            name = (filename, function_name)
+            if lines.setdefault(name, line_number) != line_number:
+                ambiguous_names.add(name)
+    return ambiguous_names
+
+
+def get_share(time, total_time):
+    """Return share of total runtime (%)"""
+    return 100.*time/total_time if total_time else 0.
+
+
+def get_relative_delta(value, reference_value):
+    """Return relative delta (None if there is no reference value)"""
+    if reference_value:
+        return (value-reference_value)/float(reference_value)
+
+
+class FunctionDiff(object):
+    """Comparison of the values of a function in two profiling results
+    Times are compared in seconds and as a share of the total runtime (%)"""
+    CSV_HEADER = ('file', 'function', 'calls', 'reference calls',
+                  'self time', 'reference self time', 'self time delta',
+                  'self time relative delta', 'cumulative time',
+                  'reference cumulative time', 'cumulative time delta',
+                  'cumulative time relative delta', 'self share (%)',
+                  'reference self share (%)', 'self share delta',
+                  'cumulative share (%)', 'reference cumulative share (%)',
+                  'cumulative share delta', 'regression')
+
+    def __init__(self, function_id, values, reference_values, total_time,
+                 reference_total_time, threshold):
+        self.filename, function_name = function_id[:2]
+        self.name = function_info((self.filename, 0, function_name))[2]
+        if len(function_id) > 2:
+            # Function name is shared by several functions of the file
+            self.name = '%s:%d' % (self.name, function_id[2])
+        self.calls, self.self_time, self.cum_time = values
+        (self.ref_calls, self.ref_self_time,
+         self.ref_cum_time) = reference_values
+        self.calls_delta = self.calls-self.ref_calls
+        self.self_delta = self.self_time-self.ref_self_time
+        self.cum_delta = self.cum_time-self.ref_cum_time
+        self.self_share = get_share(self.self_time, total_time)
+        self.ref_self_share = get_share(self.ref_self_time,
+                                        reference_total_time)
+        self.cum_share = get_share(self.cum_time, total_time)
+        self.ref_cum_share = get_share(self.ref_cum_time,
+                                       reference_total_time)
+        self.self_share_delta = self.self_share-self.ref_self_share
+        self.cum_share_delta = self.cum_share-self.ref_cum_share
+        self.regression = self.self_share_delta > threshold
+
+    def get_csv_values(self):
+        """Return values of CSV row"""
+        values = (self.filename, self.name, self.calls, self.ref_calls,
+                  self.self_time, self.ref_self_time, self.self_delta,
+                  get_relative_delta(self.self_time, self.ref_self_time),
+                  self.cum_time, self.ref_cum_time, self.cum_delta,
+                  get_relative_delta(self.cum_time, self.ref_cum_time),
+                  self.self_share, self.ref_self_share, self.self_share_delta,
+                  self.cum_share, self.ref_cum_share, self.cum_share_delta,
+                  int(self.regression))
+        return ['' if value is None else value for value in values]
+
+    def get_text_values(self):
+        """Return values of text report row"""
+        relative_deltas = []
+        for value, reference_value in ((self.self_time, self.ref_self_time),
+                                       (self.cum_time, self.ref_cum_time)):
+            relative_delta = get_relative_delta(value, reference_value)
+            if relative_delta is None:
+                relative_deltas.append('new' if value else '')
+            else:
+                relative_deltas.append('%+.0f%%' % (100*relative_delta))
+        return (self.name[:36], self.self_time, self.self_delta,
+                relative_deltas[0], self.self_share_delta, self.cum_time,
+                self.cum_delta, relative_deltas[1], self.cum_share_delta,
+                ' !' if self.regression else '')
+
+
+def get_function_values(profdata, ambiguous_names=()):
+    """Return {function id: (calls, self time, cumulative time)} of
+    profiling results *profdata* (functions sharing the same identifier are
+    summed up, see `get_function_id`)"""
+    values = {}
+    for key, (_primcalls, calls, self_time, cum_time,
+              _callers) in profdata.stats.items():
+        function_id = get_function_id(key, ambiguous_names)
+        if function_id in values:
+            old_calls, old_self_time, old_cum_time = values[function_id]
+            values[function_id] = (old_calls+calls, old_self_time+self_time,
+                                   old_cum_time+cum_time)
+        else:
+            values[function_id] = (calls, self_time, cum_time)
+    return values
+
+
+class ProfileDiff(object):
+    """Comparison of profiling results *profdata* to *reference* results
+    Functions are matched by file and name (and first line if the name is
+    shared by several functions of the file), and their times are normalized
+    by the total runtime of each profile: a function is flagged as a
+    regression when its share of the runtime (self time) grew by more than
+    *threshold* percentage points"""
+    def __init__(self, profdata, reference, threshold=REGRESSION_THRESHOLD):
+        self.threshold = threshold
+        self.total_time = profdata.get_total_time()
+        self.ref_total_time = reference.get_total_time()
+        self.ambiguous_names = get_ambiguous_names(profdata, reference)
+        values = get_function_values(profdata, self.ambiguous_names)
+        ref_values = get_function_values(reference, self.ambiguous_names)
+        self.functions = {}
+        for function_id in set(values) | set(ref_values):
+            self.functions[function_id] = FunctionDiff(function_id,
+                                    values.get(function_id, (0, 0., 0.)),
+                                    ref_values.get(function_id, (0, 0., 0.)),
+                                    self.total_time, self.ref_total_time,
+                                    threshold)
+
+    def get(self, key):
+        """Return comparison of function *key* (FunctionDiff instance)"""
+        return self.functions.get(get_function_id(key, self.ambiguous_names))
+
+    def get_rows(self):
+        """Return comparison of all functions, sorted by decreasing growth
+        of their share of runtime"""
+        return sorted(self.functions.values(),
+                      key=lambda row: (-row.self_share_delta,
+                                       -row.cum_share_delta))
+
+    def get_regressions(self):
+        """Return functions flagged as regressions"""
+        return [row for row in self.get_rows() if row.regression]
+
+    def write_csv(self, fdesc):
+        """Write comparison of all functions as CSV to file *fdesc*"""
+        writer = csv.writer(fdesc)
+        writer.writerow(FunctionDiff.CSV_HEADER)
+        for row in self.get_rows():
+            writer.writerow(row.get_csv_values())
+
+    def get_text_report(self, limit=None):
+        """Return comparison of the *limit* first functions (text)"""
+        lines = ["Total time: %.3f s (reference: %.3f s, %+.3f s)"
+                 % (self.total_time, self.ref_total_time,
+                    self.total_time-self.ref_total_time),
+                 "Regressions (share of runtime grew by more than %.1f%%): %d"
+                 % (self.threshold, len(self.get_regressions())),
+                 "",
+                 "%-36s %9s %9s %7s %8s %9s %9s %7s %8s" % ("Function",
+                 "self (s)", "delta", "rel.", "share", "cum (s)", "delta",
+                 "rel.", "share")]
+        for row in self.get_rows()[:limit]:
+            lines.append("%-36s %9.3f %+9.3f %7s %+7.2f%% %9.3f %+9.3f %7s "
+                         "%+7.2f%%%s" % row.get_text_values())
+        return "\n".join(lines)
+
+    def save(self, filename):
+        """Save comparison to *filename*: CSV if its extension is .csv,
+        text report otherwise"""
+        if osp.splitext(filename)[1].lower() == '.csv':
+            with open_csv_file(filename) as fdesc:
+                self.write_csv(fdesc)
+        else:
+            with open(filename, 'w') as fdesc:
+                fdesc.write(self.get_text_report() + "\n")
+
+
+class FlameNode(object):
+    """Node of the flame graph: function *key* (filename, first line,
+    name) called by the function of *parent*, with the number of samples
+    in which it was on the stack"""
+    __slots__ = ('key', 'parent', 'count', 'children')
+
+    def __init__(self, key, parent=None):
+        self.key = key
+        self.parent = parent
+        self.count = 0
+        self.children = {}  # key: FlameNode
+
+    def get_child(self, key):
+        """Return child node of function *key* (create it if needed)"""
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = FlameNode(key, self)
+        return child
+
+    def get_depth(self):
+        """Return depth of the subtree of this node"""
+        depth = 0
+        nodes = [(self, 0)]
+        while nodes:
+            node, node_depth = nodes.pop()
+            depth = max(depth, node_depth)
+            nodes.extend([(child, node_depth+1)
+                          for child in node.children.values()])
+        return depth
+
+
+class SamplingData(object):
+    """Results of the sampling profiler loaded from file *filename*"""
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename) as fdesc:
+            results = json.load(fdesc)
+        self.duration = results['duration']
+        self.samples = results['samples']
+        # Time represented by a sample (the actual sampling frequency may be
+        # lower than the requested one)
+        self.sample_time = self.duration/self.samples if self.samples else 0.
+        self.frames = [tuple(frame) for frame in results['frames']]
+        self.stacks = [(tuple([self.frames[index] for index in stack]),
+                        count) for stack, count in results['stacks']]
+        self.lines = results['lines']
+
+    def get_flame_tree(self):
+        """Return root of the flame graph (FlameNode instance)"""
+        root = FlameNode(None)
+        for stack, count in self.stacks:
+            root.count += count
+            node = root
+            for key in stack:
+                node = node.get_child(key)
+                node.count += count
+        return root
+
+    def get_collapsed_stacks(self):
+        """Return stacks in the collapsed format of flame graph tools
+        (one 'function;function;... count' line per stack)"""
+        lines = []
+        for stack, count in self.stacks:
+            names = ["%s (%s:%d)" % (name, filename, line_number)
+                     for filename, line_number, name in stack]
+            lines.append("%s %d" % (";".join(names), count))
+        return "\n".join(sorted(lines))
+
+    def get_line_profiles(self):
+        """Return {filename: {line number: (samples, time)}}"""
+        profiles = {}
+        for filename, line_number, count in self.lines:
+            profiles.setdefault(filename, {})[line_number] = (
+                                                count, count*self.sample_time)
+        return profiles
+
+    def save(self, filename):
+        """Save collapsed stacks to *filename*"""
+        with open(filename, 'w') as fdesc:
+            fdesc.write(self.get_collapsed_stacks() + "\n")
+
+
+class LineTimingData(object):
+    """Results of the line timer loaded from file *filename*"""
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename) as fdesc:
+            results = json.load(fdesc)
+        self.duration = results['duration']
+        self.lines = results['lines']
+
+    def get_line_profiles(self):
+        """Return {filename: {line number: (hits, time)}}"""
+        profiles = {}
+        for filename, line_number, hits, duration in self.lines:
+            profiles.setdefault(filename, {})[line_number] = (hits, duration)
+        return profiles
+
+    def save(self, filename):
+        """Save line timings to *filename* (CSV)"""
+        with open_csv_file(filename) as fdesc:
+            writer = csv.writer(fdesc)
+            writer.writerow(('file', 'line', 'hits', 'time'))
+            for row in sorted(self.lines):
+                writer.writerow(row)
+
+
+def main(args=None):
+    """Compare two profiling results from the command line
+    Return 1 if regressions were found, 0 otherwise"""
+    parser = optparse.OptionParser(
+                usage="%prog [options] results.Result reference.Result")
+    parser.add_option('-t', '--threshold', type='float',
+                      default=REGRESSION_THRESHOLD,
+                      help="Regression threshold: growth of the share of "
+                           "runtime of a function (percentage points)")
+    parser.add_option('-n', '--limit', type='int', default=30,
+                      help="Number of functions shown (0: all)")
+    parser.add_option('-o', '--output',
+                      help="Save comparison of all functions to OUTPUT "
+                           "(CSV if its extension is .csv, text otherwise)")
+    options, args = parser.parse_args(args)
+    if len(args) != 2:
+        parser.error("Two profiling results are required")
+    profdiff = ProfileDiff(ProfilerData(args[0]), ProfilerData(args[1]),
+                           options.threshold)
+    print(profdiff.get_text_report(options.limit or None))
+    if options.output:
+        profdiff.save(options.output)
+    return 1 if profdiff.get_regressions() else 0
+
+
+def test():
+    """Profile a few functions, print hotspots and compare results"""
+    import cProfile
+    import tempfile
+    dirname = tempfile.mkdtemp()
+    filename = osp.join(dirname, 'test.Result')
+    cProfile.run("sorted([str(i) for i in range(100000)])", filename)
+    data = ProfilerData(filename)
+    assert data.root is not None
+    hotspots = sorted(data.get_hotspots(), key=lambda row: -row.self_time)
+    for hotspot in hotspots[:5]:
+        print("%-40s %8.3f %8.3f %8d" % (hotspot.name, hotspot.self_time,
+                                         hotspot.cum_time, hotspot.calls))
+    reference_filename = osp.join(dirname, 'reference.Result')
+    cProfile.run("sorted([i for i in range(100000)])", reference_filename)
+    profdiff = ProfileDiff(data, ProfilerData(reference_filename))
+    # Times are normalized by the total runtime of each profile
+    for attribute in ('self_share', 'ref_self_share'):
+        total_share = sum([getattr(row, attribute)
+                           for row in profdiff.get_rows()])
+        assert abs(total_share-100.) < 1e-6, total_share
+    print("")
+    print(profdiff.get_text_report(5))
+    profdiff.save(osp.join(dirname, 'comparison.csv'))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    else:
+        test()
@@ -22,22 +22,31 @@ import time
 
 # Third party imports
 from qtpy.compat import getopenfilename, getsavefilename
-from qtpy.QtCore import (QByteArray, QProcess, QProcessEnvironment, QTextCodec,
-                         Qt, Signal)
-from qtpy.QtGui import QColor
-from qtpy.QtWidgets import (QApplication, QHBoxLayout, QLabel, QMessageBox,
-                            QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget)
+from qtpy.QtCore import (QAbstractItemModel, QAbstractTableModel, QByteArray,
+                         QEvent, QModelIndex, QProcess, QProcessEnvironment,
+                         QRect, QTextCodec, QThread, Qt, Signal)
+from qtpy.QtGui import QColor, QPainter
+from qtpy.QtWidgets import (QComboBox, QHBoxLayout, QLabel, QLineEdit,
+                            QMessageBox, QScrollArea, QTableView, QTabWidget,
+                            QToolTip, QTreeView, QVBoxLayout, QWidget)
 
 # Local imports
 from spyderlib.config.base import get_conf_path, get_translation
 from spyderlib.py3compat import getcwd, to_text_string
 from spyderlib.utils import icon_manager as ima
-from spyderlib.utils.qthelpers import (create_toolbutton, get_item_user_text,
-                                       set_item_user_text)
+from spyderlib.utils.qthelpers import create_toolbutton
 from spyderlib.utils.programs import shell_split
 from spyderlib.widgets.comboboxes import PythonModulesComboBox
 from spyderlib.widgets.externalshell import baseshell
 from spyderlib.widgets.variableexplorer.texteditor import TextEditor
+from spyplugins.ui.profiler.widgets import profilerrunner
+from spyplugins.ui.profiler.widgets.profilerdata import (function_info,
+                                                         LineTimingData,
+                                                         ProfileDiff,
+                                                         ProfilerData,
+                                                         SamplingData)
+from spyplugins.ui.profiler.widgets.profilerrunner import (LINES, SAMPLING,
+                                                           SAMPLING_FREQUENCY)
 
 # This is needed for testing this module as a stand alone script
 try:
@@ -49,6 +58,12 @@ except KeyError as error:
 
 locale_codec = QTextCodec.codecForLocale()
 
+# Profiling mode of cProfile (see profilerrunner for the other modes)
+FUNCTIONS = 'functions'
+
+# Script running the sampling and lines modes
+RUNNER_PATH = osp.splitext(profilerrunner.__file__)[0] + '.py'
+
 
 def is_profiler_installed():
     from spyderlib.utils.programs import is_module_installed
@@ -60,8 +75,12 @@ class ProfilerWidget(QWidget):
     Profiler widget
     """
     DATAPATH = get_conf_path('profiler.results')
+    SAMPLES_PATH = get_conf_path('profiler.samples')
+    LINES_PATH = get_conf_path('profiler.lines')
     VERSION = '0.0.1'
     redirect_stdio = Signal(bool)
+    edit_goto = Signal(str, int, str)
+    sig_line_profiles = Signal(object)
     
     def __init__(self, parent, max_entries=100):
         QWidget.__init__(self, parent)
@@ -74,8 +93,29 @@ class ProfilerWidget(QWidget):
         self._last_wdir = None
         self._last_args = None
         self._last_pythonpath = None
+        self.data_thread = None
+        self.stale_threads = []     # threads whose results are ignored
+        self.profdata = None
+        self.profdiff = None
+        self.results_mode = FUNCTIONS
+        self.sampling_frequency = SAMPLING_FREQUENCY
+        self.line_paths = []
         
         self.filecombo = PythonModulesComboBox(self)
+
+        self.mode_combo = QComboBox(self)
+        for text, mode, tip in (
+                (_("Functions"), FUNCTIONS,
+                 _("Deterministic profiling of function calls (cProfile)")),
+                (_("Sampling"), SAMPLING,
+                 _("Statistical profiling: the call stack is sampled at "
+                   "a fixed frequency, with a low overhead")),
+                (_("Lines"), LINES,
+                 _("Time spent on each line of the profiled script "
+                   "(and of the files set in the preferences)"))):
+            self.mode_combo.addItem(text, mode)
+            self.mode_combo.setItemData(self.mode_combo.count()-1, tip,
+                                        Qt.ToolTipRole)
         
         self.start_button = create_toolbutton(self, icon=ima.icon('run'),
                                     text=_("Profile"),
@@ -105,6 +145,18 @@ class ProfilerWidget(QWidget):
                                             triggered=self.show_log)
 
         self.datatree = ProfilerDataTree(self)
+        self.datatree.sig_edit_goto.connect(self.edit_goto)
+        self.hotspots = ProfilerHotspotsWidget(self)
+        self.hotspots.sig_edit_goto.connect(self.edit_goto)
+        self.flamegraph = FlameGraphWidget(self)
+        self.flamegraph.sig_edit_goto.connect(self.edit_goto)
+        flamegraph_area = QScrollArea(self)
+        flamegraph_area.setWidgetResizable(True)
+        flamegraph_area.setWidget(self.flamegraph)
+        self.views = QTabWidget(self)
+        self.views.addTab(self.datatree, _("Call tree"))
+        self.views.addTab(self.hotspots, _("Hotspots"))
+        self.views.addTab(flamegraph_area, _("Flame graph"))
 
         self.collapse_button = create_toolbutton(self,
                                                  icon=ima.icon('collapse'),
@@ -131,10 +183,16 @@ class ProfilerWidget(QWidget):
                                               text=_("Clear comparison"),
                                               icon=ima.icon('editdelete'),
                                               triggered=self.clear)
+        self.export_button = create_toolbutton(self, text_beside_icon=True,
+                            text=_("Export comparison"),
+                            icon=ima.icon('filesaveas'),
+                            triggered=self.export_comparison,
+                            tip=_('Export comparison to CSV or text file'))
 
         hlayout1 = QHBoxLayout()
         hlayout1.addWidget(self.filecombo)
         hlayout1.addWidget(browse_button)
+        hlayout1.addWidget(self.mode_combo)
         hlayout1.addWidget(self.start_button)
         hlayout1.addWidget(self.stop_button)
 
@@ -148,23 +206,25 @@ class ProfilerWidget(QWidget):
         hlayout2.addWidget(self.save_button)
         hlayout2.addWidget(self.load_button)
         hlayout2.addWidget(self.clear_button)
+        hlayout2.addWidget(self.export_button)
         
         layout = QVBoxLayout()
         layout.addLayout(hlayout1)
         layout.addLayout(hlayout2)
-        layout.addWidget(self.datatree)
+        layout.addWidget(self.views)
         self.setLayout(layout)
         
         self.process = None
         self.set_running_state(False)
         self.start_button.setEnabled(False)
         self.clear_button.setEnabled(False)
+        self.export_button.setEnabled(False)
 
         if not is_profiler_installed():
             # This should happen only on certain GNU/Linux distributions 
             # or when this a home-made Python build because the Python 
             # profilers are included in the Python standard library
-            for widget in (self.datatree, self.filecombo,
+            for widget in (self.views, self.filecombo,
                            self.start_button, self.stop_button):
                 widget.setDisabled(True)
             url = 'http://docs.python.org/library/profile.html'
@@ -174,14 +234,51 @@ class ProfilerWidget(QWidget):
         else:
             pass # self.show_data()
             
+    def get_mode(self):
+        """Return selected profiling mode"""
+        return self.mode_combo.itemData(self.mode_combo.currentIndex())
+
+    def set_mode(self, mode):
+        """Select profiling *mode*"""
+        index = self.mode_combo.findData(mode)
+        if index != -1:
+            self.mode_combo.setCurrentIndex(index)
+
+    def get_results_path(self, mode):
+        """Return path of the results of profiling *mode*"""
+        return {FUNCTIONS: self.DATAPATH, SAMPLING: self.SAMPLES_PATH,
+                LINES: self.LINES_PATH}[mode]
+
     def save_data(self):
         """Save data"""
         title = _( "Save profiler result")
-        filename, _selfilter = getsavefilename(self, title,
-                                               getcwd(),
-                                               _("Profiler result")+" (*.Result)")
+        if self.results_mode == SAMPLING:
+            filters = _("Collapsed stacks")+" (*.txt)"
+        elif self.results_mode == LINES:
+            filters = _("CSV files")+" (*.csv)"
+        else:
+            filters = _("Profiler result")+" (*.Result)"
+        filename, _selfilter = getsavefilename(self, title, getcwd(), filters)
+        if filename and self.profdata is not None:
+            self.profdata.save(filename)
+
+    def export_comparison(self):
+        """Export comparison to reference results"""
+        if self.profdiff is None:
+            return
+        title = _("Export comparison")
+        filename, _selfilter = getsavefilename(self, title, getcwd(),
+                                               _("CSV files")+" (*.csv);;"+
+                                               _("Text files")+" (*.txt)")
         if filename:
-            self.datatree.save_data(filename)
+            try:
+                self.profdiff.save(filename)
+            except EnvironmentError as error:
+                QMessageBox.critical(self, title,
+                                     _("Unable to save file '%s'"
+                                       "<br><br>Error message:<br>%s"
+                                       ) % (osp.basename(filename),
+                                            to_text_string(error)))
             
     def compare(self):
         filename, _selfilter = getopenfilename(self, _("Select script to compare"),
@@ -273,7 +370,17 @@ class ProfilerWidget(QWidget):
         self.output = ''
         self.error_output = ''
         
-        p_args = ['-m', 'cProfile', '-o', self.DATAPATH]
+        self.results_mode = mode = self.get_mode()
+        if mode == FUNCTIONS:
+            p_args = ['-m', 'cProfile', '-o', self.DATAPATH]
+        else:
+            p_args = [RUNNER_PATH, '--mode', mode,
+                      '--output', self.get_results_path(mode)]
+            if mode == SAMPLING:
+                p_args += ['--frequency', str(self.sampling_frequency)]
+            else:
+                for path in self.line_paths:
+                    p_args += ['--trace', path]
         if os.name == 'nt':
             # On Windows, one has to replace backslashes by slashes to avoid 
             # confusion with escape characters (otherwise, for example, '\t' 
@@ -341,291 +448,455 @@ class ProfilerWidget(QWidget):
             return
 
         self.datelabel.setText(_('Sorting data, please wait...'))
-        QApplication.processEvents()
         
-        self.datatree.load_data(self.DATAPATH)
-        self.datatree.show_tree()
+        # Results are loaded in a worker thread
+        self.stop_data_thread()
+        mode = self.results_mode
+        compare_file = self.datatree.compare_file if mode == FUNCTIONS \
+                       else None
+        self.data_thread = ProfilerDataThread(self,
+                                              self.get_results_path(mode),
+                                              compare_file, mode)
+        self.data_thread.sig_finished.connect(self.data_loaded)
+        self.data_thread.start()
+
+    def stop_data_thread(self):
+        """Ignore results of the data loading thread, if any: the thread is
+        not waited for (loading can't be interrupted), it is dropped once it
+        has finished"""
+        thread, self.data_thread = self.data_thread, None
+        if thread is None:
+            return
+        thread.sig_finished.disconnect(self.data_loaded)
+        self.stale_threads.append(thread)
+        thread.finished.connect(lambda: self.drop_stale_thread(thread))
+        if thread.isFinished():
+            self.drop_stale_thread(thread)
+
+    def drop_stale_thread(self, thread):
+        """Delete stale data loading *thread*, which has finished"""
+        if thread in self.stale_threads:
+            self.stale_threads.remove(thread)
+            thread.wait()
+            thread.setParent(None)
+
+    def data_loaded(self):
+        """Results have been loaded by the worker thread"""
+        thread, self.data_thread = self.data_thread, None
+        thread.wait()
+        thread.setParent(None)
+        if thread.error is not None:
+            self.datelabel.setText(_('Unable to load profiling results: %s')
+                                   % thread.error)
+            return
+        self.profdata = thread.profdata
+        self.profdiff = thread.profdiff
+        self.export_button.setEnabled(self.profdiff is not None)
+        functions_mode = thread.mode == FUNCTIONS
+        for button in (self.collapse_button, self.expand_button,
+                       self.load_button):
+            button.setEnabled(functions_mode)
+        self.clear_button.setEnabled(functions_mode and
+                                     self.datatree.compare_file is not None)
+        if functions_mode:
+            self.datatree.set_data(thread.profdata, thread.profdiff)
+            self.hotspots.set_data(thread.profdata, thread.profdiff)
+            self.flamegraph.set_data(None)
+            self.sig_line_profiles.emit({})
+        else:
+            self.datatree.set_data(None)
+            self.hotspots.set_data(None)
+            self.flamegraph.set_data(thread.flame_tree)
+            self.sig_line_profiles.emit(get_line_annotations(thread.profdata,
+                                                             thread.mode))
+        if thread.mode == SAMPLING:
+            self.views.setCurrentIndex(self.views.count()-1)
+        elif functions_mode and self.views.currentIndex() == \
+          self.views.count()-1:
+            self.views.setCurrentIndex(0)
             
         text_style = "<span style=\'color: #444444\'><b>%s </b></span>"
         date_text = text_style % time.strftime("%d %b %Y %H:%M",
                                                time.localtime())
+        if thread.mode == LINES:
+            date_text += _("Line timings are shown in the editor")
+        if self.profdiff is not None:
+            regressions = len(self.profdiff.get_regressions())
+            if regressions:
+                date_text += "<span style=\'color: red\'>%s</span>" % (
+                             _("%d regression(s)") % regressions)
         self.datelabel.setText(date_text)
 
 
-class TreeWidgetItem( QTreeWidgetItem ):
-    def __init__(self, parent=None):
-        QTreeWidgetItem.__init__(self, parent)
-    
-    def __lt__(self, otherItem):
-        column = self.treeWidget().sortColumn()
+class ProfilerDataThread(QThread):
+    """Load profiling results in a worker thread"""
+    sig_finished = Signal()
+
+    def __init__(self, parent, filename, compare_filename=None,
+                 mode=FUNCTIONS):
+        QThread.__init__(self, parent)
+        self.filename = filename
+        self.compare_filename = compare_filename
+        self.mode = mode
+        self.profdata = None
+        self.profdiff = None
+        self.flame_tree = None
+        self.error = None
+
+    def run(self):
         try:
-            return float( self.text(column) ) > float( otherItem.text(column) )
-        except ValueError:
-            return self.text(column) > otherItem.text(column)
+            if self.mode == SAMPLING:
+                self.profdata = SamplingData(self.filename)
+                self.flame_tree = self.profdata.get_flame_tree()
+            elif self.mode == LINES:
+                self.profdata = LineTimingData(self.filename)
+            else:
+                self.profdata = ProfilerData(self.filename)
+                if self.compare_filename is not None:
+                    self.profdiff = ProfileDiff(self.profdata,
+                                        ProfilerData(self.compare_filename))
+                # Hotspots are computed here too, as this takes a while for
+                # large profiles
+                self.profdata.get_hotspots()
+        except Exception as error:
+            # Exceptions are not propagated to the main thread
+            self.error = to_text_string(error)
+        self.sig_finished.emit()
+
+
+def get_line_annotations(profdata, mode):
+    """Return editor annotations of the results *profdata* of the sampling
+    or lines *mode*: {filename: {line number: (text, weight)}}, where weight
+    is the share of runtime of the line (including called functions)"""
+    annotations = {}
+    for filename, line_profile in profdata.get_line_profiles().items():
+        if not osp.isfile(filename):
+            continue
+        file_annotations = annotations[filename] = {}
+        for line_number, (count, duration) in line_profile.items():
+            share = duration/profdata.duration if profdata.duration else 0.
+            if mode == SAMPLING:
+                text = _("%d samples (%.1f%% of runtime), about %.3f s") % (
+                         count, 100*share, duration)
+            else:
+                text = _("%d hits, %.3f s (%.1f%% of runtime), "
+                         "%.3f ms per hit") % (count, duration, 100*share,
+                                               1000*duration/count if count
+                                               else 0.)
+            file_annotations[line_number] = (text, share)
+    return annotations
+
+
+# Call tree columns
+(NAME, TOTAL_TIME, TOTAL_TIME_DIFF, LOCAL_TIME, LOCAL_TIME_DIFF, CALLS,
+ CALLS_DIFF, FILE_LINE) = range(8)
+
+# Column of each value in ProfilerData.get_values() results
+VALUE_COLUMNS = {CALLS: 0, LOCAL_TIME: 1, TOTAL_TIME: 2}
+DIFF_COLUMNS = {CALLS_DIFF: CALLS, LOCAL_TIME_DIFF: LOCAL_TIME,
+                TOTAL_TIME_DIFF: TOTAL_TIME}
+# FunctionDiff attribute shown in each difference column
+DIFF_ATTRIBUTES = {CALLS_DIFF: 'calls_delta', LOCAL_TIME_DIFF: 'self_delta',
+                   TOTAL_TIME_DIFF: 'cum_delta'}
+VALUE_FORMATS = {CALLS: "%i", LOCAL_TIME: "%.3f", TOTAL_TIME: "%.3f"}
+
+
+def get_node_icons():
+    """Return icons of call tree nodes, by node type"""
+    return {'module': ima.icon('python'),
+            'function': ima.icon('function'),
+            'builtin': ima.icon('python_t'),
+            'constructor': ima.icon('class')}
+
+
+def get_share_tooltip(function_diff):
+    """Return tooltip describing the change of the share of runtime of a
+    function (FunctionDiff instance)"""
+    tooltip = _("Share of runtime: %.2f%% (reference: %.2f%%)<br>"
+                "Share of runtime, including sub-functions: %.2f%% "
+                "(reference: %.2f%%)") % (function_diff.self_share,
+                function_diff.ref_self_share, function_diff.cum_share,
+                function_diff.ref_cum_share)
+    if function_diff.regression:
+        tooltip = "<b>%s</b><br>%s" % (_("Regression"), tooltip)
+    return tooltip
+
+
+class ProfilerTreeNode(object):
+    """Call tree node: function *key* called by the function of *parent*"""
+    __slots__ = ('key', 'parent', 'row', 'children', 'recursive')
+
+    def __init__(self, key, parent, row):
+        self.key = key
+        self.parent = parent
+        self.row = row
+        self.children = None    # Created on demand (see fetchMore)
+        self.recursive = False
+        ancestor = parent
+        while ancestor is not None:
+            if ancestor.key == key:
+                self.recursive = True
+                break
+            ancestor = ancestor.parent
 
 
-class ProfilerDataTree(QTreeWidget):
+class ProfilerTreeModel(QAbstractItemModel):
     """
-    Convenience tree widget (with built-in model) 
-    to store and view profiler data.
-
-    The quantities calculated by the profiler are as follows 
-    (from profile.Profile):
-    [0] = The number of times this function was called, not counting direct
-          or indirect recursion,
-    [1] = Number of times this function appears on the stack, minus one
-    [2] = Total time spent internal to this function
-    [3] = Cumulative time that this function was present on the stack.  In
-          non-recursive functions, this is the total execution time from start
-          to finish of each invocation of a function, including time spent in
-          all subfunctions.
-    [4] = A dictionary indicating for each function name, the number of times
-          it was called by us.
+    Call tree model
+
+    Nodes are only created when their parent node is expanded, and their
+    data is formatted when it's shown.
     """
-    SEP = r"<[=]>"  # separator between filename and linenumber
-    # (must be improbable as a filename to avoid splitting the filename itself)
     def __init__(self, parent=None):
-        QTreeWidget.__init__(self, parent)
+        QAbstractItemModel.__init__(self, parent)
         self.header_list = [_('Function/Module'), _('Total Time'), _('Diff'),
                             _('Local Time'), _('Diff'), _('Calls'), _('Diff'),
                             _('File:line')]
-        self.icon_list = {'module': ima.icon('python'),
-                         'function': ima.icon('function'),
-                         'builtin': ima.icon('python_t'),
-                         'constructor': ima.icon('class')}
-        self.profdata = None   # To be filled by self.load_data()
-        self.stats = None      # To be filled by self.load_data()
-        self.item_depth = None
-        self.item_list = None
-        self.items_to_be_shown = None
-        self.current_view_depth = None
+        self.tooltips = {
+            NAME: _('Function or module name'),
+            TOTAL_TIME: _('Time in function (including sub-functions)'),
+            LOCAL_TIME: _('Local time in function (not in sub-functions)'),
+            CALLS: _('Total number of calls (including recursion)'),
+            FILE_LINE: _('File:line where function is defined')}
+        self.icons = get_node_icons()
+        self.profdata = None
+        self.profdiff = None
+        self.root = ProfilerTreeNode(None, None, 0)
+        self.root.children = []
+        self.sort_column = TOTAL_TIME
+        self.sort_order = Qt.DescendingOrder
+
+    def set_data(self, profdata, profdiff=None):
+        """Set profiling results (and their comparison to reference
+        results, see ProfileDiff)"""
+        self.beginResetModel()
+        self.profdata = profdata
+        self.profdiff = profdiff
+        self.root = ProfilerTreeNode(None, None, 0)
+        if profdata is not None and profdata.root is not None:
+            self.root.children = self.create_nodes(self.root,
+                                            profdata.get_callees(profdata.root))
+        else:
+            self.root.children = []
+        self.endResetModel()
+
+    def get_node(self, index):
+        """Return node of *index*"""
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def create_nodes(self, parent, keys):
+        """Create (sorted) nodes of functions *keys* called by *parent*"""
+        nodes = [ProfilerTreeNode(key, parent, 0) for key in keys]
+        self.sort_nodes(nodes)
+        return nodes
+
+    #------ Values
+    def get_value(self, key, column):
+        """Return value of function *key* shown in *column*"""
+        if column in DIFF_COLUMNS:
+            function_diff = self.get_function_diff(key)
+            if function_diff is None:
+                return 0
+            return getattr(function_diff, DIFF_ATTRIBUTES[column])
+        elif column in VALUE_COLUMNS:
+            return self.profdata.get_values(key)[VALUE_COLUMNS[column]]
+        else:
+            return function_info(key)[2 if column == NAME else 3]
+
+    def get_diff(self, key, column):
+        """Return (text, color) of the difference shown in *column*"""
+        if self.profdiff is None:
+            return "", "black"
+        difference = self.get_value(key, column)
+        text_format = VALUE_FORMATS[DIFF_COLUMNS[column]]
+        if difference < 0:
+            return text_format % difference, "green"
+        elif difference > 0:
+            return "+" + text_format % difference, "red"
+        return "", "black"
+
+    def get_function_diff(self, key):
+        """Return comparison of function *key* to reference results"""
+        if self.profdiff is not None:
+            return self.profdiff.get(key)
+
+    #------ Qt model API
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.get_node(parent)
+        if node.children is None or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        children = self.get_node(parent).children
+        return 0 if children is None else len(children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.header_list)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.get_node(parent)
+        if node.children is not None:
+            return len(node.children) > 0
+        return not node.recursive and self.profdata is not None and \
+               self.profdata.has_callees(node.key)
+
+    def canFetchMore(self, parent):
+        node = self.get_node(parent)
+        return node.children is None and self.hasChildren(parent)
+
+    def fetchMore(self, parent):
+        node = self.get_node(parent)
+        if node.children is not None:
+            return
+        nodes = self.create_nodes(node, self.profdata.get_callees(node.key))
+        self.beginInsertRows(parent, 0, len(nodes)-1)
+        node.children = nodes
+        self.endInsertRows()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.internalPointer().recursive:
+            return Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.header_list[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == FILE_LINE and node.recursive:
+                return '(%s)' % _('recursion')
+            elif column in DIFF_COLUMNS:
+                return self.get_diff(node.key, column)[0]
+            elif column in VALUE_COLUMNS:
+                return VALUE_FORMATS[column] % self.get_value(node.key,
+                                                              column)
+            return self.get_value(node.key, column)
+        elif role == Qt.ForegroundRole:
+            if column in DIFF_COLUMNS:
+                return QColor(self.get_diff(node.key, column)[1])
+            elif column == NAME:
+                function_diff = self.get_function_diff(node.key)
+                if function_diff is not None and function_diff.regression:
+                    return QColor("red")
+        elif role == Qt.DecorationRole and column == NAME:
+            return self.icons[function_info(node.key)[4]]
+        elif role == Qt.TextAlignmentRole:
+            if column in VALUE_COLUMNS:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            elif column in DIFF_COLUMNS:
+                return int(Qt.AlignLeft | Qt.AlignVCenter)
+        elif role == Qt.ToolTipRole:
+            function_diff = self.get_function_diff(node.key)
+            if column == NAME and function_diff is not None:
+                return get_share_tooltip(function_diff)
+            return self.tooltips.get(column)
+
+    #------ Sorting
+    def sort_nodes(self, nodes):
+        """Sort *nodes* (siblings) in place and update their row"""
+        if self.profdata is not None:
+            nodes.sort(key=lambda node: self.get_value(node.key,
+                                                       self.sort_column),
+                       reverse=self.sort_order == Qt.DescendingOrder)
+        for row, node in enumerate(nodes):
+            node.row = row
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort created nodes (nodes created later are sorted when they are
+        created)"""
+        self.sort_column = column
+        self.sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node.children:
+                self.sort_nodes(node.children)
+                nodes.extend(node.children)
+        new_indexes = [self.createIndex(index.internalPointer().row,
+                                        index.column(),
+                                        index.internalPointer())
+                       for index in old_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+
+class ProfilerDataTree(QTreeView):
+    """Call tree view of profiling results"""
+    sig_edit_goto = Signal(str, int, str)
+
+    def __init__(self, parent=None):
+        QTreeView.__init__(self, parent)
+        self.tree_model = ProfilerTreeModel(self)
+        self.setModel(self.tree_model)
+        self.profdata = None
+        self.current_view_depth = 0
         self.compare_file = None
-        self.setColumnCount(len(self.header_list))
-        self.setHeaderLabels(self.header_list)
-        self.initialize_view()
-        self.itemActivated.connect(self.item_activated)
-        self.itemExpanded.connect(self.item_expanded)
-
-    def set_item_data(self, item, filename, line_number):
-        """Set tree item user data: filename (string) and line_number (int)"""
-        set_item_user_text(item, '%s%s%d' % (filename, self.SEP, line_number))
-    
-    def get_item_data(self, item):
-        """Get tree item user data: (filename, line_number)"""
-        filename, line_number_str = get_item_user_text(item).split(self.SEP)
-        return filename, int(line_number_str)
-
-    def initialize_view(self):
-        """Clean the tree and view parameters"""
-        self.clear()
-        self.item_depth = 0   # To be use for collapsing/expanding one level
-        self.item_list = []  # To be use for collapsing/expanding one level
-        self.items_to_be_shown = {}
+        self.setUniformRowHeights(True)
+        self.setSortingEnabled(True)
+        self.sortByColumn(TOTAL_TIME, Qt.DescendingOrder)
+        self.hide_diff_cols(True)
+        self.activated.connect(self.item_activated)
+
+    def set_data(self, profdata, profdiff=None):
+        """Show profiling results"""
+        self.profdata = profdata
         self.current_view_depth = 0
+        self.tree_model.set_data(profdata, profdiff)
+        self.resizeColumnToContents(NAME)
+        self.change_view(1)
 
-    def load_data(self, profdatafile):
-        """Load profiler data saved by profile/cProfile module"""
-        import pstats
-        stats_indi = [pstats.Stats(profdatafile),]
-        self.profdata = stats_indi[0]
-        
-        if self.compare_file is not None:
-            stats_indi.append(pstats.Stats(self.compare_file))
-        map(lambda x: x.calc_callees(), stats_indi)
-        self.profdata.calc_callees()
-        self.stats1 = stats_indi
-        self.stats = stats_indi[0].stats
-        
-    def compare(self,filename):
+    def compare(self, filename):
+        """Compare results to those saved in *filename*"""
         self.hide_diff_cols(False)
         self.compare_file = filename
-        
+
     def hide_diff_cols(self, hide):
-        for i in (2,4,6):
-            self.setColumnHidden(i, hide)
-    
-    def save_data(self, filename):
-        """"""
-        self.stats1[0].dump_stats(filename)
-
-    def find_root(self):
-        """Find a function without a caller"""
-        self.profdata.sort_stats("cumulative")
-        for func in self.profdata.fcn_list:
-            if ('~', 0) != func[0:2] and not func[2].startswith(
-                    '<built-in method exec>'):
-                # This skips the profiler function at the top of the list
-                # it does only occur in Python 3
-                return func
-    
-    def find_callees(self, parent):
-        """Find all functions called by (parent) function."""
-        # FIXME: This implementation is very inneficient, because it
-        #        traverses all the data to find children nodes (callees)
-        return self.profdata.all_callees[parent]
-
-    def show_tree(self):
-        """Populate the tree with profiler data and display it."""
-        self.initialize_view() # Clear before re-populating
-        self.setItemsExpandable(True)
-        self.setSortingEnabled(False)
-        rootkey = self.find_root()  # This root contains profiler overhead
-        if rootkey:
-            self.populate_tree(self, self.find_callees(rootkey))
-            self.resizeColumnToContents(0)
-            self.setSortingEnabled(True)
-            self.sortItems(1, Qt.AscendingOrder) # FIXME: hardcoded index
-            self.change_view(1)
-
-    def function_info(self, functionKey):
-        """Returns processed information about the function's name and file."""
-        node_type = 'function'
-        filename, line_number, function_name = functionKey
-        if function_name == '<module>':
-            modulePath, moduleName = osp.split(filename)
-            node_type = 'module'
-            if moduleName == '__init__.py':
-                modulePath, moduleName = osp.split(modulePath)
-            function_name = '<' + moduleName + '>'
-        if not filename or filename == '~':
-            file_and_line = '(built-in)'
-            node_type = 'builtin'
-        else:
-            if function_name == '__init__':
-                node_type = 'constructor'                
-            file_and_line = '%s : %d' % (filename, line_number)
-        return filename, line_number, function_name, file_and_line, node_type
-        
-    def color_string(self, args):
-        x, format = args
-        diff_str = ""
-        color = "black"
-        if len(x) == 2 and self.compare_file is not None:
-            difference = x[0] - x[1]
-            if difference < 0:
-                diff_str = "".join(['',format[1] % difference])
-                color = "green"
-            elif difference > 0:
-                diff_str = "".join(['+',format[1] % difference])
-                color = "red"
-        return [format[0] % x[0], [diff_str, color]]
-
-
-    def format_output(self,child_key):
-        """ Formats the data"""
-        if True:
-            data = [x.stats.get(child_key,[0,0,0,0,0]) for x in self.stats1]
-            return map(self.color_string,zip(list(zip(*data))[1:4], [["%i"]*2, ["%.3f","%.3f"], ["%.3f","%.3f"]]))
-            
-    def populate_tree(self, parentItem, children_list):
-        """Recursive method to create each item (and associated data) in the tree."""
-        for child_key in children_list:
-            self.item_depth += 1
-            (filename, line_number, function_name, file_and_line, node_type
-             ) = self.function_info(child_key)
-
-            ((total_calls, total_calls_dif), (loc_time, loc_time_dif), (cum_time,
-             cum_time_dif)) = self.format_output(child_key)
-
-            (primcalls, total_calls, loc_time, cum_time, callers
-             ) = self.stats[child_key]
-            child_item = TreeWidgetItem(parentItem)
-            self.item_list.append(child_item)
-            self.set_item_data(child_item, filename, line_number)
-
-            # FIXME: indexes to data should be defined by a dictionary on init
-            child_item.setToolTip(0, 'Function or module name')
-            child_item.setData(0, Qt.DisplayRole, function_name)
-            child_item.setIcon(0, self.icon_list[node_type])
-
-            child_item.setToolTip(1, _('Time in function '\
-                                       '(including sub-functions)'))
-            child_item.setData(1, Qt.DisplayRole, cum_time)
-            child_item.setTextAlignment(1, Qt.AlignRight)
-            
-            child_item.setData(2, Qt.DisplayRole, cum_time_dif[0])
-            child_item.setForeground(2, QColor(cum_time_dif[1]))
-            child_item.setTextAlignment(2, Qt.AlignLeft)
+        for column in DIFF_COLUMNS:
+            self.setColumnHidden(column, hide)
 
-            child_item.setToolTip(3, _('Local time in function '\
-                                      '(not in sub-functions)'))
+    def save_data(self, filename):
+        """Save profiling results"""
+        if self.profdata is not None:
+            self.profdata.save(filename)
 
-            child_item.setData(3, Qt.DisplayRole, loc_time)
-            child_item.setTextAlignment(3, Qt.AlignRight)
-            
-            child_item.setData(4, Qt.DisplayRole, loc_time_dif[0])
-            child_item.setForeground(4, QColor(loc_time_dif[1]))
-            child_item.setTextAlignment(4, Qt.AlignLeft)
+    def item_activated(self, index):
+        node = index.internalPointer()
+        filename, line_number = node.key[:2]
+        self.sig_edit_goto.emit(filename, line_number, '')
 
-            child_item.setToolTip(5, _('Total number of calls '\
-                                       '(including recursion)'))
+    def expand_children(self, parent, depth):
+        """Expand children of *parent* on *depth* levels"""
+        for row in range(self.tree_model.rowCount(parent)):
+            index = self.tree_model.index(row, 0, parent)
+            if self.tree_model.hasChildren(index):
+                if self.tree_model.canFetchMore(index):
+                    self.tree_model.fetchMore(index)
+                self.expand(index)
+                if depth > 1:
+                    self.expand_children(index, depth-1)
 
-            child_item.setData(5, Qt.DisplayRole, total_calls)
-            child_item.setTextAlignment(5, Qt.AlignRight)
-            
-            child_item.setData(6, Qt.DisplayRole, total_calls_dif[0])
-            child_item.setForeground(6, QColor(total_calls_dif[1]))
-            child_item.setTextAlignment(6, Qt.AlignLeft)
-
-            child_item.setToolTip(7, _('File:line '\
-                                       'where function is defined'))
-            child_item.setData(7, Qt.DisplayRole, file_and_line)
-            #child_item.setExpanded(True)
-            if self.is_recursive(child_item):
-                child_item.setData(7, Qt.DisplayRole, '(%s)' % _('recursion'))
-                child_item.setDisabled(True)
-            else:
-                callees = self.find_callees(child_key)
-                if self.item_depth < 3:
-                    self.populate_tree(child_item, callees)
-                elif callees:
-                    child_item.setChildIndicatorPolicy(child_item.ShowIndicator)
-                    self.items_to_be_shown[id(child_item)] = callees
-            self.item_depth -= 1
-        
-    def item_activated(self, item):
-        filename, line_number = self.get_item_data(item)
-        self.parent().edit_goto.emit(filename, line_number, '')
-            
-    def item_expanded(self, item):
-        if item.childCount() == 0 and id(item) in self.items_to_be_shown:
-            callees = self.items_to_be_shown[id(item)]
-            self.populate_tree(item, callees)
-    
-    def is_recursive(self, child_item):
-        """Returns True is a function is a descendant of itself."""
-        ancestor = child_item.parent()
-        # FIXME: indexes to data should be defined by a dictionary on init
-        while ancestor:
-            if (child_item.data(0, Qt.DisplayRole
-                                ) == ancestor.data(0, Qt.DisplayRole) and
-                child_item.data(4, Qt.DisplayRole
-                                ) == ancestor.data(4, Qt.DisplayRole)):
-                return True
-            else:
-                ancestor = ancestor.parent()
-        return False
-    
-    def get_top_level_items(self):
-        """Iterate over top level items"""
-        return [self.topLevelItem(_i) for _i in range(self.topLevelItemCount())]
-    
-    def get_items(self, maxlevel):
-        """Return all items with a level <= `maxlevel`"""
-        itemlist = []
-        def add_to_itemlist(item, maxlevel, level=1):
-            level += 1
-            for index in range(item.childCount()):
-                citem = item.child(index)
-                itemlist.append(citem)
-                if level <= maxlevel:
-                    add_to_itemlist(citem, maxlevel, level)
-        for tlitem in self.get_top_level_items():
-            itemlist.append(tlitem)
-            if maxlevel > 0:
-                add_to_itemlist(tlitem, maxlevel=maxlevel)
-        return itemlist
-            
     def change_view(self, change_in_depth):
         """Change the view depth by expand or collapsing all same-level nodes"""
         self.current_view_depth += change_in_depth
@@ -633,9 +904,285 @@ class ProfilerDataTree(QTreeWidget):
             self.current_view_depth = 0
         self.collapseAll()
         if self.current_view_depth > 0:
-            for item in self.get_items(maxlevel=self.current_view_depth-1):
-                item.setExpanded(True)
-    
+            self.expand_children(QModelIndex(), self.current_view_depth)
+
+
+# Hotspots columns
+(HOTSPOT_NAME, HOTSPOT_SELF_TIME, HOTSPOT_CUM_TIME, HOTSPOT_CALLS,
+ HOTSPOT_PER_CALL, HOTSPOT_FILE_LINE) = range(6)
+HOTSPOT_ATTRIBUTES = ('name', 'self_time', 'cum_time', 'calls', 'per_call',
+                      'file_and_line')
+HOTSPOT_FORMATS = {HOTSPOT_SELF_TIME: "%.3f", HOTSPOT_CUM_TIME: "%.3f",
+                   HOTSPOT_CALLS: "%i", HOTSPOT_PER_CALL: "%.6f"}
+
+
+class ProfilerHotspotsModel(QAbstractTableModel):
+    """Flat list of profiled functions, sorted and filtered by the model
+    (filtering is incremental: when the filter text is extended, only the
+    rows matching the previous filter are checked)"""
+    def __init__(self, parent=None):
+        QAbstractTableModel.__init__(self, parent)
+        self.header_list = [_('Function/Module'), _('Local Time'),
+                            _('Total Time'), _('Calls'), _('Per Call'),
+                            _('File:line')]
+        self.tooltips = {
+            HOTSPOT_SELF_TIME: _('Local time in function '
+                                 '(not in sub-functions)'),
+            HOTSPOT_CUM_TIME: _('Time in function (including sub-functions)'),
+            HOTSPOT_CALLS: _('Total number of calls (including recursion)'),
+            HOTSPOT_PER_CALL: _('Time in function per (non recursive) call'),
+            HOTSPOT_FILE_LINE: _('File:line where function is defined')}
+        self.icons = get_node_icons()
+        self.hotspots = []
+        self.profdiff = None
+        self.rows = []
+        self.filter_text = ''
+        self.sort_column = HOTSPOT_SELF_TIME
+        self.sort_order = Qt.DescendingOrder
+
+    def set_data(self, profdata, profdiff=None):
+        """Set profiling results (and their comparison to reference
+        results, see ProfileDiff)"""
+        self.beginResetModel()
+        self.hotspots = [] if profdata is None else profdata.get_hotspots()
+        self.profdiff = profdiff
+        self.rows = self.sort_rows(self.filter_rows(self.hotspots,
+                                                    self.filter_text))
+        self.endResetModel()
+
+    def get_hotspot(self, index):
+        """Return hotspot shown at *index*"""
+        return self.rows[index.row()]
+
+    def filter_rows(self, rows, text):
+        """Return *rows* containing *text* (lower case) in their function
+        name or file name"""
+        if not text:
+            return list(rows)
+        return [row for row in rows if text in row.search_text]
+
+    def sort_rows(self, rows):
+        """Sort *rows* in place and return them"""
+        attribute = HOTSPOT_ATTRIBUTES[self.sort_column]
+        rows.sort(key=lambda row: getattr(row, attribute),
+                  reverse=self.sort_order == Qt.DescendingOrder)
+        return rows
+
+    def set_filter(self, text):
+        """Show only the functions containing *text* in their name or in
+        their file name"""
+        text = to_text_string(text).lower()
+        if self.filter_text and self.filter_text in text:
+            # Rows filtered out previously can't match
+            rows = self.rows
+        else:
+            rows = self.sort_rows(list(self.hotspots))
+        self.beginResetModel()
+        self.filter_text = text
+        self.rows = self.filter_rows(rows, text)
+        self.endResetModel()
+
+    #------ Qt model API
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.header_list)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.header_list[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            value = getattr(row, HOTSPOT_ATTRIBUTES[column])
+            if column in HOTSPOT_FORMATS:
+                return HOTSPOT_FORMATS[column] % value
+            return value
+        elif role == Qt.DecorationRole and column == HOTSPOT_NAME:
+            return self.icons[row.node_type]
+        elif role == Qt.TextAlignmentRole and \
+          column not in (HOTSPOT_NAME, HOTSPOT_FILE_LINE):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        elif role == Qt.ForegroundRole and column == HOTSPOT_NAME \
+          and self.profdiff is not None:
+            function_diff = self.profdiff.get(row.key)
+            if function_diff is not None and function_diff.regression:
+                return QColor("red")
+        elif role == Qt.ToolTipRole:
+            if column == HOTSPOT_NAME and self.profdiff is not None:
+                function_diff = self.profdiff.get(row.key)
+                if function_diff is not None:
+                    return get_share_tooltip(function_diff)
+            return self.tooltips.get(column)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.beginResetModel()
+        self.sort_rows(self.rows)
+        self.endResetModel()
+
+
+class ProfilerHotspotsWidget(QWidget):
+    """Sortable and filterable list of profiled functions"""
+    sig_edit_goto = Signal(str, int, str)
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+        self.filter_edit = QLineEdit(self)
+        self.filter_edit.setPlaceholderText(_("Filter by function or file "
+                                              "name"))
+        self.hotspots_model = ProfilerHotspotsModel(self)
+        self.table = QTableView(self)
+        self.table.setModel(self.hotspots_model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setShowGrid(False)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setDefaultSectionSize(
+                                    self.table.fontMetrics().height()+4)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(HOTSPOT_SELF_TIME, Qt.DescendingOrder)
+        self.filter_edit.textChanged.connect(self.hotspots_model.set_filter)
+        self.table.activated.connect(self.item_activated)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.filter_edit)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+    def set_data(self, profdata, profdiff=None):
+        """Show profiling results"""
+        self.hotspots_model.set_data(profdata, profdiff)
+        self.table.resizeColumnToContents(HOTSPOT_NAME)
+
+    def item_activated(self, index):
+        filename, line_number = self.hotspots_model.get_hotspot(index).key[:2]
+        self.sig_edit_goto.emit(filename, line_number, '')
+
+
+class FlameGraphWidget(QWidget):
+    """
+    Flame graph of sampling profiler results
+
+    Functions are drawn below their caller (the root is at the top), with a
+    width proportional to the number of samples in which they were on the
+    stack. Click on a function to zoom in and on the top row to zoom out,
+    double-click to go to its definition.
+    """
+    sig_edit_goto = Signal(str, int, str)
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+        self.root = None
+        self.zoom_node = None
+        self.rects = []     # (rectangle, node) of the painted nodes
+        self.pressed_node = None
+
+    def set_data(self, root):
+        """Show flame graph of *root* (FlameNode instance)"""
+        self.root = root
+        self.set_zoom_node(root)
+
+    def set_zoom_node(self, node):
+        """Show *node* at the top, with its full width"""
+        self.zoom_node = node
+        depth = node.get_depth()+1 if node is not None else 0
+        self.setMinimumHeight(depth*self.get_row_height())
+        self.update()
+
+    def get_row_height(self):
+        return self.fontMetrics().height()+4
+
+    def get_node_name(self, node):
+        """Return name of *node*"""
+        if node.parent is None:
+            return _("All")
+        return function_info(node.key)[2]
+
+    def get_node_color(self, node):
+        """Return color of *node* (a warm color set by its name)"""
+        name = self.get_node_name(node)
+        value = sum([ord(char) for char in name])
+        return QColor.fromHsv(value % 50, 100+value % 80, 235)
+
+    def get_node_at(self, pos):
+        """Return node painted at *pos*"""
+        for rect, node in self.rects:
+            if rect.contains(pos):
+                return node
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), self.palette().base())
+        self.rects = []
+        if self.zoom_node is None or not self.zoom_node.count:
+            return
+        row_height = self.get_row_height()
+        metrics = self.fontMetrics()
+        nodes = [(self.zoom_node, 0, 0., float(self.width()))]
+        while nodes:
+            node, depth, x, width = nodes.pop()
+            rect = QRect(int(x), depth*row_height,
+                         max(int(x+width)-int(x)-1, 1), row_height-1)
+            painter.fillRect(rect, self.get_node_color(node))
+            if rect.width() > 20:
+                text_rect = rect.adjusted(3, 0, -3, 0)
+                painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter,
+                                 metrics.elidedText(self.get_node_name(node),
+                                                    Qt.ElideRight,
+                                                    text_rect.width()))
+            self.rects.append((rect, node))
+            child_x = x
+            for child in sorted(node.children.values(),
+                                key=lambda child: -child.count):
+                child_width = width*child.count/node.count
+                # Functions narrower than a pixel are not shown
+                if child_width >= 1:
+                    nodes.append((child, depth+1, child_x, child_width))
+                child_x += child_width
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            node = self.get_node_at(event.pos())
+            if node is None:
+                QToolTip.hideText()
+            else:
+                text = "<b>%s</b><br>%s" % (self.get_node_name(node),
+                        _("%d samples (%.1f%%)") % (node.count,
+                                                    100.*node.count /
+                                                    self.root.count))
+                if node.key is not None:
+                    text += "<br>" + function_info(node.key)[3]
+                QToolTip.showText(event.globalPos(), text, self)
+            return True
+        return QWidget.event(self, event)
+
+    def mousePressEvent(self, event):
+        # The first press of a double-click zooms: the node is kept to be
+        # shown by mouseDoubleClickEvent
+        node = self.pressed_node = self.get_node_at(event.pos())
+        if node is None:
+            return
+        if node is self.zoom_node:
+            if node.parent is not None:
+                self.set_zoom_node(node.parent)
+        else:
+            self.set_zoom_node(node)
+
+    def mouseDoubleClickEvent(self, event):
+        node = self.pressed_node
+        if node is not None and node.key is not None:
+            filename, line_number = node.key[:2]
+            if osp.isfile(filename):
+                self.sig_edit_goto.emit(filename, line_number, '')
+
 
 #==============================================================================
 # Tests
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Profiler runner
+
+Run a script with a statistical (sampling) profiler or with a per-line timer.
+This script is executed by the profiled Python interpreter: it depends on the
+standard library only.
+
+Usage:
+python profilerrunner.py --mode sampling [--frequency 100] -o OUTPUT script
+python profilerrunner.py --mode lines [--trace PATH ...] -o OUTPUT script
+(script arguments may follow the script name)
+
+Sampling mode: a thread records the call stack of the main thread at the
+given frequency, the overhead doesn't depend on the number of calls.
+Lines mode: the time spent on each line of the traced files (the script and
+the files or directories given with --trace) is measured with sys.settrace.
+
+Results are saved in OUTPUT (JSON), see profilerdata.SamplingData and
+profilerdata.LineTimingData.
+"""
+
+from __future__ import print_function
+
+import json
+import optparse
+import os
+import os.path as osp
+import runpy
+import sys
+import threading
+import time
+
+try:
+    import thread as _thread  # Python 2
+except ImportError:
+    import _thread  # Python 3
+
+
+# Profiling modes
+SAMPLING, LINES = 'sampling', 'lines'
+
+# Default sampling frequency (Hz)
+SAMPLING_FREQUENCY = 100
+
+# Clock used to time lines
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class StackSampler(threading.Thread):
+    """Thread sampling the call stack of thread *thread_id* every *interval*
+    seconds"""
+    def __init__(self, thread_id, interval):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = {}    # (filename, first line, name): index
+        self.stacks = {}    # tuple of frame indexes (outermost first): count
+        self.lines = {}     # (filename, line): count
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.start_time = self.stop_time = None
+        # Frames of this module and of runpy (which runs the script) are
+        # not recorded
+        self.ignored_globals = set([id(globals()), id(runpy.__dict__)])
+
+    def run(self):
+        self.start_time = time.time()
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.sample(frame)
+
+    def stop(self):
+        """Stop sampling"""
+        self.stop_event.set()
+        self.join()
+        self.stop_time = time.time()
+
+    def sample(self, frame):
+        """Record call stack of *frame*"""
+        stack = []
+        lines = set()
+        while frame is not None:
+            code = frame.f_code
+            if id(frame.f_globals) not in self.ignored_globals:
+                key = (code.co_filename, code.co_firstlineno, code.co_name)
+                index = self.frames.get(key)
+                if index is None:
+                    index = self.frames[key] = len(self.frames)
+                stack.append(index)
+                # Lines are counted once per sample, even in recursive calls
+                lines.add((code.co_filename, frame.f_lineno))
+            frame = frame.f_back
+        if stack:
+            stack = tuple(reversed(stack))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            for line in lines:
+                self.lines[line] = self.lines.get(line, 0) + 1
+            self.samples += 1
+
+    def get_results(self):
+        """Return results (JSON serializable)"""
+        frames = sorted(self.frames, key=self.frames.get)
+        return dict(mode=SAMPLING, interval=self.interval,
+                    duration=self.stop_time-self.start_time,
+                    samples=self.samples,
+                    frames=[list(frame) for frame in frames],
+                    stacks=[[list(stack), count]
+                            for stack, count in self.stacks.items()],
+                    lines=[[filename, line, count]
+                           for (filename, line), count in self.lines.items()])
+
+
+class LineTimer(object):
+    """Measure time spent on each line of the files or directories *paths*
+    (time spent in functions called by a line is included)"""
+    def __init__(self, paths):
+        self.paths = [osp.normcase(osp.abspath(path)) for path in paths]
+        self.traced_codes = {}  # code: True if the code is traced
+        self.lines = {}         # (filename, line): [hits, time]
+        self.start_time = self.stop_time = None
+
+    def is_traced(self, code):
+        """Return True if lines of *code* are timed"""
+        traced = self.traced_codes.get(code)
+        if traced is None:
+            filename = osp.normcase(osp.abspath(code.co_filename))
+            traced = self.traced_codes[code] = any(
+                        [filename == path or filename.startswith(path+os.sep)
+                         for path in self.paths])
+        return traced
+
+    def trace_call(self, frame, event, arg):
+        """Global trace function: trace lines of the timed files only"""
+        if event == 'call' and self.is_traced(frame.f_code):
+            return self.get_line_tracer()
+
+    def get_line_tracer(self):
+        """Return local trace function of a new frame, which attributes the
+        time elapsed between two events to the line of the first one"""
+        state = [None, 0.]      # previous line, time of the previous event
+        lines = self.lines
+
+        def trace_line(frame, event, arg):
+            now = clock()
+            previous_line = state[0]
+            if previous_line is not None:
+                timing = lines.get(previous_line)
+                if timing is None:
+                    timing = lines[previous_line] = [0, 0.]
+                timing[1] += now-state[1]
+            if event == 'line':
+                line = (frame.f_code.co_filename, frame.f_lineno)
+                timing = lines.get(line)
+                if timing is None:
+                    timing = lines[line] = [0, 0.]
+                timing[0] += 1
+                state[0] = line
+            elif event == 'return':
+                state[0] = None
+            # Time spent here is not attributed to the line
+            state[1] = clock()
+            return trace_line
+        return trace_line
+
+    def start(self):
+        """Start timing lines"""
+        self.start_time = time.time()
+        threading.settrace(self.trace_call)
+        sys.settrace(self.trace_call)
+
+    def stop(self):
+        """Stop timing lines"""
+        sys.settrace(None)
+        threading.settrace(None)
+        self.stop_time = time.time()
+
+    def get_results(self):
+        """Return results (JSON serializable)"""
+        return dict(mode=LINES, duration=self.stop_time-self.start_time,
+                    lines=[[filename, line, hits, duration]
+                           for (filename, line), (hits, duration)
+                           in self.lines.items()])
+
+
+def run_script(filename, args, profiler):
+    """Run script *filename* with arguments *args* while *profiler* (an
+    object with start and stop methods) is running"""
+    sys.argv = [filename] + args
+    sys.path[0] = osp.dirname(filename)
+    profiler.start()
+    try:
+        runpy.run_path(filename, run_name='__main__')
+    except SystemExit:
+        pass
+    finally:
+        profiler.stop()
+
+
+def main():
+    parser = optparse.OptionParser(
+                usage="%prog [options] script [script arguments]")
+    parser.disable_interspersed_args()
+    parser.add_option('-m', '--mode', choices=[SAMPLING, LINES],
+                      default=SAMPLING, help="Profiling mode: %s or %s"
+                                             % (SAMPLING, LINES))
+    parser.add_option('-f', '--frequency', type='float',
+                      default=SAMPLING_FREQUENCY,
+                      help="Sampling frequency (Hz)")
+    parser.add_option('-t', '--trace', action='append', default=[],
+                      help="File or directory whose lines are timed "
+                           "(lines mode, the script is always timed)")
+    parser.add_option('-o', '--output', help="Results file (JSON)")
+    options, args = parser.parse_args()
+    if not args or not options.output:
+        parser.error("A script and an output file are required")
+    filename = osp.abspath(args[0])
+    if options.mode == SAMPLING:
+        interval = 1./options.frequency
+        if hasattr(sys, 'setswitchinterval'):
+            # The sampler thread has to acquire the GIL to take samples
+            sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+        profiler = StackSampler(_thread.get_ident(), interval)
+    else:
+        profiler = LineTimer([filename] + options.trace)
+    try:
+        run_script(filename, args[1:], profiler)
+    finally:
+        # Results are saved even if the script raised an exception
+        with open(options.output, 'w') as fdesc:
+            json.dump(profiler.get_results(), fdesc)
+
+
+if __name__ == '__main__':
+    main()
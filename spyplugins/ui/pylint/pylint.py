@@ -23,7 +23,8 @@ from spyderlib.config.base import get_translation
 from spyderlib.plugins import PluginConfigPage, SpyderPluginMixin
 from spyderlib.utils import icon_manager as ima
 from spyderlib.utils.qthelpers import create_action
-from .widgets.pylintgui import (PYLINT_PATH, PylintWidget)
+from .widgets.pylintgui import (MAX_PROCESSES, PROJECT_ANALYSIS_SUPPORTED,
+                                PYLINT_PATH, PylintWidget)
 
 
 _ = get_translation("pylint", "spyplugins.ui.pylint")
@@ -34,6 +35,13 @@ class PylintConfigPage(PluginConfigPage):
         settings_group = QGroupBox(_("Settings"))
         save_box = self.create_checkbox(_("Save file before analyzing it"),
                                         'save_before', default=True)
+        processes_spin = self.create_spinbox(
+                            _("Project analysis: "), _(" processes"),
+                            'max_processes', default=MAX_PROCESSES,
+                            min_=1, max_=64, step=1,
+                            tip=_("Maximum number of pylint processes "
+                                  "analyzing project files in parallel"))
+        processes_spin.setEnabled(PROJECT_ANALYSIS_SUPPORTED)
         
         hist_group = QGroupBox(_("History"))
         hist_label1 = QLabel(_("The following option will be applied at next "
@@ -57,6 +65,7 @@ class PylintConfigPage(PluginConfigPage):
 
         settings_layout = QVBoxLayout()
         settings_layout.addWidget(save_box)
+        settings_layout.addWidget(processes_spin)
         settings_group.setLayout(settings_layout)
 
         hist_layout = QVBoxLayout()
@@ -85,7 +94,9 @@ class Pylint(PylintWidget, SpyderPluginMixin):
 
     def __init__(self, parent=None):
         PylintWidget.__init__(self, parent=parent,
-                              max_entries=self.get_option('max_entries', 50))
+                              max_entries=self.get_option('max_entries', 50),
+                              max_processes=self.get_option('max_processes',
+                                                            MAX_PROCESSES))
         SpyderPluginMixin.__init__(self, parent)
         
         # Initialize plugin
@@ -135,7 +146,12 @@ class Pylint(PylintWidget, SpyderPluginMixin):
         self.register_shortcut(pylint_act, context="Pylint",
                                name="Run analysis")
         
-        self.main.source_menu_actions += [None, pylint_act]
+        project_act = create_action(self,
+                                    _("Run static code analysis on project"),
+                                    triggered=self.run_pylint_project)
+        project_act.setEnabled(PROJECT_ANALYSIS_SUPPORTED)
+
+        self.main.source_menu_actions += [None, pylint_act, project_act]
         self.main.editor.pythonfile_dependent_actions += [pylint_act]
 
     def refresh_plugin(self):
@@ -150,7 +166,8 @@ class Pylint(PylintWidget, SpyderPluginMixin):
         """Apply configuration file's plugin settings"""
         # The history depth option will be applied at 
         # next Spyder startup, which is soon enough
-        pass
+        if 'max_processes' in options:
+            self.set_max_processes(self.get_option('max_processes'))
         
     #------ Public API --------------------------------------------------------
     @Slot()
@@ -170,6 +187,22 @@ class Pylint(PylintWidget, SpyderPluginMixin):
            and not self.main.editor.save():
             return
         self.analyze( self.main.editor.get_current_filename() )
+
+    @Slot()
+    def run_pylint_project(self):
+        """Run pylint code analysis on the project of the current file
+        (or on its directory if it doesn't belong to a project)"""
+        if self.get_option('save_before', True):
+            self.main.editor.save_all()
+        filename = self.main.editor.get_current_filename()
+        root_path = None
+        if self.main.projectexplorer is not None and filename:
+            project = self.main.projectexplorer.get_source_project(filename)
+            if project is not None:
+                root_path = project.root_path
+        if root_path is None and filename:
+            root_path = osp.dirname(filename)
+        self.analyze_project(root_path)
         
     def analyze(self, filename):
         """Reimplement analyze method"""
@@ -178,3 +211,11 @@ class Pylint(PylintWidget, SpyderPluginMixin):
             self.dockwidget.setFocus()
             self.dockwidget.raise_()
         PylintWidget.analyze(self, filename)
+
+    def analyze_project(self, root_path=None):
+        """Reimplement analyze_project method"""
+        if self.dockwidget and not self.ismaximized:
+            self.dockwidget.setVisible(True)
+            self.dockwidget.setFocus()
+            self.dockwidget.raise_()
+        PylintWidget.analyze_project(self, root_path)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2016 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Pylint data
+
+Parsing of pylint output and cache of the results of project analysis,
+without any Qt dependency.
+
+The messages of a file are cached with the hash of its contents, the hash of
+the pylint configuration file and pylint version: files which didn't change
+since they were analyzed are not analyzed again.
+"""
+
+from __future__ import print_function
+
+import hashlib
+import os
+import os.path as osp
+import re
+
+from spyderlib.py3compat import pickle
+
+
+# Template of the messages of project analysis (pylint >= 1.0): messages
+# are attributed to files by their path
+MSG_SEPARATOR = '@@'
+MSG_TEMPLATE = MSG_SEPARATOR.join(['', '{path}', '{line}', '{msg_id}',
+                                   '{symbol}', '{msg}'])
+
+# Directories which are not analyzed in projects
+EXCLUDED_DIRNAMES = ('__pycache__', 'build', 'dist')
+
+
+def parse_messages(output):
+    """Return messages of the default pylint output *output*, by category:
+    {'C:': [(module, line number, message, message id), ...], 'R:': ...}"""
+    # Convention, Refactor, Warning, Error
+    results = {'C:': [], 'R:': [], 'W:': [], 'E:': []}
+    txt_module = '************* Module '
+
+    module = '' # Should not be needed - just in case something goes wrong
+    for line in output.splitlines():
+        if line.startswith(txt_module):
+            # New module
+            module = line[len(txt_module):]
+            continue
+        # Supporting option include-ids: ('R3873:' instead of 'R:')
+        if not re.match('^[CRWE]+([0-9]{4})?:', line):
+            continue
+        i1 = line.find(':')
+        if i1 == -1:
+            continue
+        msg_id = line[:i1]
+        i2 = line.find(':', i1+1)
+        if i2 == -1:
+            continue
+        line_nb = line[i1+1:i2].strip()
+        if not line_nb:
+            continue
+        line_nb = int(line_nb.split(',')[0])
+        message = line[i2+1:]
+        item = (module, line_nb, message, msg_id)
+        results[line[0]+':'].append(item)
+    return results
+
+
+def parse_project_messages(output, root_path):
+    """Return messages of the output of project analysis (see MSG_TEMPLATE)
+    by file: {filename: [(line number, message id, symbol, message), ...]}
+    Paths are relative to *root_path*"""
+    messages = {}
+    for line in output.splitlines():
+        if not line.startswith(MSG_SEPARATOR):
+            continue
+        fields = line.split(MSG_SEPARATOR, 5)
+        if len(fields) != 6:
+            continue
+        _empty, path, line_number, msg_id, symbol, message = fields
+        try:
+            line_number = int(line_number)
+        except ValueError:
+            continue
+        filename = osp.normpath(osp.join(root_path, path))
+        messages.setdefault(filename, []).append((line_number, msg_id,
+                                                  symbol, message))
+    return messages
+
+
+def get_project_files(root_path):
+    """Return Python files of project *root_path* (hidden directories and
+    build directories are skipped)"""
+    filenames = []
+    for dirpath, dirnames, files in os.walk(root_path):
+        dirnames[:] = sorted([dirname for dirname in dirnames
+                              if not dirname.startswith('.')
+                              and dirname not in EXCLUDED_DIRNAMES])
+        filenames += [osp.join(dirpath, fname) for fname in sorted(files)
+                      if osp.splitext(fname)[1] in ('.py', '.pyw')]
+    return filenames
+
+
+def get_file_hash(filename):
+    """Return hash of the contents of *filename* ('' if it can't be read)"""
+    try:
+        with open(filename, 'rb') as fdesc:
+            return hashlib.sha1(fdesc.read()).hexdigest()
+    except (IOError, OSError):
+        return ''
+
+
+def find_pylintrc(dirname):
+    """Return pylint configuration file used when pylint is run in
+    *dirname* (None if there is none), looked up like pylint does"""
+    candidates = [osp.join(dirname, 'pylintrc'),
+                  osp.join(dirname, '.pylintrc')]
+    # Parent packages
+    parent = dirname
+    while osp.isfile(osp.join(parent, '__init__.py')):
+        parent = osp.dirname(parent)
+        candidates.append(osp.join(parent, 'pylintrc'))
+    if 'PYLINTRC' in os.environ:
+        candidates.append(os.environ['PYLINTRC'])
+    home = osp.expanduser('~')
+    candidates += [osp.join(home, '.pylintrc'),
+                   osp.join(home, '.config', 'pylintrc'),
+                   osp.join(os.sep, 'etc', 'pylintrc')]
+    for filename in candidates:
+        if osp.isfile(filename):
+            return filename
+
+
+class PylintCache(object):
+    """Messages of analyzed files, saved in *filename*"""
+    VERSION = '1.0.0'
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = {}   # filename: (key, messages)
+        if osp.isfile(filename):
+            try:
+                with open(filename, 'rb') as fdesc:
+                    data = pickle.loads(fdesc.read())
+                if data[0] == self.VERSION:
+                    self.entries = data[1]
+            except (EOFError, ImportError, IndexError, ValueError,
+                    pickle.UnpicklingError):
+                pass
+
+    def get_key(self, filename, pylintrc_hash, pylint_version):
+        """Return cache key of *filename*"""
+        return (get_file_hash(filename), pylintrc_hash, pylint_version)
+
+    def get(self, filename, key):
+        """Return cached messages of *filename* (None if they are not cached
+        or if *key* changed)"""
+        entry = self.entries.get(filename)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+    def set(self, filename, key, messages):
+        """Cache *messages* of *filename*"""
+        self.entries[filename] = (key, messages)
+
+    def save(self):
+        """Save cache (entries of removed files are dropped)"""
+        self.entries = dict([(filename, entry) for filename, entry
+                             in self.entries.items() if osp.isfile(filename)])
+        with open(self.filename, 'wb') as fdesc:
+            pickle.dump([self.VERSION, self.entries], fdesc, 2)
+
+
+def test():
+    """Parse project messages and check the cache"""
+    import tempfile
+    root_path = tempfile.mkdtemp()
+    filename = osp.join(root_path, 'module.py')
+    with open(filename, 'w') as fdesc:
+        fdesc.write("import os\n")
+    assert get_project_files(root_path) == [filename]
+    output = "\n".join(["************* Module module",
+                        "@@module.py@@1@@W0611@@unused-import@@Unused "
+                        "import os", "@@module.py@@1@@C0111@@"
+                        "missing-docstring@@Missing module docstring"])
+    messages = parse_project_messages(output, root_path)
+    assert len(messages[filename]) == 2, messages
+    cache = PylintCache(osp.join(root_path, 'pylint.cache'))
+    key = cache.get_key(filename, '', '1.5.5')
+    cache.set(filename, key, messages[filename])
+    cache.save()
+    cache = PylintCache(osp.join(root_path, 'pylint.cache'))
+    assert cache.get(filename, key) == messages[filename]
+    with open(filename, 'a') as fdesc:
+        fdesc.write("import sys\n")
+    assert cache.get(filename, cache.get_key(filename, '', '1.5.5')) is None
+    print(messages)
+
+
+if __name__ == '__main__':
+    test()
@@ -13,6 +13,7 @@
 
 # Standard library imports
 from __future__ import print_function, with_statement
+import multiprocessing
 import os
 import os.path as osp
 import re
@@ -20,9 +21,11 @@ import sys
 import time
 
 # Third party imports
-from qtpy.compat import getopenfilename
-from qtpy.QtCore import QByteArray, QProcess, QTextCodec, Signal, Slot
-from qtpy.QtWidgets import (QHBoxLayout, QLabel, QMessageBox, QTreeWidgetItem,
+from qtpy.compat import getexistingdirectory, getopenfilename
+from qtpy.QtCore import (QAbstractTableModel, QByteArray, QModelIndex,
+                         QObject, QProcess, QTextCodec, Qt, Signal, Slot)
+from qtpy.QtWidgets import (QHBoxLayout, QLabel, QLineEdit, QMessageBox,
+                            QTableView, QTabWidget, QTreeWidgetItem,
                             QVBoxLayout, QWidget)
 
 # Local imports
@@ -37,6 +40,13 @@ from spyderlib.widgets.comboboxes import (is_module_or_package,
                                           PythonModulesComboBox)
 from spyderlib.widgets.onecolumntree import OneColumnTree
 from spyderlib.widgets.variableexplorer.texteditor import TextEditor
+from spyplugins.ui.pylint.widgets.pylintdata import (find_pylintrc,
+                                                     get_file_hash,
+                                                     get_project_files,
+                                                     MSG_TEMPLATE,
+                                                     parse_messages,
+                                                     parse_project_messages,
+                                                     PylintCache)
 
 
 # This is needed for testing this module as a stand alone script
@@ -83,11 +93,26 @@ PYLINT_VER = get_pylint_version()
 dependencies.add("pylint", _("Static code analysis"),
                  required_version=PYLINT_REQVER, installed_version=PYLINT_VER)
 
+# Project analysis requires the msg-template option (pylint >= 1.0)
+PROJECT_ANALYSIS_SUPPORTED = PYLINT_PATH is not None and \
+                             PYLINT_VER is not None and \
+                             PYLINT_VER.split('.')[0] != '0'
+
+# Default number of pylint processes run in parallel to analyze projects
+MAX_PROCESSES = multiprocessing.cpu_count()
+
+# Maximum number of files analyzed by each pylint process (a process is
+# started for each group of files, so that files are shared between
+# processes and pylint startup time is not paid for each file)
+FILES_PER_PROCESS = 10
+
 
 #TODO: display results on 3 columns instead of 1: msg_id, lineno, message
 class ResultsTree(OneColumnTree):
     def __init__(self, parent):
         OneColumnTree.__init__(self, parent)
+        # Results tree may be reparented (see PylintWidget tabs)
+        self.pylint_widget = parent
         self.filename = None
         self.results = None
         self.data = None
@@ -98,7 +123,7 @@ class ResultsTree(OneColumnTree):
         data = self.data.get(id(item))
         if data is not None:
             fname, lineno = data
-            self.parent().edit_goto.emit(fname, lineno, '')
+            self.pylint_widget.edit_goto.emit(fname, lineno, '')
 
     def clicked(self, item):
         """Click event"""
@@ -171,15 +196,349 @@ class ResultsTree(OneColumnTree):
                 self.data[id(msg_item)] = (modname, lineno)
 
 
+class ProjectLinter(QObject):
+    """
+    Project analysis
+
+    Files are analyzed by a bounded pool of pylint processes, files which
+    didn't change since their last analysis are taken from *cache*
+    (PylintCache instance).
+    """
+    sig_progress = Signal(int, int)     # analyzed files, total files
+    sig_finished = Signal()
+
+    def __init__(self, parent, cache, max_processes=MAX_PROCESSES):
+        QObject.__init__(self, parent)
+        self.cache = cache
+        self.max_processes = max_processes
+        self.root_path = None
+        self.results = {}       # filename: messages
+        self.keys = {}          # filename: cache key
+        self.pending = []       # groups of files to be analyzed
+        self.processes = {}     # process: group of files it analyzes
+        self.total = 0
+        self.error_output = ''
+
+    def is_running(self):
+        return bool(self.processes)
+
+    def start(self, root_path, filenames):
+        """Analyze *filenames* of project *root_path*"""
+        self.stop()
+        self.root_path = root_path
+        self.results = {}
+        self.keys = {}
+        self.error_output = ''
+        pylintrc = find_pylintrc(root_path)
+        pylintrc_hash = get_file_hash(pylintrc) if pylintrc else ''
+        filenames = [osp.normpath(filename) for filename in filenames]
+        modified = []
+        for filename in filenames:
+            key = self.cache.get_key(filename, pylintrc_hash, PYLINT_VER)
+            messages = self.cache.get(filename, key)
+            if messages is None:
+                self.keys[filename] = key
+                modified.append(filename)
+            else:
+                self.results[filename] = messages
+        self.total = len(filenames)
+        # Files are shared between processes
+        group_size = max(1, min(FILES_PER_PROCESS,
+                                -(-len(modified)//self.max_processes)))
+        self.pending = [modified[index:index+group_size]
+                        for index in range(0, len(modified), group_size)]
+        self.sig_progress.emit(len(self.results), self.total)
+        self.start_processes()
+        if not self.processes:
+            self.finish()
+
+    def start_processes(self):
+        """Start processes analyzing pending files"""
+        while self.pending and len(self.processes) < self.max_processes:
+            filenames = self.pending.pop(0)
+            process = QProcess(self)
+            process.setProcessChannelMode(QProcess.SeparateChannels)
+            process.setWorkingDirectory(self.root_path)
+            process.finished.connect(lambda ec, es=QProcess.NormalExit,
+                                     process=process:
+                                     self.process_finished(process, ec, es))
+            self.processes[process] = filenames
+            p_args = ['--msg-template=' + MSG_TEMPLATE, '--reports=n']
+            p_args += [osp.relpath(filename, self.root_path)
+                       for filename in filenames]
+            process.start(PYLINT_PATH, p_args)
+            if not process.waitForStarted():
+                self.processes.pop(process)
+                self.error_output += _("Process failed to start") + "\n"
+
+    def process_finished(self, process, exit_code, exit_status):
+        """Process analyzing a group of files has finished"""
+        filenames = self.processes.pop(process, None)
+        if filenames is None:
+            # Analysis was stopped
+            return
+        output = to_text_string(locale_codec.toUnicode(
+                                    process.readAllStandardOutput().data()))
+        self.error_output += to_text_string(locale_codec.toUnicode(
+                                    process.readAllStandardError().data()))
+        process.deleteLater()
+        messages = parse_project_messages(output, self.root_path)
+        if len(filenames) == 1:
+            # Messages can't be attributed to another file
+            messages = {filenames[0]: sum(messages.values(), [])}
+        # Results are not cached if pylint crashed, if a fatal message was
+        # issued (bit 1 of pylint exit status) or in case of usage error
+        # (bit 32)
+        cache = exit_status == QProcess.NormalExit and not exit_code & 33
+        for filename in filenames:
+            file_messages = messages.get(filename, [])
+            self.results[filename] = file_messages
+            if cache:
+                self.cache.set(filename, self.keys[filename], file_messages)
+        self.sig_progress.emit(len(self.results), self.total)
+        self.start_processes()
+        if not self.processes:
+            self.finish()
+
+    def finish(self):
+        self.pending = []
+        self.cache.save()
+        self.sig_finished.emit()
+
+    def stop(self):
+        """Stop analysis"""
+        self.pending = []
+        processes, self.processes = self.processes, {}
+        for process in processes:
+            process.kill()
+            process.waitForFinished()
+
+
+# Project messages columns
+(MSG_FILE, MSG_LINE, MSG_ID, MSG_SYMBOL, MSG_TEXT) = range(5)
+
+# Totals columns
+(TOTAL_NAME, TOTAL_COUNT, TOTAL_CONVENTION, TOTAL_REFACTOR, TOTAL_WARNING,
+ TOTAL_ERROR) = range(6)
+
+# Totals column of each message category (fatal messages are errors)
+CATEGORY_COLUMNS = {'C': TOTAL_CONVENTION, 'R': TOTAL_REFACTOR,
+                    'W': TOTAL_WARNING, 'E': TOTAL_ERROR, 'F': TOTAL_ERROR}
+
+
+def get_category_icons():
+    """Return icons of message categories"""
+    return {'C': ima.icon('convention'), 'R': ima.icon('refactor'),
+            'W': ima.icon('warning'), 'E': ima.icon('error'),
+            'F': ima.icon('error')}
+
+
+class PylintTableModel(QAbstractTableModel):
+    """Table of *rows* (tuples) sorted and filtered by the model
+    (filtering is incremental: when the filter text is extended, only the
+    rows matching the previous filter are checked)
+    The last item of a row is the text matched by the filter"""
+    def __init__(self, parent, header_list):
+        QAbstractTableModel.__init__(self, parent)
+        self.header_list = header_list
+        self.all_rows = []
+        self.rows = []
+        self.filter_text = ''
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+
+    def set_rows(self, rows):
+        """Set rows of table"""
+        self.beginResetModel()
+        self.all_rows = rows
+        self.rows = self.sort_rows(self.filter_rows(rows, self.filter_text))
+        self.endResetModel()
+
+    def filter_rows(self, rows, text):
+        """Return *rows* containing *text* (lower case)"""
+        if not text:
+            return list(rows)
+        return [row for row in rows if text in row[-1]]
+
+    def sort_rows(self, rows):
+        """Sort *rows* in place and return them"""
+        column = self.sort_column
+        rows.sort(key=lambda row: row[column],
+                  reverse=self.sort_order == Qt.DescendingOrder)
+        return rows
+
+    def set_filter(self, text):
+        """Show only rows containing *text*"""
+        text = to_text_string(text).lower()
+        if self.filter_text and self.filter_text in text:
+            # Rows filtered out previously can't match
+            rows = self.rows
+        else:
+            rows = self.sort_rows(list(self.all_rows))
+        self.beginResetModel()
+        self.filter_text = text
+        self.rows = self.filter_rows(rows, text)
+        self.endResetModel()
+
+    def get_row(self, index):
+        return self.rows[index.row()]
+
+    #------ Qt model API
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.header_list)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.header_list[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.rows[index.row()][index.column()]
+        elif role == Qt.TextAlignmentRole and \
+          isinstance(self.rows[index.row()][index.column()], int):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.beginResetModel()
+        self.sort_rows(self.rows)
+        self.endResetModel()
+
+
+class PylintMessagesModel(PylintTableModel):
+    """Messages of project analysis
+    Rows: (file, line, message id, symbol, message, filename, filter text)"""
+    def __init__(self, parent=None):
+        PylintTableModel.__init__(self, parent, [_('File'), _('Line'),
+                                                 _('Message ID'), _('Symbol'),
+                                                 _('Message')])
+        self.icons = get_category_icons()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role == Qt.DecorationRole and \
+          index.column() == MSG_ID:
+            return self.icons.get(self.rows[index.row()][MSG_ID][:1])
+        return PylintTableModel.data(self, index, role)
+
+
+class PylintTotalsModel(PylintTableModel):
+    """Number of messages by file or by message
+    Rows: (name, total, convention, refactor, warning, error, filter text)"""
+    def __init__(self, parent, name_title):
+        PylintTableModel.__init__(self, parent, [name_title, _('Total'),
+                                                 _('Convention'),
+                                                 _('Refactor'), _('Warning'),
+                                                 _('Error')])
+        self.sort_column = TOTAL_COUNT
+        self.sort_order = Qt.DescendingOrder
+
+
+class PylintProjectWidget(QWidget):
+    """Sortable and filterable messages of project analysis, with their
+    totals by file and by message"""
+    edit_goto = Signal(str, int, str)
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+        self.filter_edit = QLineEdit(self)
+        self.filter_edit.setPlaceholderText(_("Filter by file, message ID, "
+                                              "symbol or message"))
+        self.messages_model = PylintMessagesModel(self)
+        self.files_model = PylintTotalsModel(self, _('File'))
+        self.msg_types_model = PylintTotalsModel(self, _('Message'))
+        self.tabs = QTabWidget(self)
+        self.tables = []
+        for model, title in ((self.messages_model, _("Messages")),
+                             (self.files_model, _("Files")),
+                             (self.msg_types_model, _("Message types"))):
+            table = QTableView(self)
+            table.setModel(model)
+            table.setSelectionBehavior(QTableView.SelectRows)
+            table.setShowGrid(False)
+            table.verticalHeader().hide()
+            table.verticalHeader().setDefaultSectionSize(
+                                        table.fontMetrics().height()+4)
+            table.horizontalHeader().setStretchLastSection(True)
+            table.setSortingEnabled(True)
+            table.sortByColumn(model.sort_column, model.sort_order)
+            self.filter_edit.textChanged.connect(model.set_filter)
+            self.tabs.addTab(table, title)
+            self.tables.append(table)
+        self.tables[0].activated.connect(self.message_activated)
+        self.tables[1].activated.connect(self.total_activated)
+        self.tables[2].activated.connect(self.total_activated)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.filter_edit)
+        layout.addWidget(self.tabs)
+        self.setLayout(layout)
+
+    def set_results(self, root_path, results):
+        """Show *results* of project *root_path*:
+        {filename: [(line number, message id, symbol, message), ...]}"""
+        messages = []
+        files = []
+        msg_types = {}
+        for filename, file_messages in results.items():
+            path = osp.relpath(filename, root_path)
+            counts = [0]*6
+            for line_number, msg_id, symbol, message in file_messages:
+                messages.append((path, line_number, msg_id, symbol, message,
+                                 filename, (' '.join([path, msg_id, symbol,
+                                                      message])).lower()))
+                column = CATEGORY_COLUMNS.get(msg_id[:1])
+                msg_counts = msg_types.get(msg_id)
+                if msg_counts is None:
+                    msg_counts = msg_types[msg_id] = [0]*6
+                    msg_counts[TOTAL_NAME] = "%s (%s)" % (msg_id, symbol)
+                for row_counts in (counts, msg_counts):
+                    row_counts[TOTAL_COUNT] += 1
+                    if column is not None:
+                        row_counts[column] += 1
+            if file_messages:
+                counts[TOTAL_NAME] = path
+                files.append(tuple(counts) + (path.lower(),))
+        self.messages_model.set_rows(messages)
+        self.files_model.set_rows(files)
+        self.msg_types_model.set_rows([tuple(counts) +
+                                       (counts[TOTAL_NAME].lower(),)
+                                       for counts in msg_types.values()])
+        for table in self.tables:
+            table.resizeColumnToContents(0)
+
+    def message_activated(self, index):
+        row = self.messages_model.get_row(index)
+        self.edit_goto.emit(row[-2], row[MSG_LINE], '')
+
+    def total_activated(self, index):
+        """Show messages of a file or of a message type"""
+        row = index.model().get_row(index)
+        name = row[TOTAL_NAME]
+        if index.model() is self.msg_types_model:
+            # Message id
+            name = name.split(' ')[0]
+        self.filter_edit.setText(name)
+        self.tabs.setCurrentIndex(0)
+
+
 class PylintWidget(QWidget):
     """
     Pylint widget
     """
     DATAPATH = get_conf_path('pylint.results')
+    CACHEPATH = get_conf_path('pylint.cache')
     VERSION = '1.1.0'
     redirect_stdio = Signal(bool)
+    edit_goto = Signal(str, int, str)
     
-    def __init__(self, parent, max_entries=100):
+    def __init__(self, parent, max_entries=100, max_processes=MAX_PROCESSES):
         QWidget.__init__(self, parent)
         
         self.setWindowTitle("Pylint")
@@ -226,11 +585,35 @@ class PylintWidget(QWidget):
                                     tip=_("Complete output"),
                                     triggered=self.show_log)
         self.treewidget = ResultsTree(self)
+
+        self.project_button = create_toolbutton(self,
+                                    icon=ima.icon('DirOpenIcon'),
+                                    text=_("Analyze project"),
+                                    tip=_("Run analysis on all Python files "
+                                          "of a directory"),
+                                    triggered=lambda: self.analyze_project(),
+                                    text_beside_icon=True)
+        self.project_button.setEnabled(PROJECT_ANALYSIS_SUPPORTED)
+        self.project_root = None
+        self.project_widget = PylintProjectWidget(self)
+        self.project_widget.edit_goto.connect(self.edit_goto)
+        self.linter = ProjectLinter(self, PylintCache(self.CACHEPATH),
+                                    max_processes)
+        self.linter.sig_progress.connect(self.project_progress)
+        self.linter.sig_finished.connect(self.project_finished)
+        self.stop_button.clicked.connect(self.linter.stop)
+        self.stop_button.clicked.connect(
+                                lambda: self.set_running_state(False))
+
+        self.tabs = QTabWidget(self)
+        self.tabs.addTab(self.treewidget, _("File"))
+        self.tabs.addTab(self.project_widget, _("Project"))
         
         hlayout1 = QHBoxLayout()
         hlayout1.addWidget(self.filecombo)
         hlayout1.addWidget(browse_button)
         hlayout1.addWidget(self.start_button)
+        hlayout1.addWidget(self.project_button)
         hlayout1.addWidget(self.stop_button)
 
         hlayout2 = QHBoxLayout()
@@ -243,7 +626,7 @@ class PylintWidget(QWidget):
         layout = QVBoxLayout()
         layout.addLayout(hlayout1)
         layout.addLayout(hlayout2)
-        layout.addWidget(self.treewidget)
+        layout.addWidget(self.tabs)
         self.setLayout(layout)
         
         self.process = None
@@ -251,7 +634,8 @@ class PylintWidget(QWidget):
         
         if PYLINT_PATH is None:
             for widget in (self.treewidget, self.filecombo,
-                           self.start_button, self.stop_button):
+                           self.start_button, self.project_button,
+                           self.stop_button):
                 widget.setDisabled(True)
             if os.name == 'nt' \
                and programs.is_module_installed("pylint"):
@@ -272,6 +656,8 @@ class PylintWidget(QWidget):
             return
         filename = to_text_string(filename) # filename is a QString instance
         self.kill_if_running()
+        self.linter.stop()
+        self.tabs.setCurrentWidget(self.treewidget)
         index, _data = self.get_data(filename)
         if index is None:
             self.filecombo.addItem(filename)
@@ -282,6 +668,47 @@ class PylintWidget(QWidget):
         if self.filecombo.is_valid():
             self.start()
 
+    def analyze_project(self, root_path=None):
+        """Analyze all Python files of directory *root_path*
+        (a directory is selected by the user if *root_path* is None)"""
+        if not PROJECT_ANALYSIS_SUPPORTED:
+            return
+        if root_path is None:
+            self.redirect_stdio.emit(False)
+            root_path = getexistingdirectory(self, _("Select directory"),
+                                             self.project_root or getcwd())
+            self.redirect_stdio.emit(True)
+            if not root_path:
+                return
+        self.kill_if_running()
+        self.project_root = osp.abspath(to_text_string(root_path))
+        self.tabs.setCurrentWidget(self.project_widget)
+        self.set_running_state(True)
+        self.datelabel.setText('')
+        self.linter.start(self.project_root,
+                          get_project_files(self.project_root))
+
+    def set_max_processes(self, max_processes):
+        """Set maximum number of pylint processes analyzing projects"""
+        self.linter.max_processes = max_processes
+
+    def project_progress(self, analyzed, total):
+        """Show progress of project analysis"""
+        self.ratelabel.setText(_("Analyzing project: %d/%d files")
+                               % (analyzed, total))
+
+    def project_finished(self):
+        """Show results of project analysis"""
+        self.set_running_state(False)
+        results = self.linter.results
+        self.project_widget.set_results(self.project_root, results)
+        count = sum([len(messages) for messages in results.values()])
+        self.ratelabel.setText(_("%d messages in %d files")
+                               % (count, len(results)))
+        self.datelabel.setText(self.project_root)
+        self.output = self.linter.error_output or None
+        self.log_button.setEnabled(bool(self.output))
+
     @Slot()
     def select_file(self):
         self.redirect_stdio.emit(False)
@@ -365,6 +792,8 @@ class PylintWidget(QWidget):
     
     def set_running_state(self, state=True):
         self.start_button.setEnabled(not state)
+        self.project_button.setEnabled(not state and
+                                       PROJECT_ANALYSIS_SUPPORTED)
         self.stop_button.setEnabled(state)
         
     def read_output(self, error=False):
@@ -392,33 +821,7 @@ class PylintWidget(QWidget):
                 print("pylint error:\n\n" + self.error_output, file=sys.stderr)
             return
         
-        # Convention, Refactor, Warning, Error
-        results = {'C:': [], 'R:': [], 'W:': [], 'E:': []}
-        txt_module = '************* Module '
-        
-        module = '' # Should not be needed - just in case something goes wrong
-        for line in self.output.splitlines():
-            if line.startswith(txt_module):
-                # New module
-                module = line[len(txt_module):]
-                continue
-            # Supporting option include-ids: ('R3873:' instead of 'R:')
-            if not re.match('^[CRWE]+([0-9]{4})?:', line):
-                continue
-            i1 = line.find(':')
-            if i1 == -1:
-                continue
-            msg_id = line[:i1]
-            i2 = line.find(':', i1+1)
-            if i2 == -1:
-                continue
-            line_nb = line[i1+1:i2].strip()
-            if not line_nb:
-                continue
-            line_nb = int(line_nb.split(',')[0])
-            message = line[i2+1:]
-            item = (module, line_nb, message, msg_id)
-            results[line[0]+':'].append(item)
+        results = parse_messages(self.output)
             
         # Rate
         rate = None